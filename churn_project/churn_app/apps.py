@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ChurnAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'churn_app'
+
+    def ready(self):
+        # Pay for importing sklearn and unpickling the model before the first request
+        if settings.CHURN_MODEL.get('PRELOAD', False):
+            from .warmup import warm_up_model
+            warm_up_model()
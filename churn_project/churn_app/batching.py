@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import weakref
+
+from django.conf import settings
+
+from .model_registry import registry as model_registry
+from .scoring import score_batch
+
+
+def score_rows(rows):
+    """Score a list of raw feature dicts with the current model (runs in a worker thread)"""
+    components = model_registry.get()
+    probabilities, errors = score_batch(components, rows)
+    return components, probabilities, errors
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row predictions into one vectorized call.
+
+    Callers await submit() with one feature dict. A background task on the
+    event loop collects requests until MAX_BATCH_SIZE is reached or
+    MAX_WAIT_MS has passed since the first one, scores them together in a
+    worker thread and resolves each caller's future with its own row.
+
+    Each event loop gets its own queue and worker task, and only requests
+    served by the same loop are coalesced. Under ASGI that is the server's
+    long-lived loop, so concurrent requests share batches. Under WSGI every
+    request runs on a loop of its own and is scored as a batch of one.
+    """
+
+    def __init__(self, max_batch_size=None, max_wait_ms=None, score_fn=score_rows):
+        config = getattr(settings, 'PREDICTION_BATCHING', {})
+        self.max_batch_size = max_batch_size or config.get('MAX_BATCH_SIZE', 64)
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else config.get('MAX_WAIT_MS', 5)) / 1000
+        self.score_fn = score_fn
+        # loop -> (queue, worker task). The worker refers to its loop, so it
+        # removes the entry itself when it stops (see _run)
+        self._workers = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _queue_for(self, loop):
+        """The running loop's queue, starting its worker task if needed"""
+        with self._lock:
+            queue, worker = self._workers.get(loop, (None, None))
+            if worker is None or worker.done():
+                queue = asyncio.Queue()
+                worker = loop.create_task(self._run(loop, queue))
+                self._workers[loop] = (queue, worker)
+            return queue
+
+    async def submit(self, data):
+        """Score one feature dict; returns (probability, components)"""
+        loop = asyncio.get_running_loop()
+        queue = self._queue_for(loop)
+        future = loop.create_future()
+        await queue.put((data, future))
+        return await future
+
+    async def _collect(self, loop, queue):
+        batch = [await queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self, loop, queue):
+        try:
+            await self._serve(loop, queue)
+        finally:
+            # Cancelled when its loop shuts down, e.g. at the end of asyncio.run()
+            with self._lock:
+                if self._workers.get(loop, (None, None))[0] is queue:
+                    del self._workers[loop]
+
+    async def _serve(self, loop, queue):
+        while True:
+            batch = await self._collect(loop, queue)
+            rows = [data for data, _ in batch]
+            try:
+                components, probabilities, errors = await loop.run_in_executor(
+                    None, self.score_fn, rows
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for index, (_, future) in enumerate(batch):
+                if future.done():  # caller went away
+                    continue
+                if index in errors:
+                    future.set_exception(ValueError(errors[index]))
+                else:
+                    future.set_result((float(probabilities[index]), components))
+
+
+batcher = MicroBatcher()
@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+import time
+
+from django.db import connections, router, transaction
+
+
+def copy_supported(model):
+    """COPY FROM STDIN is only available on PostgreSQL through psycopg2/psycopg"""
+    connection = connections[router.db_for_write(model)]
+    return connection.vendor == 'postgresql'
+
+
+def copy_rows(model, objs):
+    """
+    Insert model instances with a single COPY ... FROM STDIN (CSV).
+
+    Applies the same pre_save() hooks as bulk_create (auto_now_add etc.),
+    but never sets primary keys on the instances.
+    """
+    using = router.db_for_write(model)
+    connection = connections[using]
+    # Database-generated primary keys are left to their sequence
+    fields = [f for f in model._meta.concrete_fields if not (f.primary_key and f.auto_created)]
+
+    # An unquoted \N is NULL; every other value goes through the csv module
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for obj in objs:
+        row = []
+        for field in fields:
+            value = field.pre_save(obj, add=True)
+            if value is None:
+                row.append('\\N')
+            elif field.get_internal_type() == 'JSONField':
+                row.append(json.dumps(value, cls=field.encoder))
+            else:
+                row.append(field.get_db_prep_save(value, connection))
+        writer.writerow(row)
+    buffer.seek(0)
+
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = ', '.join(connection.ops.quote_name(f.column) for f in fields)
+    sql = f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    with connection.cursor() as cursor:
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, 'copy_expert'):  # psycopg2
+            raw_cursor.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with raw_cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+    return len(objs)
+
+
+class BufferedWriter:
+    """
+    Collects unsaved model instances and writes them in batches.
+
+    Every flush runs in its own transaction, so a run commits in bounded
+    steps and never holds more than batch_size pending rows in memory.
+    With use_copy on PostgreSQL rows are written with COPY, otherwise (or
+    if COPY fails) with bulk_create.
+    """
+
+    def __init__(self, model, batch_size=1000, use_copy=False, verbose=True):
+        self.model = model
+        self.batch_size = batch_size
+        self.use_copy = use_copy and copy_supported(model)
+        self.verbose = verbose
+        self.pending = []
+        self.total_written = 0
+        self.flush_count = 0
+
+    def add(self, obj):
+        self.pending.append(obj)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def count_pending(self, predicate=None):
+        if predicate is None:
+            return len(self.pending)
+        return sum(1 for obj in self.pending if predicate(obj))
+
+    def flush(self):
+        """Write everything pending; returns the number of rows written"""
+        if not self.pending:
+            return 0
+
+        objs, self.pending = self.pending, []
+        start_time = time.perf_counter()
+        method = 'bulk_create'
+        using = router.db_for_write(self.model)
+
+        if self.use_copy:
+            try:
+                with transaction.atomic(using=using):
+                    written = copy_rows(self.model, objs)
+                method = 'copy'
+            except Exception as e:
+                print(f"COPY into {self.model._meta.db_table} failed, falling back to bulk_create: {str(e)}")
+                self.use_copy = False
+
+        if method == 'bulk_create':
+            with transaction.atomic(using=using):
+                written = len(self.model.objects.bulk_create(objs, batch_size=self.batch_size))
+
+        self.total_written += written
+        self.flush_count += 1
+        if self.verbose:
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            print(f"Flushed {written} {self.model.__name__} rows via {method} in {elapsed_ms:.1f} ms")
+        return written
@@ -0,0 +1,108 @@
+import numpy as np
+
+from .scoring import numerical_features, categorical_features
+
+N_NUMERICAL = len(numerical_features)
+
+
+class FeatureBlock:
+    """
+    Model feature columns for a run of customers, as NumPy arrays:
+    customer_ids (int64), numeric (float64, NaN where the column is NULL),
+    geography/gender (object, None where NULL) and any extra columns by name.
+    """
+
+    def __init__(self, customer_ids, numeric, geography, gender, extra=None):
+        self.customer_ids = customer_ids
+        self.numeric = numeric
+        self.geography = geography
+        self.gender = gender
+        self.extra = extra or {}
+
+    def __len__(self):
+        return len(self.customer_ids)
+
+    @classmethod
+    def allocate(cls, size, extra_columns=()):
+        return cls(
+            customer_ids=np.empty(size, dtype=np.int64),
+            numeric=np.empty((size, N_NUMERICAL), dtype=np.float64),
+            geography=np.empty(size, dtype=object),
+            gender=np.empty(size, dtype=object),
+            extra={name: np.empty(size, dtype=object) for name in extra_columns},
+        )
+
+    def view(self, start, stop):
+        return FeatureBlock(
+            customer_ids=self.customer_ids[start:stop],
+            numeric=self.numeric[start:stop],
+            geography=self.geography[start:stop],
+            gender=self.gender[start:stop],
+            extra={name: values[start:stop] for name, values in self.extra.items()},
+        )
+
+    def fill_row(self, index, row):
+        """Copy one values_list() row (customer_id, numerical..., geography, gender, extra...)"""
+        self.customer_ids[index] = row[0]
+        self.numeric[index] = [np.nan if value is None else float(value) for value in row[1:N_NUMERICAL + 1]]
+        self.geography[index] = row[N_NUMERICAL + 1]
+        self.gender[index] = row[N_NUMERICAL + 2]
+        for offset, values in enumerate(self.extra.values(), start=N_NUMERICAL + 3):
+            values[index] = row[offset]
+
+
+def iter_feature_blocks(queryset, chunk_size=1000, extra_columns=()):
+    """
+    Stream the feature columns of a CustomerChurn queryset in blocks of at
+    most chunk_size rows.
+
+    Only the model columns are selected, through a server-side cursor on
+    PostgreSQL (QuerySet.iterator), and copied into one preallocated block
+    that is reused for every chunk. A yielded block is only valid until the
+    next one is requested.
+    """
+    columns = ['customer_id', *numerical_features, *categorical_features, *extra_columns]
+    buffer = FeatureBlock.allocate(chunk_size, extra_columns)
+
+    filled = 0
+    for row in queryset.values_list(*columns).iterator(chunk_size=chunk_size):
+        buffer.fill_row(filled, row)
+        filled += 1
+        if filled == chunk_size:
+            yield buffer
+            filled = 0
+    if filled:
+        yield buffer.view(0, filled)
+
+
+def load_feature_arrays(queryset, chunk_size=10000, extra_columns=()):
+    """
+    Stream a whole queryset into one FeatureBlock sized from COUNT(*).
+    Rows are copied chunk by chunk, so no full-table list of row tuples or
+    model instances is ever built.
+    """
+    total = queryset.count()
+    result = FeatureBlock.allocate(total, extra_columns)
+
+    filled = 0
+    for block in iter_feature_blocks(queryset, chunk_size, extra_columns):
+        if filled + len(block) > total:
+            # Rows inserted after the count: grow instead of failing
+            total = filled + len(block)
+            grown = FeatureBlock.allocate(total, extra_columns)
+            for name in ('customer_ids', 'numeric', 'geography', 'gender'):
+                getattr(grown, name)[:filled] = getattr(result, name)[:filled]
+            for name, values in result.extra.items():
+                grown.extra[name][:filled] = values[:filled]
+            result = grown
+
+        stop = filled + len(block)
+        result.customer_ids[filled:stop] = block.customer_ids
+        result.numeric[filled:stop] = block.numeric
+        result.geography[filled:stop] = block.geography
+        result.gender[filled:stop] = block.gender
+        for name, values in block.extra.items():
+            result.extra[name][filled:stop] = values
+        filled = stop
+
+    return result.view(0, filled)
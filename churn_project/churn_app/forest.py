@@ -0,0 +1,156 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+
+class FlatForest:
+    """
+    A trained RandomForestClassifier flattened into plain NumPy node arrays.
+
+    All trees are concatenated into one set of arrays (feature, threshold,
+    left/right child, per-node class probabilities). Leaves point to
+    themselves, so every row and every tree can be walked in lockstep with a
+    few vectorized gathers per level, without sklearn's per-call overhead.
+
+    Exposes predict_proba()/predict() so it can stand in for the sklearn model.
+
+    save()/load() store the arrays as plain .npy files, which load() can
+    memory-map read-only so every worker on a host shares the same pages.
+    """
+
+    array_names = ('feature', 'threshold', 'left', 'right', 'value', 'roots', 'is_leaf')
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes, is_leaf=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = np.asarray(classes)
+        self.is_leaf = is_leaf if is_leaf is not None else left == np.arange(len(left))
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Flatten a fitted RandomForestClassifier (or a single DecisionTreeClassifier)"""
+        estimators = getattr(model, 'estimators_', None) or [model]
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes, dtype=np.int64)
+            is_leaf = tree.children_left == -1
+
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+
+            # Same normalization as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int64))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(left)
+            rights.append(right)
+            values.append(value / normalizer)
+            roots.append(offset)
+
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int64),
+            max_depth=max_depth,
+            classes=model.classes_,
+        )
+
+    def save(self, directory):
+        """Write the forest as one .npy file per array plus a small meta.json"""
+        directory = Path(directory)
+        tmp_dir = directory.with_name(f".{directory.name}.{os.getpid()}.tmp")
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir(parents=True)
+
+        for name in self.array_names:
+            # Uncompressed and C-contiguous so np.load can memory-map it
+            np.save(tmp_dir / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+        with open(tmp_dir / "meta.json", 'w', encoding='utf-8') as f:
+            json.dump({'max_depth': self.max_depth, 'classes': self.classes_.tolist()}, f)
+
+        os.replace(tmp_dir, directory)
+        return directory
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Load a saved forest; with mmap_mode='r' the arrays stay in the shared page cache"""
+        directory = Path(directory)
+        with open(directory / "meta.json", 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode)
+            for name in cls.array_names
+        }
+        return cls(max_depth=meta['max_depth'], classes=meta['classes'], **arrays)
+
+    def apply(self, X):
+        """Leaf node index reached in every tree, shape (n_rows, n_trees)"""
+        # sklearn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.repeat(self.roots[np.newaxis, :], X.shape[0], axis=0)
+
+        for _ in range(self.max_depth):
+            if self.is_leaf[nodes].all():
+                break
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        leaves = self.apply(X)
+        return self.value[leaves].mean(axis=1)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+# Deployment-selectable inference engines, see settings.CHURN_MODEL['INFERENCE_ENGINE']
+INFERENCE_ENGINES = ('sklearn', 'flat')
+
+
+def build_inference_model(model, engine):
+    """Return the object used for predict_proba under the given engine"""
+    if engine not in INFERENCE_ENGINES:
+        raise ValueError(f"Unknown inference engine: {engine!r}")
+
+    if engine == 'flat':
+        if not hasattr(model, 'estimators_') and not hasattr(model, 'tree_'):
+            print(f"Warning: {type(model).__name__} cannot be flattened, using sklearn for inference")
+            return model
+        return FlatForest.from_sklearn(model)
+    return model
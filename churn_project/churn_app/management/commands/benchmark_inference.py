@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+import numpy as np
+import joblib
+import time
+
+from churn_app.forest import FlatForest
+from churn_app.model_registry import registry
+
+
+class Command(BaseCommand):
+    help = "Benchmark sklearn predict_proba against the flattened forest evaluator on the latest model."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help="Rows in the batch benchmark")
+        parser.add_argument('--repeat', type=int, default=200, help="Single-row predictions to time")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def time_calls(self, fn, X, repeat):
+        fn(X)  # warm up
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(X)
+            timings.append(time.perf_counter() - start)
+        return np.array(timings) * 1000
+
+    def handle(self, *args, **options):
+        try:
+            components = registry.get()
+        except FileNotFoundError as e:
+            raise CommandError(str(e))
+
+        model = components['sklearn_model']
+        if model is None:
+            # Memory-mapped deployments never unpickle the sklearn forest
+            model = joblib.load(registry.models_dir / "latest_model.joblib")['model']
+        if not hasattr(model, 'estimators_'):
+            raise CommandError(f"{type(model).__name__} is not a forest, nothing to compare.")
+
+        start = time.perf_counter()
+        flat = FlatForest.from_sklearn(model)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        # Scaled features are roughly standard normal; categorical codes are small ints
+        rng = np.random.default_rng(options['seed'])
+        X = rng.standard_normal((options['rows'], model.n_features_in_))
+        X[:, -2:] = rng.integers(0, 2, (options['rows'], 2))
+
+        max_diff = float(np.abs(model.predict_proba(X) - flat.predict_proba(X)).max())
+
+        single = X[:1]
+        sk_single = self.time_calls(model.predict_proba, single, options['repeat'])
+        flat_single = self.time_calls(flat.predict_proba, single, options['repeat'])
+        sk_batch = self.time_calls(model.predict_proba, X, 5)
+        flat_batch = self.time_calls(flat.predict_proba, X, 5)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\nInference Benchmark (model {components['version']}):"
+            f"\n----------------"
+            f"\nTrees: {flat.n_trees}, Nodes: {flat.n_nodes}, Max Depth: {flat.max_depth}"
+            f"\nFlatten Time: {build_ms:.1f} ms"
+            f"\nMax Probability Difference: {max_diff:.2e}"
+            f"\n\nSingle Row (median / p99 ms):"
+            f"\nsklearn: {np.median(sk_single):.3f} / {np.percentile(sk_single, 99):.3f}"
+            f"\nflat:    {np.median(flat_single):.3f} / {np.percentile(flat_single, 99):.3f}"
+            f"\n\nBatch of {options['rows']} (median ms):"
+            f"\nsklearn: {np.median(sk_batch):.3f}"
+            f"\nflat:    {np.median(flat_batch):.3f}"
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.utils import timezone
+
+from churn_app.partitions import is_partitioned, create_partition, add_months, month_start, partition_name
+
+
+class Command(BaseCommand):
+    help = "Create the monthly ChurnRiskHistory partitions for the current month and the months ahead."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead', type=int,
+            default=settings.RISK_HISTORY.get('PARTITION_MONTHS_AHEAD', 3),
+            help="Months after the current one to create partitions for"
+        )
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            raise CommandError("churn_app_churnriskhistory is not a partitioned table (PostgreSQL with migration 0008 required)")
+
+        current = month_start(timezone.now())
+        created = 0
+        for offset in range(options['months_ahead'] + 1):
+            month = add_months(current, offset)
+            if create_partition(month):
+                created += 1
+                self.stdout.write(f"Created {partition_name(month)}")
+
+        self.stdout.write(self.style.SUCCESS(f"{created} partition(s) created"))
@@ -0,0 +1,50 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from churn_app.partitions import is_partitioned, list_partitions, drop_partition, month_bounds
+from churn_app.retention import compaction_cutoff, has_uncompacted_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Drop monthly ChurnRiskHistory partitions that lie entirely before the raw retention "
+        "window and have been compacted into daily rollups."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help="Only drop months before this one (YYYY-MM); defaults to the retention cutoff")
+        parser.add_argument('--force', action='store_true', help="Drop even if some rows have no daily rollup yet")
+        parser.add_argument('--dry-run', action='store_true', help="List the partitions that would be dropped")
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            raise CommandError("churn_app_churnriskhistory is not a partitioned table (PostgreSQL with migration 0008 required)")
+
+        cutoff = compaction_cutoff()
+        if options['before']:
+            try:
+                year, month = (int(part) for part in options['before'].split('-'))
+                before = month_bounds(date(year, month, 1))[0]
+            except ValueError:
+                raise CommandError("--before must be YYYY-MM")
+            if before > cutoff and not options['force']:
+                raise CommandError(f"--before is inside the raw retention window (cutoff {cutoff:%Y-%m-%d}); use --force")
+            cutoff = before
+
+        dropped = 0
+        for month, name in list_partitions().items():
+            start, end = month_bounds(month)
+            if end > cutoff:
+                continue
+            if not options['force'] and has_uncompacted_rows(start, end):
+                self.stdout.write(self.style.WARNING(f"Skipping {name}: not fully compacted yet"))
+                continue
+            if options['dry_run']:
+                self.stdout.write(f"Would drop {name}")
+                continue
+            drop_partition(month)
+            dropped += 1
+            self.stdout.write(f"Dropped {name}")
+
+        self.stdout.write(self.style.SUCCESS(f"{dropped} partition(s) dropped"))
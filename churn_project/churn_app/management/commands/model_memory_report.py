@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from pathlib import Path
+import multiprocessing
+import joblib
+
+
+def read_memory_status():
+    """Resident memory of the current process in MB, split into private and shared file pages"""
+    status = {}
+    with open('/proc/self/status', 'r') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'RssAnon', 'RssFile'):
+                status[key] = int(value.split()[0]) / 1024
+    return status
+
+
+def measure_worker(models_dir, mode, queue):
+    """Runs in a fresh process: load the model the way a worker would and score a few rows"""
+    import numpy as np
+    from churn_app.forest import FlatForest
+
+    models_dir = Path(models_dir)
+    before = read_memory_status()
+
+    if mode == 'joblib':
+        model = joblib.load(models_dir / "latest_model.joblib")['model']
+    else:
+        components = joblib.load(models_dir / "latest_components.joblib")
+        model = FlatForest.load(models_dir / components['flat_forest_dir'], mmap_mode='r')
+
+    # Touch every tree so the pages a real worker would use are resident
+    X = np.random.default_rng(0).standard_normal((256, 10))
+    model.predict_proba(X)
+
+    after = read_memory_status()
+    queue.put({key: after[key] - before.get(key, 0) for key in after})
+
+
+class Command(BaseCommand):
+    help = "Measure per-worker RSS of the unpickled sklearn model versus the memory-mapped flat forest."
+
+    def measure(self, models_dir, mode):
+        context = multiprocessing.get_context('spawn')
+        queue = context.Queue()
+        process = context.Process(target=measure_worker, args=(str(models_dir), mode, queue))
+        process.start()
+        result = queue.get(timeout=600)
+        process.join()
+        return result
+
+    def handle(self, *args, **options):
+        models_dir = Path(settings.BASE_DIR) / "models"
+        if not (models_dir / "latest_model.joblib").exists():
+            raise CommandError("No trained model found. Please train a model first.")
+        if not (models_dir / "latest_components.joblib").exists():
+            raise CommandError("No memory-mappable export found. Retrain the model to create one.")
+
+        joblib_rss = self.measure(models_dir, 'joblib')
+        mmap_rss = self.measure(models_dir, 'mmap')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\nModel Memory per Worker (MB added by loading + scoring):"
+            f"\n----------------"
+            f"\n{'':<22}{'RSS':>10}{'Private':>10}{'Shared':>10}"
+            f"\n{'joblib (sklearn)':<22}{joblib_rss['VmRSS']:>10.1f}{joblib_rss['RssAnon']:>10.1f}{joblib_rss['RssFile']:>10.1f}"
+            f"\n{'mmap (flat forest)':<22}{mmap_rss['VmRSS']:>10.1f}{mmap_rss['RssAnon']:>10.1f}{mmap_rss['RssFile']:>10.1f}"
+            f"\n\nPrivate pages are paid by every worker; shared file pages are paid once per host."
+        ))
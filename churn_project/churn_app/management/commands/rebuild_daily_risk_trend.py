@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from churn_app.trends import rebuild_daily_trend
+
+
+class Command(BaseCommand):
+    help = "Recompute the DailyRiskTrend rows of the last N days from risk history (backfill or repair)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help="Whole days before today to recompute")
+
+    def handle(self, *args, **options):
+        written = rebuild_daily_trend(days=options['days'])
+        self.stdout.write(self.style.SUCCESS(f"{written} day(s) of risk trend rebuilt"))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+import sys
+import time
+
+from churn_app.model_registry import registry
+from churn_app.streaming import guess_format, iter_scored_rows, iter_encoded_results, STREAM_FORMATS
+
+
+class Command(BaseCommand):
+    help = "Score a CSV or NDJSON file of customers in chunks, streaming results to a file or stdout."
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="Input file (Churn_Modelling.csv layout, or NDJSON), '-' for stdin")
+        parser.add_argument('--output', '-o', default='-', help="Output file, '-' for stdout")
+        parser.add_argument('--format', choices=STREAM_FORMATS, help="Input format (guessed from the file name)")
+        parser.add_argument('--output-format', choices=STREAM_FORMATS, default='csv')
+        parser.add_argument('--chunk-size', type=int, default=10000, help="Rows scored per vectorized call")
+
+    def handle(self, *args, **options):
+        try:
+            components = registry.get()
+        except FileNotFoundError as e:
+            raise CommandError(str(e))
+
+        input_format = options['format'] or guess_format(options['input'])
+        start_time = time.time()
+
+        source = sys.stdin.buffer if options['input'] == '-' else open(options['input'], 'rb')
+        target = sys.stdout if options['output'] == '-' else open(options['output'], 'w', newline='', encoding='utf-8')
+
+        scored = 0
+        errors = 0
+
+        def counted(results):
+            nonlocal scored, errors
+            for result in results:
+                scored += 1
+                if 'error' in result:
+                    errors += 1
+                yield result
+
+        try:
+            results = iter_scored_rows(components, source, fmt=input_format, chunk_size=options['chunk_size'])
+            for piece in iter_encoded_results(counted(results), options['output_format']):
+                target.write(piece)
+        finally:
+            if source is not sys.stdin.buffer:
+                source.close()
+            if target is not sys.stdout:
+                target.close()
+
+        # Keep the summary off stdout when results are written there
+        summary = self.stderr if target is sys.stdout else self.stdout
+        summary.write(self.style.SUCCESS(
+            f"Scored {scored} rows ({errors} errors) with model {components['version']} "
+            f"in {time.time() - start_time:.2f} seconds"
+        ))
@@ -2,7 +2,6 @@ from django.core.management.base import BaseCommand
 from django.conf import settings
 import pandas as pd
 import numpy as np
-import psycopg2
 from sklearn.model_selection import train_test_split, GridSearchCV, cross_val_score
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.ensemble import RandomForestClassifier
@@ -15,11 +14,53 @@ import seaborn as sns
 import time
 import json
 import os
+import shutil
+import uuid
 from pathlib import Path
+from churn_app.forest import FlatForest
+from churn_app.models import CustomerChurn
+from churn_app.data import load_feature_arrays
+from churn_app.scoring import numerical_features as model_numerical_features
+
+def atomic_joblib_dump(obj, path):
+    """
+    Write a joblib artifact next to its destination and rename it into place,
+    so processes watching the file never read a partially written model.
+    """
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        joblib.dump(obj, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def export_flat_forest(models_dir, model_artifact, keep=2):
+    """
+    Save the forest as memory-mappable .npy arrays in models/forest-<version>/
+    and point latest_components.joblib (everything but the sklearn model) at
+    it. Older exports are pruned; workers still mapping them keep their pages
+    until they reload.
+    """
+    forest_dir_name = f"forest-{model_artifact['version']}"
+    FlatForest.from_sklearn(model_artifact['model']).save(models_dir / forest_dir_name)
+
+    components = {key: value for key, value in model_artifact.items() if key != 'model'}
+    components['flat_forest_dir'] = forest_dir_name
+    atomic_joblib_dump(components, models_dir / "latest_components.joblib")
+
+    exports = sorted(models_dir.glob("forest-*"), key=lambda path: path.stat().st_mtime, reverse=True)
+    for old_export in exports[keep:]:
+        shutil.rmtree(old_export, ignore_errors=True)
+
 
 class Command(BaseCommand):
     help = "Train churn model from Postgres data with advanced preprocessing and RandomForest."
 
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000, help="Rows fetched per server-side cursor round trip")
+
     def handle(self, *args, **options):
         start_time = time.time()
         
@@ -37,17 +78,17 @@ class Command(BaseCommand):
                 best_metrics = json.load(f)
                 best_test_accuracy = best_metrics.get('test_accuracy', 0)
 
-        # 1. Connect to DB and load data into DataFrame
-        conn = psycopg2.connect(
-            host=settings.DATABASES['default']['HOST'],
-            database=settings.DATABASES['default']['NAME'],
-            user=settings.DATABASES['default']['USER'],
-            password=settings.DATABASES['default']['PASSWORD'],
-            port=settings.DATABASES['default']['PORT']
+        # 1. Stream the feature columns into preallocated arrays and build the DataFrame
+        arrays = load_feature_arrays(
+            CustomerChurn.objects.order_by(),
+            chunk_size=options['chunk_size'],
+            extra_columns=['exited']
         )
-        query = "SELECT * FROM customer_churn;"
-        df = pd.read_sql(query, conn)
-        conn.close()
+        df = pd.DataFrame(arrays.numeric, columns=model_numerical_features)
+        df["geography"] = arrays.geography
+        df["gender"] = arrays.gender
+        df["exited"] = arrays.extra['exited']
+        del arrays
 
         # Store total samples
         total_samples = len(df)
@@ -192,7 +233,7 @@ class Command(BaseCommand):
             best_metrics_path = models_dir / "best_metrics.json"
             
             # Save latest model and metrics
-            joblib.dump({
+            model_artifact = {
                 'model': best_rf,
                 'scaler': scaler,
                 'label_encoder_geo': le_geo,
@@ -200,23 +241,23 @@ class Command(BaseCommand):
                 'features': list(X.columns),
                 'numerical_features': numerical_features,
                 'categorical_features': categorical_features,
-            }, latest_model_path)
-            
+                'version': uuid.uuid4().hex[:12],
+            }
+            metrics_data['model_version'] = model_artifact['version']
+
+            # Metrics first, so a worker picking up the new model also sees its metrics
             with open(latest_metrics_path, 'w', encoding='utf-8') as f:
                 json.dump(metrics_data, f)
 
+            # Flat-array copy of the forest that workers can memory-map (CHURN_MODEL['MMAP'])
+            export_flat_forest(models_dir, model_artifact)
+
+            atomic_joblib_dump(model_artifact, latest_model_path)
+
             # Update best model if current model is better
             if test_accuracy > best_test_accuracy:
                 # Save best model with all components
-                joblib.dump({
-                    'model': best_rf,
-                    'scaler': scaler,
-                    'label_encoder_geo': le_geo,
-                    'label_encoder_gender': le_gender,
-                    'features': list(X.columns),
-                    'numerical_features': numerical_features,
-                    'categorical_features': categorical_features,
-                }, best_model_path)
+                atomic_joblib_dump(model_artifact, best_model_path)
                 
                 # Save best metrics
                 with open(best_metrics_path, 'w', encoding='utf-8') as f:
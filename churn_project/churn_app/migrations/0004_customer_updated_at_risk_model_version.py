@@ -0,0 +1,27 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('churn_app', '0003_alertconfiguration_alerthistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customerchurn',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='churnriskhistory',
+            name='model_version',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='churnriskhistory',
+            index=models.Index(fields=['customer', '-timestamp'], name='churn_risk_customer_ts_idx'),
+        ),
+    ]
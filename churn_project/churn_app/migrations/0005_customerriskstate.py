@@ -0,0 +1,54 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_risk_state(apps, schema_editor):
+    """Seed the state table from the latest history row of every customer"""
+    ChurnRiskHistory = apps.get_model('churn_app', 'ChurnRiskHistory')
+    CustomerRiskState = apps.get_model('churn_app', 'CustomerRiskState')
+
+    latest_ids = ChurnRiskHistory.objects.filter(
+        customer=OuterRef('customer')
+    ).order_by('-timestamp', '-id').values('id')[:1]
+    latest = ChurnRiskHistory.objects.filter(id=Subquery(latest_ids)).order_by()
+
+    batch = []
+    for record in latest.iterator(chunk_size=2000):
+        batch.append(CustomerRiskState(
+            customer_id=record.customer_id,
+            churn_probability=record.churn_probability,
+            previous_probability=record.previous_probability,
+            risk_change=record.risk_change,
+            is_high_risk=record.is_high_risk,
+            model_version=record.model_version,
+            scored_at=record.timestamp,
+        ))
+        if len(batch) >= 2000:
+            CustomerRiskState.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        CustomerRiskState.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('churn_app', '0004_customer_updated_at_risk_model_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerRiskState',
+            fields=[
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='risk_state', serialize=False, to='churn_app.customerchurn')),
+                ('churn_probability', models.FloatField()),
+                ('previous_probability', models.FloatField(null=True)),
+                ('risk_change', models.FloatField(null=True)),
+                ('is_high_risk', models.BooleanField(db_index=True, default=False)),
+                ('model_version', models.CharField(blank=True, max_length=32, null=True)),
+                ('scored_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_risk_state, migrations.RunPython.noop),
+    ]
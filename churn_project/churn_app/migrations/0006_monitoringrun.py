@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('churn_app', '0005_customerriskstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonitoringRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('mode', models.CharField(max_length=20)),
+                ('status', models.CharField(choices=[('RUNNING', 'Running'), ('SUCCESS', 'Success'), ('FAILED', 'Failed')], default='RUNNING', max_length=10)),
+                ('model_version', models.CharField(blank=True, max_length=32, null=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('shard_count', models.IntegerField(default=1)),
+                ('customers_scored', models.IntegerField(default=0)),
+                ('high_risk_count', models.IntegerField(default=0)),
+                ('significant_increases', models.IntegerField(default=0)),
+                ('alerts_delivered', models.IntegerField(default=0)),
+                ('alerts_failed', models.IntegerField(default=0)),
+                ('error_count', models.IntegerField(default=0)),
+                ('fetch_seconds', models.FloatField(default=0)),
+                ('preprocess_seconds', models.FloatField(default=0)),
+                ('inference_seconds', models.FloatField(default=0)),
+                ('write_seconds', models.FloatField(default=0)),
+                ('alert_seconds', models.FloatField(default=0)),
+                ('error_message', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
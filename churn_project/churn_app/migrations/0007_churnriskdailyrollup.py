@@ -0,0 +1,40 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('churn_app', '0006_monitoringrun'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='churnriskhistory',
+            name='timestamp',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='ChurnRiskDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('sample_count', models.PositiveIntegerField(default=0)),
+                ('min_probability', models.FloatField()),
+                ('max_probability', models.FloatField()),
+                ('avg_probability', models.FloatField()),
+                ('last_probability', models.FloatField()),
+                ('last_risk_change', models.FloatField(null=True)),
+                ('last_is_high_risk', models.BooleanField(default=False)),
+                ('last_scored_at', models.DateTimeField()),
+                ('high_risk_count', models.PositiveIntegerField(default=0)),
+                ('model_version', models.CharField(blank=True, max_length=32, null=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_risk', to='churn_app.customerchurn')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date'], name='churn_risk_rollup_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('customer', 'date'), name='churn_risk_rollup_customer_date_uniq')],
+            },
+        ),
+    ]
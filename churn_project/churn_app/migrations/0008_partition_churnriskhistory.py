@@ -0,0 +1,144 @@
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import migrations
+
+# Frozen copies of the churn_app.partitions helpers, so later changes to that
+# module cannot change what this migration does
+HISTORY_TABLE = 'churn_app_churnriskhistory'
+DEFAULT_PARTITION = f'{HISTORY_TABLE}_default'
+
+# Months of partitions created ahead of the current one
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, timestamp, churn_probability, previous_probability, risk_change, is_high_risk, model_version, customer_id"
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_bounds(month):
+    """FOR VALUES clause of a month's partition, bounded by UTC midnights"""
+    start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    end_month = add_months(month, 1)
+    end = datetime(end_month.year, end_month.month, 1, tzinfo=dt_timezone.utc)
+    return f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+
+
+def partition_name(month):
+    return f'{HISTORY_TABLE}_p{month.year:04d}_{month.month:02d}'
+
+
+def table_definitions(cursor, table):
+    """CREATE INDEX and foreign key definitions of a table, so they survive rebuilding it"""
+    cursor.execute(
+        "SELECT pg_get_indexdef(indexrelid) FROM pg_index WHERE indrelid = %s::regclass AND NOT indisprimary",
+        [table]
+    )
+    indexes = [row[0].replace(' ON ONLY ', ' ON ') for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table]
+    )
+    return indexes, cursor.fetchall()
+
+
+def rebuild_history_table(schema_editor, create_sql, after_create=None):
+    """
+    Swap the history table for a new one built by create_sql: the old table
+    is renamed, its rows copied across, then it is dropped and the original
+    indexes and foreign keys are recreated under their original names.
+    """
+    connection = schema_editor.connection
+    qn = schema_editor.quote_name
+    old_table = f'{HISTORY_TABLE}_old'
+
+    with connection.cursor() as cursor:
+        indexes, foreign_keys = table_definitions(cursor, HISTORY_TABLE)
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'",
+            [HISTORY_TABLE]
+        )
+        primary_key = cursor.fetchone()[0]
+        cursor.execute(f"ALTER TABLE {qn(HISTORY_TABLE)} RENAME TO {qn(old_table)}")
+        # Free the primary key name for the new table
+        cursor.execute(f"ALTER TABLE {qn(old_table)} RENAME CONSTRAINT {qn(primary_key)} TO {qn(old_table + '_pkey')}")
+        cursor.execute(create_sql)
+        if after_create:
+            after_create(cursor, old_table)
+        cursor.execute(f"INSERT INTO {qn(HISTORY_TABLE)} ({COLUMNS}) SELECT {COLUMNS} FROM {qn(old_table)}")
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE((SELECT MAX(id) FROM {qn(HISTORY_TABLE)}), 0) + 1, false)",
+            [HISTORY_TABLE]
+        )
+        cursor.execute(f"DROP TABLE {qn(old_table)}")
+        for index_sql in indexes:
+            cursor.execute(index_sql)
+        for name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {qn(HISTORY_TABLE)} ADD CONSTRAINT {qn(name)} {definition}")
+
+
+def create_table_sql(qn, partitioned):
+    primary_key = "PRIMARY KEY (id, timestamp)" if partitioned else "PRIMARY KEY (id)"
+    return (
+        f"CREATE TABLE {qn(HISTORY_TABLE)} ("
+        "id bigint GENERATED BY DEFAULT AS IDENTITY, "
+        "timestamp timestamp with time zone NOT NULL, "
+        "churn_probability double precision NOT NULL, "
+        "previous_probability double precision NULL, "
+        "risk_change double precision NULL, "
+        "is_high_risk boolean NOT NULL, "
+        "model_version varchar(32) NULL, "
+        "customer_id integer NOT NULL, "
+        f"{primary_key})"
+        + (" PARTITION BY RANGE (timestamp)" if partitioned else "")
+    )
+
+
+def partition_history(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    qn = schema_editor.quote_name
+
+    def create_partitions(cursor, old_table):
+        cursor.execute(f"SELECT MIN(timestamp) FROM {qn(old_table)}")
+        oldest = cursor.fetchone()[0]
+        current = month_start(date.today())
+        month = month_start(oldest) if oldest else current
+        while month <= add_months(current, MONTHS_AHEAD):
+            cursor.execute(f"CREATE TABLE {qn(partition_name(month))} PARTITION OF {qn(HISTORY_TABLE)} {partition_bounds(month)}")
+            month = add_months(month, 1)
+        cursor.execute(f"CREATE TABLE {qn(DEFAULT_PARTITION)} PARTITION OF {qn(HISTORY_TABLE)} DEFAULT")
+
+    rebuild_history_table(schema_editor, create_table_sql(qn, partitioned=True), after_create=create_partitions)
+
+
+def unpartition_history(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    rebuild_history_table(schema_editor, create_table_sql(schema_editor.quote_name, partitioned=False))
+
+
+class Migration(migrations.Migration):
+    """
+    Rebuild churn_app_churnriskhistory as a table range-partitioned by month
+    on timestamp (PostgreSQL only). The primary key becomes (id, timestamp),
+    as PostgreSQL requires the partition key in every unique constraint; ids
+    still come from one identity sequence. Existing rows are copied in one
+    transaction, so run this in a maintenance window on large tables.
+    """
+
+    atomic = True
+
+    dependencies = [
+        ('churn_app', '0007_churnriskdailyrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_history, unpartition_history),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('churn_app', '0008_partition_churnriskhistory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRiskTrend',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('sample_count', models.PositiveIntegerField(default=0)),
+                ('probability_sum', models.FloatField(default=0)),
+                ('high_risk_count', models.PositiveIntegerField(default=0)),
+                ('very_high_count', models.PositiveIntegerField(default=0)),
+                ('high_count', models.PositiveIntegerField(default=0)),
+                ('medium_count', models.PositiveIntegerField(default=0)),
+                ('low_count', models.PositiveIntegerField(default=0)),
+                ('very_low_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+    ]
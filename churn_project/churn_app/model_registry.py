@@ -0,0 +1,187 @@
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+
+import joblib
+from django.conf import settings
+
+from .forest import FlatForest, build_inference_model
+from .preprocessing import CompiledPreprocessor
+
+
+def get_models_dir():
+    """Directory where train_churn writes its artifacts"""
+    return Path(settings.BASE_DIR) / "models"
+
+
+def compute_file_version(path, chunk_size=1024 * 1024):
+    """Short content hash of a model artifact, used as its version"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+class ModelRegistry:
+    """
+    Keeps the latest trained model components in memory for the lifetime of
+    the process.
+
+    Every call to get() checks the artifact with a cheap stat() (at most once
+    per check interval) and reloads it only when train_churn has written a new
+    file. The loaded components are swapped in as a single dict, so callers
+    never observe a half-loaded model.
+
+    With CHURN_MODEL['MMAP'] enabled the registry watches the lightweight
+    latest_components.joblib instead and memory-maps the flat forest arrays
+    train_churn exported next to it, so the sklearn forest is never unpickled
+    and all workers on a host share the model pages.
+    """
+
+    artifact_name = "latest_model.joblib"
+    mmap_artifact_name = "latest_components.joblib"
+    metrics_name = "latest_metrics.json"
+
+    def __init__(self, models_dir=None, check_interval=None, engine=None, mmap=None):
+        self._models_dir = models_dir
+        self._check_interval = check_interval
+        self._engine = engine
+        self._mmap = mmap
+        self._lock = threading.Lock()
+        self._components = None
+        self._signature = None
+        self._last_check = 0.0
+
+    @property
+    def models_dir(self):
+        return Path(self._models_dir) if self._models_dir else get_models_dir()
+
+    @property
+    def use_mmap(self):
+        if self._mmap is not None:
+            return self._mmap
+        return settings.CHURN_MODEL.get('MMAP', False)
+
+    @property
+    def artifact_path(self):
+        name = self.mmap_artifact_name if self.use_mmap else self.artifact_name
+        return self.models_dir / name
+
+    @property
+    def check_interval(self):
+        if self._check_interval is not None:
+            return self._check_interval
+        return settings.CHURN_MODEL.get('RELOAD_CHECK_INTERVAL', 5)
+
+    @property
+    def engine(self):
+        if self._engine is not None:
+            return self._engine
+        return settings.CHURN_MODEL.get('INFERENCE_ENGINE', 'sklearn')
+
+    @property
+    def version(self):
+        """Version of the currently loaded model, or None if nothing is loaded"""
+        components = self._components
+        return components['version'] if components else None
+
+    @property
+    def loaded_engine(self):
+        """Inference engine of the currently loaded model ('flat' whenever it is memory-mapped)"""
+        components = self._components
+        return components['inference_engine'] if components else None
+
+    @property
+    def is_loaded(self):
+        return self._components is not None
+
+    def _stat_signature(self):
+        try:
+            stat = self.artifact_path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError("No trained model found. Please train a model first.")
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def get(self):
+        """Return the current model components, reloading them if the artifact changed"""
+        components = self._components
+        now = time.monotonic()
+        if components is not None and now - self._last_check < self.check_interval:
+            return components
+
+        signature = self._stat_signature()
+        if components is not None and signature == self._signature:
+            self._last_check = now
+            return components
+
+        with self._lock:
+            # Another thread may have finished the reload while we waited
+            if self._components is not None and self._signature == signature:
+                return self._components
+
+            components = self._load()
+            self._components = components
+            self._signature = signature
+            self._last_check = time.monotonic()
+            print(
+                f"Loaded churn model version {components['version']} "
+                f"({components['inference_engine']} engine{', mmap' if self.use_mmap else ''})"
+            )
+            return components
+
+    def reload(self):
+        """Force the next get() to re-check the artifact on disk"""
+        with self._lock:
+            self._signature = None
+            self._last_check = 0.0
+        return self.get()
+
+    def clear(self):
+        """Drop the loaded components (mostly useful in tests)"""
+        with self._lock:
+            self._components = None
+            self._signature = None
+            self._last_check = 0.0
+
+    def _load(self):
+        artifact_path = self.artifact_path
+        model_data = joblib.load(artifact_path)
+
+        if self.use_mmap:
+            model = FlatForest.load(self.models_dir / model_data['flat_forest_dir'], mmap_mode='r')
+            sklearn_model = None
+            engine = 'flat'
+        else:
+            sklearn_model = model_data['model']
+            engine = self.engine
+            model = build_inference_model(sklearn_model, engine)
+
+        components = {
+            'model': model,
+            'sklearn_model': sklearn_model,
+            'inference_engine': engine,
+            'scaler': model_data['scaler'],
+            'label_encoder_geo': model_data['label_encoder_geo'],
+            'label_encoder_gender': model_data['label_encoder_gender'],
+            'feature_importance': {},
+            'version': model_data.get('version') or compute_file_version(artifact_path),
+        }
+        components['preprocessor'] = CompiledPreprocessor.from_components(components)
+
+        # Metrics are optional, the model is usable without them
+        try:
+            metrics_path = self.models_dir / self.metrics_name
+            if metrics_path.exists():
+                with open(metrics_path, 'r', encoding='utf-8-sig') as f:
+                    metrics_data = json.load(f)
+                components['feature_importance'] = metrics_data.get('feature_importance', {})
+        except Exception as metrics_error:
+            print(f"Warning: Could not load metrics file: {str(metrics_error)}")
+
+        return components
+
+
+registry = ModelRegistry()
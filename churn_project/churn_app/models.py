@@ -15,24 +15,100 @@ class CustomerChurn(models.Model):
     is_active_member = models.BooleanField(default=False)
     estimated_salary = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     exited = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         db_table = 'customer_churn'
 
 class ChurnRiskHistory(models.Model):
     customer = models.ForeignKey(CustomerChurn, on_delete=models.CASCADE, related_name='risk_history')
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
     churn_probability = models.FloatField()
     previous_probability = models.FloatField(null=True)
     risk_change = models.FloatField(null=True)  # Percentage change
     is_high_risk = models.BooleanField(default=False)
+    model_version = models.CharField(max_length=32, null=True, blank=True)  # Model that produced the score
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['customer', '-timestamp'], name='churn_risk_customer_ts_idx'),
+        ]
         
     def __str__(self):
         return f"{self.customer} - {self.timestamp.strftime('%Y-%m-%d %H:%M')} - {self.churn_probability:.2f}"
 
+class ChurnRiskDailyRollup(models.Model):
+    """
+    One customer's scores for one day, compacted from ChurnRiskHistory rows
+    older than RISK_HISTORY['RAW_RETENTION_DAYS'] (see churn_app.retention)
+    """
+    customer = models.ForeignKey(CustomerChurn, on_delete=models.CASCADE, related_name='daily_risk')
+    date = models.DateField()
+    sample_count = models.PositiveIntegerField(default=0)
+    min_probability = models.FloatField()
+    max_probability = models.FloatField()
+    avg_probability = models.FloatField()
+    last_probability = models.FloatField()
+    last_risk_change = models.FloatField(null=True)
+    last_is_high_risk = models.BooleanField(default=False)
+    last_scored_at = models.DateTimeField()
+    high_risk_count = models.PositiveIntegerField(default=0)  # Scores above the threshold that day
+    model_version = models.CharField(max_length=32, null=True, blank=True)  # Model behind the last score
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['customer', 'date'], name='churn_risk_rollup_customer_date_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='churn_risk_rollup_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.customer_id} - {self.date} - {self.last_probability:.2f}"
+
+class DailyRiskTrend(models.Model):
+    """
+    Risk scores recorded on one day, across all customers. Monitoring runs
+    add to it as they write history (see churn_app.trends) so the dashboard
+    trend reads one row per day instead of aggregating raw history.
+    """
+    date = models.DateField(unique=True)
+    sample_count = models.PositiveIntegerField(default=0)
+    probability_sum = models.FloatField(default=0)
+    high_risk_count = models.PositiveIntegerField(default=0)
+    # Distribution of the day's scores
+    very_high_count = models.PositiveIntegerField(default=0)  # >= 0.8
+    high_count = models.PositiveIntegerField(default=0)  # 0.6 - 0.8
+    medium_count = models.PositiveIntegerField(default=0)  # 0.4 - 0.6
+    low_count = models.PositiveIntegerField(default=0)  # 0.2 - 0.4
+    very_low_count = models.PositiveIntegerField(default=0)  # < 0.2
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['date']
+
+    @property
+    def avg_risk(self):
+        return self.probability_sum / self.sample_count if self.sample_count else None
+
+    def __str__(self):
+        return f"{self.date} - {self.sample_count} scores"
+
+class CustomerRiskState(models.Model):
+    """Latest score per customer, upserted by every monitoring run"""
+    customer = models.OneToOneField(CustomerChurn, on_delete=models.CASCADE, primary_key=True, related_name='risk_state')
+    churn_probability = models.FloatField()
+    previous_probability = models.FloatField(null=True)
+    risk_change = models.FloatField(null=True)  # Percentage change
+    is_high_risk = models.BooleanField(default=False, db_index=True)
+    model_version = models.CharField(max_length=32, null=True, blank=True)
+    scored_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.customer_id} - {self.churn_probability:.2f} ({self.model_version})"
+
 class AlertConfiguration(models.Model):
     webhook_url = models.URLField(max_length=500)
     is_enabled = models.BooleanField(default=True)
@@ -68,3 +144,47 @@ class AlertHistory(models.Model):
         if self.customer:
             return f"{self.alert_type} - {self.customer} - {self.sent_at.strftime('%Y-%m-%d %H:%M')}"
         return f"{self.alert_type} - {self.sent_at.strftime('%Y-%m-%d %H:%M')}"
+
+class MonitoringRun(models.Model):
+    """One monitor_customer_churn run: outcome, counters and time spent per stage"""
+    STATUSES = [
+        ('RUNNING', 'Running'),
+        ('SUCCESS', 'Success'),
+        ('FAILED', 'Failed')
+    ]
+    
+    task_id = models.CharField(max_length=255, null=True, blank=True)  # Celery task id
+    mode = models.CharField(max_length=20)  # 'incremental' or 'full sweep'
+    status = models.CharField(max_length=10, choices=STATUSES, default='RUNNING')
+    model_version = models.CharField(max_length=32, null=True, blank=True)
+    started_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    shard_count = models.IntegerField(default=1)
+    
+    customers_scored = models.IntegerField(default=0)
+    high_risk_count = models.IntegerField(default=0)
+    significant_increases = models.IntegerField(default=0)
+    alerts_delivered = models.IntegerField(default=0)
+    alerts_failed = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)  # Customers that could not be scored or recorded
+    
+    # Seconds spent per stage, summed over chunks (and shards)
+    fetch_seconds = models.FloatField(default=0)
+    preprocess_seconds = models.FloatField(default=0)
+    inference_seconds = models.FloatField(default=0)
+    write_seconds = models.FloatField(default=0)
+    alert_seconds = models.FloatField(default=0)
+    
+    error_message = models.TextField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-started_at']
+    
+    @property
+    def duration_seconds(self):
+        if self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at).total_seconds()
+    
+    def __str__(self):
+        return f"Monitoring run {self.pk} ({self.mode}, {self.status}) - {self.started_at.strftime('%Y-%m-%d %H:%M')}"
@@ -0,0 +1,115 @@
+"""
+Monthly range partitions for ChurnRiskHistory on PostgreSQL.
+
+Migration 0008 turns the history table into a table partitioned by month
+on timestamp, plus a DEFAULT partition that catches rows no monthly
+partition covers. Partitions are named <table>_pYYYY_MM and are created
+ahead of time and dropped once compacted by the create/drop management
+commands. On other databases the table stays a plain table and these
+helpers report that partitioning is unavailable.
+"""
+from datetime import date, datetime, timezone as dt_timezone
+import re
+
+from django.db import connection, transaction
+
+HISTORY_TABLE = 'churn_app_churnriskhistory'
+DEFAULT_PARTITION = f'{HISTORY_TABLE}_default'
+PARTITION_NAME = re.compile(rf'^{HISTORY_TABLE}_p(\d{{4}})_(\d{{2}})$')
+
+
+def month_start(value):
+    """First day of the month containing a date or datetime"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month):
+    """[start, end) of a month as UTC datetimes, the partition bounds"""
+    start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    end_month = add_months(month, 1)
+    return start, datetime(end_month.year, end_month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_bounds(month):
+    """FOR VALUES clause of a month's partition (DDL takes no query parameters)"""
+    start, end = month_bounds(month)
+    return f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+
+
+def partition_name(month):
+    return f'{HISTORY_TABLE}_p{month.year:04d}_{month.month:02d}'
+
+
+def is_partitioned(using=connection):
+    """True if the history table is a partitioned table on this database"""
+    if using.vendor != 'postgresql':
+        return False
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [HISTORY_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(using=connection):
+    """{month: partition table name} for the monthly partitions (the default one excluded)"""
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [HISTORY_TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return dict(sorted(partitions.items()))
+
+
+def create_partition(month, using=connection):
+    """
+    Create the partition for a month if it does not exist. Rows for that
+    month that already landed in the DEFAULT partition are moved into it.
+    Returns True if a partition was created.
+    """
+    if month in list_partitions(using):
+        return False
+
+    name = partition_name(month)
+    start, end = month_bounds(month)
+    qn = using.ops.quote_name
+    with transaction.atomic(using=using.alias), using.cursor() as cursor:
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {qn(DEFAULT_PARTITION)} WHERE timestamp >= %s AND timestamp < %s)",
+            [start, end]
+        )
+        if cursor.fetchone()[0]:
+            # PostgreSQL refuses a new partition whose rows sit in DEFAULT: move them first
+            cursor.execute(f"CREATE TABLE {qn(name)} (LIKE {qn(HISTORY_TABLE)} INCLUDING DEFAULTS)")
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)} WHERE timestamp >= %s AND timestamp < %s RETURNING *) "
+                f"INSERT INTO {qn(name)} SELECT * FROM moved",
+                [start, end]
+            )
+            cursor.execute(f"ALTER TABLE {qn(HISTORY_TABLE)} ATTACH PARTITION {qn(name)} {partition_bounds(month)}")
+        else:
+            cursor.execute(f"CREATE TABLE {qn(name)} PARTITION OF {qn(HISTORY_TABLE)} {partition_bounds(month)}")
+    return True
+
+
+def drop_partition(month, using=connection):
+    """Detach and drop a month's partition: expiring its rows is a metadata change, not a DELETE"""
+    qn = using.ops.quote_name
+    name = partition_name(month)
+    with transaction.atomic(using=using.alias), using.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {qn(HISTORY_TABLE)} DETACH PARTITION {qn(name)}")
+        cursor.execute(f"DROP TABLE {qn(name)}")
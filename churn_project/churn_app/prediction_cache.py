@@ -0,0 +1,132 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .scoring import feature_cols, normalize_features
+
+
+def generate_cache_key(features, model_version):
+    """
+    Cache key for a prediction, built from the normalized, defaulted feature
+    vector and the model version. Equivalent requests ("age": 40 vs 40.0,
+    extra keys, omitted defaults) share a key, and retraining changes it.
+    """
+    normalized = normalize_features(features)
+    canonical = json.dumps([normalized[name] for name in feature_cols])
+    digest = hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+    return f"churn_pred:{model_version}:{digest}"
+
+
+class LocalLRUCache:
+    """Small thread-safe in-process LRU"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return None
+            return self._data[key]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class PredictionCache:
+    """
+    Two-tier prediction cache: a per-process LRU in front of the shared
+    Django (Redis) cache. Redis errors are counted and treated as misses so
+    an unavailable cache never fails a prediction.
+    """
+
+    def __init__(self, local_maxsize=None, ttl=None):
+        config = getattr(settings, 'PREDICTION_CACHE', {})
+        self.ttl = ttl if ttl is not None else config.get('TTL', 60 * 60)
+        self.local = LocalLRUCache(
+            local_maxsize if local_maxsize is not None else config.get('LOCAL_MAXSIZE', 10000)
+        )
+        self._stats_lock = threading.Lock()
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.local_hits = 0
+        self.remote_hits = 0
+        self.misses = 0
+        self.remote_errors = 0
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is not None:
+            self._count('local_hits')
+            return value
+
+        try:
+            value = cache.get(key)
+        except Exception as e:
+            print(f"Warning: prediction cache lookup failed: {str(e)}")
+            self._count('remote_errors')
+            value = None
+
+        if value is not None:
+            self._count('remote_hits')
+            self.local.set(key, value)
+            return value
+
+        self._count('misses')
+        return None
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        try:
+            cache.set(key, value, self.ttl)
+        except Exception as e:
+            print(f"Warning: prediction cache write failed: {str(e)}")
+            self._count('remote_errors')
+
+    def stats(self):
+        with self._stats_lock:
+            lookups = self.local_hits + self.remote_hits + self.misses
+            hits = self.local_hits + self.remote_hits
+            return {
+                'local_hits': self.local_hits,
+                'remote_hits': self.remote_hits,
+                'misses': self.misses,
+                'remote_errors': self.remote_errors,
+                'hit_rate': (hits / lookups * 100) if lookups > 0 else 0,
+                'local_hit_rate': (self.local_hits / lookups * 100) if lookups > 0 else 0,
+                'local_size': len(self.local),
+                'local_maxsize': self.local.maxsize,
+            }
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._reset_counters()
+
+
+prediction_cache = PredictionCache()
@@ -0,0 +1,87 @@
+import numpy as np
+
+from .scoring import numerical_features, feature_cols, normalize_features
+
+
+class CompiledPreprocessor:
+    """
+    Pandas-free replacement for the LabelEncoder + StandardScaler steps.
+
+    Built once per loaded model: categories become dict lookups and the scaler
+    mean/scale are laid out over the full feature vector (0 and 1 for the
+    categorical columns), so a row is scaled with a single subtract/divide.
+    The arithmetic is the same as StandardScaler.transform, so the features
+    are bit-identical to the pandas path.
+    """
+
+    def __init__(self, scaler, label_encoder_geo, label_encoder_gender):
+        self.n_numerical = len(numerical_features)
+        self.n_features = len(feature_cols)
+        self.geography_index = feature_cols.index("geography")
+        self.gender_index = feature_cols.index("gender")
+
+        self.geography_codes = {
+            str(label): float(code) for code, label in enumerate(label_encoder_geo.classes_)
+        }
+        self.gender_codes = {
+            str(label): float(code) for code, label in enumerate(label_encoder_gender.classes_)
+        }
+
+        self.mean = np.zeros(self.n_features, dtype=np.float64)
+        self.scale = np.ones(self.n_features, dtype=np.float64)
+        if scaler.with_mean:
+            self.mean[:self.n_numerical] = scaler.mean_
+        if scaler.with_std:
+            self.scale[:self.n_numerical] = scaler.scale_
+
+    @classmethod
+    def from_components(cls, components):
+        return cls(
+            components['scaler'],
+            components['label_encoder_geo'],
+            components['label_encoder_gender'],
+        )
+
+    def encode(self, name, value):
+        codes = self.geography_codes if name == "geography" else self.gender_codes
+        try:
+            return codes[value]
+        except (KeyError, TypeError):
+            raise ValueError(f"Unknown {name}: {value!r}")
+
+    def fill_row(self, numeric, geography, gender, row):
+        """Write unscaled, encoded features into a preallocated row"""
+        row[:self.n_numerical] = numeric
+        row[self.geography_index] = self.encode("geography", geography)
+        row[self.gender_index] = self.encode("gender", gender)
+        return row
+
+    def fill_from_data(self, data, row):
+        """Normalize a raw feature dict (request body) into a preallocated row"""
+        features = normalize_features(data)
+        return self.fill_row(
+            [features[name] for name in numerical_features],
+            features["geography"],
+            features["gender"],
+            row,
+        )
+
+    def scale_inplace(self, X):
+        """Apply the scaler to a (n, n_features) float64 matrix in place"""
+        np.subtract(X, self.mean, out=X)
+        np.divide(X, self.scale, out=X)
+        return X
+
+    def transform(self, data, out=None):
+        """Raw feature dict -> (1, n_features) model input"""
+        if out is None:
+            out = np.empty((1, self.n_features), dtype=np.float64)
+        self.fill_from_data(data, out[0])
+        return self.scale_inplace(out)
+
+    def transform_values(self, numeric, geography, gender, out=None):
+        """Already-typed numeric values and raw categories -> (1, n_features) model input"""
+        if out is None:
+            out = np.empty((1, self.n_features), dtype=np.float64)
+        self.fill_row(numeric, geography, gender, out[0])
+        return self.scale_inplace(out)
@@ -0,0 +1,150 @@
+import threading
+import time
+
+from django.conf import settings
+
+# Atomic refill-and-take on a hash {tokens, ts}. The clock is Redis TIME, so
+# every worker and host sees the same bucket regardless of local clock skew.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local last = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - last) * rate)
+
+local allowed = 0
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+    allowed = 1
+else
+    wait = (requested - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at rate tokens per second up to capacity.
+    Subclasses implement try_acquire(); acquire() adds blocking waits.
+    """
+
+    def __init__(self, rate, capacity, sleep=time.sleep, clock=time.monotonic):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.sleep = sleep
+        self.clock = clock
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available; returns (acquired, seconds until they would be)"""
+        raise NotImplementedError
+
+    def acquire(self, tokens=1, blocking=False, timeout=None):
+        """
+        Take tokens, optionally waiting for them. Returns False if they are not
+        available now (blocking=False) or within timeout seconds.
+        """
+        deadline = None if timeout is None else self.clock() + timeout
+        while True:
+            acquired, wait = self.try_acquire(tokens)
+            if acquired:
+                return True
+            if not blocking:
+                return False
+            if deadline is not None:
+                remaining = deadline - self.clock()
+                if remaining < wait:
+                    return False
+            self.sleep(wait)
+
+
+class LocalTokenBucket(TokenBucket):
+    """In-process bucket: a stand-in for tests and for deployments without Redis"""
+
+    def __init__(self, rate, capacity, sleep=time.sleep, clock=time.monotonic):
+        super().__init__(rate, capacity, sleep=sleep, clock=clock)
+        self.tokens = self.capacity
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens=1):
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + max(0.0, now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True, 0.0
+            return False, (tokens - self.tokens) / self.rate
+
+
+class RedisTokenBucket(TokenBucket):
+    """
+    Bucket shared by every process through one Redis key; each acquire is a
+    single EVALSHA. If Redis is unreachable the limiter falls back to a local
+    bucket for this process rather than blocking alerts entirely.
+    """
+
+    def __init__(self, key, rate, capacity, connection=None, sleep=time.sleep, clock=time.monotonic):
+        super().__init__(rate, capacity, sleep=sleep, clock=clock)
+        self.key = key
+        self._connection = connection
+        self._script = None
+        self.fallback = LocalTokenBucket(rate, capacity, sleep=sleep, clock=clock)
+
+    @property
+    def script(self):
+        if self._script is None:
+            if self._connection is None:
+                from django_redis import get_redis_connection
+                self._connection = get_redis_connection("default")
+            self._script = self._connection.register_script(TOKEN_BUCKET_SCRIPT)
+        return self._script
+
+    def try_acquire(self, tokens=1):
+        try:
+            allowed, wait = self.script(keys=[self.key], args=[self.rate, self.capacity, tokens])
+        except Exception as e:
+            print(f"Warning: Redis rate limiter unavailable, using local limit: {str(e)}")
+            return self.fallback.try_acquire(tokens)
+        return bool(int(allowed)), float(wait)
+
+
+def build_rate_limiter():
+    """Discord webhook limiter configured by DISCORD_ALERTS['RATE_LIMIT']"""
+    config = settings.DISCORD_ALERTS.get('RATE_LIMIT', {})
+    rate = config.get('MESSAGES_PER_MINUTE', 30) / 60.0
+    capacity = config.get('BURST', 5)
+    backend = config.get('BACKEND', 'redis')
+
+    if backend == 'redis' and 'django_redis' in settings.CACHES['default']['BACKEND']:
+        return RedisTokenBucket(config.get('KEY', 'rate_limit:discord_webhook'), rate, capacity)
+    return LocalTokenBucket(rate, capacity)
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Process-wide Discord limiter, built on first use"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = build_rate_limiter()
+        return _rate_limiter
+
+
+def reset_rate_limiter():
+    global _rate_limiter
+    with _rate_limiter_lock:
+        _rate_limiter = None
@@ -0,0 +1,209 @@
+from datetime import datetime, time, timedelta
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Exists, OuterRef
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ChurnRiskHistory, ChurnRiskDailyRollup
+from .partitions import is_partitioned
+from .telemetry import log_event
+
+# get_risk_dashboard and get_risk_monitoring read the last 7 days of raw rows
+MIN_RAW_RETENTION_DAYS = 7
+
+ROLLUP_UPDATE_FIELDS = [
+    'sample_count', 'min_probability', 'max_probability', 'avg_probability',
+    'last_probability', 'last_risk_change', 'last_is_high_risk', 'last_scored_at',
+    'high_risk_count', 'model_version',
+]
+
+
+def raw_retention_days():
+    """Days of raw ChurnRiskHistory kept before compaction"""
+    days = settings.RISK_HISTORY.get('RAW_RETENTION_DAYS', 30)
+    return max(int(days), MIN_RAW_RETENTION_DAYS)
+
+
+def day_bounds(day):
+    """[start, end) of a local calendar day as aware datetimes"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def compaction_cutoff(now=None):
+    """Raw rows before this instant (a local midnight) are folded into rollups"""
+    today = timezone.localdate(now)
+    return day_bounds(today - timedelta(days=raw_retention_days()))[0]
+
+
+def add_score(rollup, timestamp, probability, risk_change, is_high_risk, model_version):
+    """Fold one raw score into a (possibly new) daily rollup"""
+    total = rollup.avg_probability * rollup.sample_count + probability
+    rollup.sample_count += 1
+    rollup.avg_probability = total / rollup.sample_count
+    rollup.min_probability = min(rollup.min_probability, probability)
+    rollup.max_probability = max(rollup.max_probability, probability)
+    if is_high_risk:
+        rollup.high_risk_count += 1
+    if rollup.last_scored_at is None or timestamp >= rollup.last_scored_at:
+        rollup.last_probability = probability
+        rollup.last_risk_change = risk_change
+        rollup.last_is_high_risk = is_high_risk
+        rollup.last_scored_at = timestamp
+        rollup.model_version = model_version
+
+
+def new_rollup(customer_id, day, probability):
+    return ChurnRiskDailyRollup(
+        customer_id=customer_id, date=day, sample_count=0, avg_probability=0.0,
+        min_probability=probability, max_probability=probability,
+        last_probability=probability, last_scored_at=None, high_risk_count=0
+    )
+
+
+def compact_batch(day, customer_ids, delete_raw=True):
+    """
+    Fold one day of raw rows for customer_ids into their rollups and (with
+    delete_raw) delete the raw rows, in one transaction. Existing rollups
+    (a day compacted in several runs) are merged, not overwritten.
+    Returns (rows, rollups).
+    """
+    start, end = day_bounds(day)
+    raw = ChurnRiskHistory.objects.filter(customer_id__in=customer_ids, timestamp__gte=start, timestamp__lt=end)
+
+    with transaction.atomic():
+        rollups = {
+            rollup.customer_id: rollup
+            for rollup in ChurnRiskDailyRollup.objects.select_for_update().filter(date=day, customer_id__in=customer_ids)
+        }
+        rows = raw.order_by('customer_id', 'timestamp', 'id').values_list(
+            'customer_id', 'timestamp', 'churn_probability', 'risk_change', 'is_high_risk', 'model_version'
+        )
+        row_count = 0
+        for customer_id, timestamp, probability, risk_change, is_high_risk, model_version in rows.iterator(chunk_size=2000):
+            rollup = rollups.get(customer_id)
+            if rollup is None:
+                rollup = rollups[customer_id] = new_rollup(customer_id, day, probability)
+            add_score(rollup, timestamp, probability, risk_change, is_high_risk, model_version)
+            row_count += 1
+
+        ChurnRiskDailyRollup.objects.bulk_create(
+            list(rollups.values()),
+            update_conflicts=True,
+            unique_fields=['customer', 'date'],
+            update_fields=ROLLUP_UPDATE_FIELDS
+        )
+        if delete_raw:
+            raw.delete()
+
+    return row_count, len(rollups)
+
+
+def next_raw_batch(cutoff, batch_size):
+    """(day, customer_ids) of the oldest raw rows before cutoff, or None when all are compacted"""
+    oldest = ChurnRiskHistory.objects.filter(timestamp__lt=cutoff).order_by('timestamp').values_list('timestamp', flat=True).first()
+    if oldest is None:
+        return None
+
+    day = timezone.localtime(oldest).date()
+    start, end = day_bounds(day)
+    customer_ids = list(
+        ChurnRiskHistory.objects.filter(timestamp__gte=start, timestamp__lt=end)
+        .order_by('customer_id').values_list('customer_id', flat=True).distinct()[:batch_size]
+    )
+    return day, customer_ids
+
+
+def next_uncompacted_batch(cutoff, batch_size, day=None):
+    """
+    Like next_raw_batch for a partitioned table, where compacted rows stay
+    until their partition is dropped: the next customers of the earliest
+    day before cutoff that have raw rows but no rollup yet. Starts from the
+    latest rolled-up day (or `day`) instead of rescanning retained rows.
+    """
+    if day is None:
+        oldest = ChurnRiskHistory.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+        if oldest is None:
+            return None
+        day = timezone.localtime(oldest).date()
+        latest_rollup = ChurnRiskDailyRollup.objects.aggregate(latest=Max('date'))['latest']
+        if latest_rollup is not None:
+            day = max(day, latest_rollup)
+
+    cutoff_day = timezone.localtime(cutoff).date()
+    while day < cutoff_day:
+        start, end = day_bounds(day)
+        customer_ids = list(
+            ChurnRiskHistory.objects.filter(timestamp__gte=start, timestamp__lt=end)
+            .exclude(Exists(ChurnRiskDailyRollup.objects.filter(customer_id=OuterRef('customer_id'), date=day)))
+            .order_by('customer_id').values_list('customer_id', flat=True).distinct()[:batch_size]
+        )
+        if customer_ids:
+            return day, customer_ids
+        day += timedelta(days=1)
+    return None
+
+
+def has_uncompacted_rows(start, end):
+    """True if any raw row in [start, end) has no daily rollup yet"""
+    rolled_up = ChurnRiskDailyRollup.objects.filter(customer_id=OuterRef('customer_id'), date=OuterRef('day'))
+    return ChurnRiskHistory.objects.filter(timestamp__gte=start, timestamp__lt=end).annotate(
+        day=TruncDate('timestamp')
+    ).exclude(Exists(rolled_up)).exists()
+
+
+def compact_history(batch_size=None, max_batches=None, now=None):
+    """
+    Compact raw history older than the retention window, oldest day first,
+    batch_size customers at a time. Stops after max_batches so a scheduled
+    run stays bounded; the next run resumes where this one left off.
+
+    On a plain table the compacted rows are deleted batch by batch. On a
+    partitioned table they are kept, and expire when drop_risk_history_partitions
+    drops their month.
+    """
+    batch_size = batch_size or settings.RISK_HISTORY.get('COMPACTION_BATCH_SIZE', 1000)
+    if max_batches is None:
+        max_batches = settings.RISK_HISTORY.get('MAX_BATCHES_PER_RUN')
+    cutoff = compaction_cutoff(now)
+    delete_raw = not is_partitioned()
+
+    stats = {'batches': 0, 'rows_compacted': 0, 'rollups_written': 0, 'complete': False}
+    day = None
+    while max_batches is None or stats['batches'] < max_batches:
+        if delete_raw:
+            batch = next_raw_batch(cutoff, batch_size)
+        else:
+            batch = next_uncompacted_batch(cutoff, batch_size, day)
+        if batch is None:
+            stats['complete'] = True
+            break
+
+        day, customer_ids = batch
+        rows, rollups = compact_batch(day, customer_ids, delete_raw=delete_raw)
+        stats['batches'] += 1
+        stats['rows_compacted'] += rows
+        stats['rollups_written'] += rollups
+        # Per batch at DEBUG; compact_risk_history logs the run's totals
+        log_event('risk_history_compacted', level=logging.DEBUG, day=day, rows=rows, rollups=rollups)
+
+    return stats
+
+
+def expire_rollups(now=None, batch_size=None):
+    """Delete rollups older than RISK_HISTORY['ROLLUP_RETENTION_DAYS'] (None keeps them forever)"""
+    days = settings.RISK_HISTORY.get('ROLLUP_RETENTION_DAYS')
+    if days is None:
+        return 0
+    batch_size = batch_size or settings.RISK_HISTORY.get('COMPACTION_BATCH_SIZE', 1000)
+    oldest_kept = timezone.localdate(now) - timedelta(days=days)
+
+    deleted = 0
+    while True:
+        ids = list(ChurnRiskDailyRollup.objects.filter(date__lt=oldest_kept).values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += ChurnRiskDailyRollup.objects.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,92 @@
+from django.db import connection
+from django.db.models import Count
+from django.utils.dateparse import parse_datetime
+
+from .models import CustomerChurn, CustomerRiskState
+from .trends import BUCKETS, bucket_filters
+
+
+def bucket_sql(column):
+    """count(*) FILTER (...) per distribution bucket, as json_build_object arguments"""
+    parts = []
+    for bucket, (lower, upper) in BUCKETS.items():
+        conditions = []
+        if lower is not None:
+            conditions.append(f"{column} >= {float(lower)}")
+        if upper is not None:
+            conditions.append(f"{column} < {float(upper)}")
+        parts.append(f"'{bucket}', count(*) FILTER (WHERE {' AND '.join(conditions)})")
+    return ', '.join(parts)
+
+
+def summary_sql():
+    state = CustomerRiskState._meta.db_table
+    customer = CustomerChurn._meta.db_table
+    columns = "l.customer_id, c.surname, l.churn_probability, l.previous_probability, l.risk_change, l.scored_at"
+    return f"""
+        WITH latest AS MATERIALIZED (
+            SELECT customer_id, churn_probability, previous_probability, risk_change, is_high_risk, scored_at
+            FROM {state}
+            WHERE scored_at >= %(since)s
+        )
+        SELECT
+            (SELECT json_build_object({bucket_sql('churn_probability')}) FROM latest),
+            (SELECT COALESCE(json_agg(row_to_json(h) ORDER BY h.churn_probability DESC), '[]'::json) FROM (
+                SELECT {columns} FROM latest l JOIN {customer} c ON c.customer_id = l.customer_id
+                WHERE l.is_high_risk
+                ORDER BY l.churn_probability DESC LIMIT %(limit)s
+            ) h),
+            (SELECT COALESCE(json_agg(row_to_json(i) ORDER BY i.scored_at DESC), '[]'::json) FROM (
+                SELECT {columns} FROM latest l JOIN {customer} c ON c.customer_id = l.customer_id
+                WHERE l.risk_change >= %(threshold)s
+                ORDER BY l.scored_at DESC LIMIT %(limit)s
+            ) i)
+    """
+
+
+def as_record(row):
+    record = dict(row)
+    if isinstance(record['scored_at'], str):
+        record['scored_at'] = parse_datetime(record['scored_at'])
+    return record
+
+
+def latest_risk_summary(since, risk_increase_threshold, limit=10):
+    """
+    The dashboard's view of each customer's latest score since `since`:
+    distribution buckets, the top high-risk customers by probability and the
+    most recent significant increases.
+
+    The latest score per customer is CustomerRiskState, which every
+    monitoring run upserts, so no history scan or per-customer MAX is
+    needed. On PostgreSQL the three sections come from one statement over a
+    materialized CTE; elsewhere from three queries on the state table.
+    Records are dicts with customer_id, surname, churn_probability,
+    previous_probability, risk_change and scored_at.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(summary_sql(), {'since': since, 'threshold': risk_increase_threshold, 'limit': limit})
+            distribution, high_risk, increases = cursor.fetchone()
+        return {
+            'risk_distribution': distribution,
+            'high_risk_customers': [as_record(row) for row in high_risk],
+            'significant_increases': [as_record(row) for row in increases],
+        }
+
+    latest = CustomerRiskState.objects.filter(scored_at__gte=since)
+    fields = ('customer_id', 'customer__surname', 'churn_probability', 'previous_probability', 'risk_change', 'scored_at')
+
+    def records(queryset):
+        return [
+            dict(zip(('customer_id', 'surname') + fields[2:], row))
+            for row in queryset.values_list(*fields)[:limit]
+        ]
+
+    return {
+        'risk_distribution': latest.aggregate(
+            **{bucket: Count('pk', filter=condition) for bucket, condition in bucket_filters('churn_probability').items()}
+        ),
+        'high_risk_customers': records(latest.filter(is_high_risk=True).order_by('-churn_probability')),
+        'significant_increases': records(latest.filter(risk_change__gte=risk_increase_threshold).order_by('-scored_at')),
+    }
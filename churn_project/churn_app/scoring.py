@@ -0,0 +1,185 @@
+import numpy as np
+
+from .telemetry import timer_stage
+
+# Feature order used at training time (see train_churn)
+numerical_features = [
+    "credit_score", "age", "tenure", "balance",
+    "num_of_products", "has_cr_card", "is_active_member",
+    "estimated_salary"
+]
+categorical_features = ["geography", "gender"]
+feature_cols = numerical_features + categorical_features
+
+# Values used by /predict/ when a feature is omitted from the request
+NUMERICAL_DEFAULTS = {
+    "credit_score": 0,
+    "age": 0,
+    "tenure": 0,
+    "balance": 0,
+    "num_of_products": 1,
+    "has_cr_card": 0,
+    "is_active_member": 0,
+    "estimated_salary": 0,
+}
+CATEGORICAL_DEFAULTS = {
+    "geography": "France",
+    "gender": "Female",
+}
+
+
+def normalize_features(data):
+    """
+    Convert a raw feature dict (e.g. a request body) into the typed,
+    defaulted features the model expects.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Expected an object of customer features")
+
+    features = {
+        name: float(data.get(name, default))
+        for name, default in NUMERICAL_DEFAULTS.items()
+    }
+    for name, default in CATEGORICAL_DEFAULTS.items():
+        features[name] = data.get(name, default)
+    return features
+
+
+def customer_feature_values(customer):
+    """
+    (numeric values, geography, gender) for a stored CustomerChurn, with the
+    same fallbacks the monitoring task has always used.
+    """
+    numeric = [
+        float(customer.credit_score or 0),
+        float(customer.age or 0),
+        float(customer.tenure or 0),
+        float(customer.balance or 0),
+        float(customer.num_of_products or 1),
+        float(customer.has_cr_card or 0),
+        float(customer.is_active_member or 0),
+        float(customer.estimated_salary or 0),
+    ]
+    return numeric, customer.geography or "Unknown", customer.gender or "Unknown"
+
+
+def score_batch(components, rows):
+    """
+    Score a list of raw feature dicts with a single scale and predict_proba
+    call over the whole batch.
+
+    Returns (probabilities, errors): probabilities is an array aligned with
+    rows (NaN where the row failed) and errors maps row index -> message.
+    """
+    preprocessor = components['preprocessor']
+    n_rows = len(rows)
+    feature_array = np.zeros((n_rows, len(feature_cols)), dtype=np.float64)
+    valid = np.ones(n_rows, dtype=bool)
+    errors = {}
+
+    for i, data in enumerate(rows):
+        try:
+            preprocessor.fill_from_data(data, feature_array[i])
+        except (TypeError, ValueError) as e:
+            errors[i] = str(e)
+            valid[i] = False
+
+    probabilities = np.full(n_rows, np.nan)
+    if valid.any():
+        feature_array = preprocessor.scale_inplace(feature_array[valid])
+        probabilities[valid] = components['model'].predict_proba(feature_array)[:, 1]
+
+    return probabilities, errors
+
+
+def score_customers(components, customers):
+    """
+    Score a chunk of stored CustomerChurn rows with a single scale and
+    predict_proba call. Returns (probabilities, errors) like score_batch.
+
+    If the model rejects the chunk, rows are retried one by one so only the
+    offending customers are reported as errors.
+    """
+    preprocessor = components['preprocessor']
+    n_rows = len(customers)
+    feature_array = np.zeros((n_rows, len(feature_cols)), dtype=np.float64)
+    valid = np.ones(n_rows, dtype=bool)
+    errors = {}
+
+    for i, customer in enumerate(customers):
+        try:
+            numeric, geography, gender = customer_feature_values(customer)
+            preprocessor.fill_row(numeric, geography, gender, feature_array[i])
+        except Exception as e:
+            errors[i] = f"Error preprocessing features: {str(e)}"
+            valid[i] = False
+
+    return predict_valid_rows(components, feature_array, valid, errors)
+
+
+def predict_valid_rows(components, feature_array, valid, errors, timer=None):
+    """
+    Scale the valid rows of an unscaled feature array and predict them in one
+    call. If the model rejects the chunk, rows are retried one by one and
+    failures are added to errors. Returns (probabilities, errors).
+    With a telemetry.StageTimer, scaling is charged to 'preprocess' and
+    predict_proba to 'inference'.
+    """
+    model = components['model']
+    probabilities = np.full(len(feature_array), np.nan)
+    if not valid.any():
+        return probabilities, errors
+
+    rows = np.flatnonzero(valid)
+    with timer_stage(timer, 'preprocess'):
+        feature_array = components['preprocessor'].scale_inplace(feature_array[valid])
+    with timer_stage(timer, 'inference'):
+        try:
+            probabilities[rows] = model.predict_proba(feature_array)[:, 1]
+        except Exception:
+            for position, i in enumerate(rows):
+                try:
+                    probabilities[i] = model.predict_proba(feature_array[position:position + 1])[0][1]
+                except Exception as e:
+                    errors[int(i)] = f"Error making prediction: {str(e)}"
+
+    return probabilities, errors
+
+
+# customer_feature_values() fallbacks for empty (NULL or 0) stored numeric columns
+STORED_NUMERICAL_FALLBACKS = np.array(
+    [1.0 if name == "num_of_products" else 0.0 for name in numerical_features]
+)
+
+
+def score_feature_block(components, numeric, geography, gender, timer=None):
+    """
+    Vectorized score_customers() for columns streamed from the database
+    (see data.iter_feature_blocks): numeric is a float array with NaN for
+    NULL, geography/gender are object arrays. Applies the same fallbacks
+    and returns (probabilities, errors) with the same messages.
+    """
+    preprocessor = components['preprocessor']
+    n_rows = len(numeric)
+    feature_array = np.empty((n_rows, preprocessor.n_features), dtype=np.float64)
+    valid = np.ones(n_rows, dtype=bool)
+    errors = {}
+
+    with timer_stage(timer, 'preprocess'):
+        empty = np.isnan(numeric) | (numeric == 0)
+        feature_array[:, :preprocessor.n_numerical] = np.where(empty, STORED_NUMERICAL_FALLBACKS, numeric)
+
+        for name, values, index, codes in (
+            ("geography", geography, preprocessor.geography_index, preprocessor.geography_codes),
+            ("gender", gender, preprocessor.gender_index, preprocessor.gender_codes),
+        ):
+            for i, value in enumerate(values):
+                code = codes.get(value or "Unknown")
+                if code is None:
+                    if valid[i]:
+                        errors[i] = f"Error preprocessing features: Unknown {name}: {value or 'Unknown'!r}"
+                        valid[i] = False
+                    continue
+                feature_array[i, index] = code
+
+    return predict_valid_rows(components, feature_array, valid, errors, timer=timer)
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import CustomerChurn, AlertConfiguration, AlertHistory
+from .models import CustomerChurn, AlertConfiguration, AlertHistory, MonitoringRun
 
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -49,4 +49,11 @@ class AlertHistorySerializer(serializers.ModelSerializer):
         model = AlertHistory
         fields = ['id', 'customer', 'customer_name', 'alert_type', 'message', 
                  'sent_at', 'was_sent', 'error_message']
-        read_only_fields = ['sent_at', 'was_sent', 'error_message'] 
\ No newline at end of file
+        read_only_fields = ['sent_at', 'was_sent', 'error_message']
+
+class MonitoringRunSerializer(serializers.ModelSerializer):
+    duration_seconds = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = MonitoringRun
+        fields = '__all__'
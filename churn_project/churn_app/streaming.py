@@ -0,0 +1,173 @@
+import codecs
+import csv
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+from .scoring import numerical_features, categorical_features, NUMERICAL_DEFAULTS, CATEGORICAL_DEFAULTS
+
+# Churn_Modelling.csv headers, as understood by import_csv
+CSV_COLUMN_MAP = {
+    'CustomerId': 'customer_id',
+    'CreditScore': 'credit_score',
+    'Geography': 'geography',
+    'Gender': 'gender',
+    'Age': 'age',
+    'Tenure': 'tenure',
+    'Balance': 'balance',
+    'NumOfProducts': 'num_of_products',
+    'HasCrCard': 'has_cr_card',
+    'IsActiveMember': 'is_active_member',
+    'EstimatedSalary': 'estimated_salary',
+}
+
+STREAM_FORMATS = ('csv', 'ndjson')
+OUTPUT_COLUMNS = ['row', 'customer_id', 'churn_probability', 'error']
+
+
+def guess_format(name, content_type=None):
+    """Pick csv/ndjson from a file name or content type"""
+    name = (name or '').lower()
+    content_type = (content_type or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type or 'jsonlines' in content_type:
+        return 'ndjson'
+    return 'csv'
+
+
+def iter_csv_chunks(stream, chunk_size):
+    """DataFrames of at most chunk_size rows from a (binary or text) CSV stream"""
+    for chunk in pd.read_csv(stream, chunksize=chunk_size):
+        yield chunk.rename(columns=CSV_COLUMN_MAP)
+
+
+def iter_ndjson_chunks(stream, chunk_size):
+    """DataFrames of at most chunk_size rows from an NDJSON stream; bad lines become empty rows"""
+    if not isinstance(stream, io.TextIOBase):
+        stream = codecs.getreader('utf-8')(stream)
+
+    records = []
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("Expected an object of customer features")
+        except ValueError as e:
+            record = {'_error': f"Invalid JSON line: {str(e)}"}
+        records.append(record)
+        if len(records) >= chunk_size:
+            yield pd.DataFrame.from_records(records).rename(columns=CSV_COLUMN_MAP)
+            records = []
+    if records:
+        yield pd.DataFrame.from_records(records).rename(columns=CSV_COLUMN_MAP)
+
+
+def score_frame(components, df):
+    """
+    Vectorized scoring of a chunk whose columns use the model feature names.
+    Missing columns and empty cells fall back to the /predict/ defaults;
+    invalid values and unknown categories are reported per row.
+
+    Returns (probabilities, errors) like score_batch.
+    """
+    preprocessor = components['preprocessor']
+    n_rows = len(df)
+    feature_array = np.empty((n_rows, preprocessor.n_features), dtype=np.float64)
+    invalid = np.zeros(n_rows, dtype=bool)
+    messages = np.full(n_rows, None, dtype=object)
+
+    if '_error' in df.columns:
+        parse_errors = df['_error'].notna().to_numpy()
+        messages[parse_errors] = df['_error'].to_numpy()[parse_errors]
+        invalid |= parse_errors
+
+    for j, name in enumerate(numerical_features):
+        if name not in df.columns:
+            feature_array[:, j] = float(NUMERICAL_DEFAULTS[name])
+            continue
+        # copy=True: pandas may hand back a read-only view, and missing values are filled in place
+        values = pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+        values[df[name].isna().to_numpy()] = float(NUMERICAL_DEFAULTS[name])
+        bad = np.isnan(values) & ~invalid
+        messages[bad] = f"Invalid {name}"
+        invalid |= bad
+        feature_array[:, j] = values
+
+    for name in categorical_features:
+        index = preprocessor.geography_index if name == 'geography' else preprocessor.gender_index
+        codes = preprocessor.geography_codes if name == 'geography' else preprocessor.gender_codes
+        if name in df.columns:
+            encoded = df[name].fillna(CATEGORICAL_DEFAULTS[name]).map(codes).to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            encoded = np.full(n_rows, codes.get(CATEGORICAL_DEFAULTS[name], np.nan))
+        bad = np.isnan(encoded) & ~invalid
+        for i in np.flatnonzero(bad):
+            value = df[name].iloc[i] if name in df.columns else CATEGORICAL_DEFAULTS[name]
+            messages[i] = f"Unknown {name}: {value!r}"
+        invalid |= bad
+        feature_array[:, index] = encoded
+
+    probabilities = np.full(n_rows, np.nan)
+    valid = ~invalid
+    if valid.any():
+        scaled = preprocessor.scale_inplace(feature_array[valid])
+        probabilities[valid] = components['model'].predict_proba(scaled)[:, 1]
+
+    errors = {int(i): messages[i] for i in np.flatnonzero(invalid)}
+    return probabilities, errors
+
+
+def iter_scored_rows(components, stream, fmt='csv', chunk_size=10000):
+    """Yield one result dict per input row, scoring chunk by chunk"""
+    if fmt not in STREAM_FORMATS:
+        raise ValueError(f"Unsupported format: {fmt!r}")
+
+    chunks = iter_csv_chunks(stream, chunk_size) if fmt == 'csv' else iter_ndjson_chunks(stream, chunk_size)
+    row_offset = 0
+    for chunk in chunks:
+        probabilities, errors = score_frame(components, chunk)
+        customer_ids = chunk['customer_id'].tolist() if 'customer_id' in chunk.columns else [None] * len(chunk)
+
+        for i, probability in enumerate(probabilities):
+            customer_id = customer_ids[i]
+            try:
+                customer_id = None if pd.isna(customer_id) else int(customer_id)
+            except (TypeError, ValueError):
+                customer_id = None
+
+            result = {'row': row_offset + i, 'customer_id': customer_id}
+            if i in errors:
+                result['error'] = errors[i]
+            else:
+                result['churn_probability'] = float(probability)
+            yield result
+        row_offset += len(chunk)
+
+
+def iter_encoded_results(results, output_format='ndjson', batch_rows=1000):
+    """Encode result dicts as NDJSON lines or CSV text, batch_rows rows per piece"""
+    buffer = io.StringIO()
+    writer = None
+    if output_format == 'csv':
+        writer = csv.DictWriter(buffer, fieldnames=OUTPUT_COLUMNS)
+        writer.writeheader()
+
+    pending = 0
+    for result in results:
+        if writer:
+            writer.writerow(result)
+        else:
+            buffer.write(json.dumps(result) + '\n')
+        pending += 1
+        if pending >= batch_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -1,12 +1,32 @@
-from celery import shared_task
+from celery import shared_task, chord, group
 from django.core.management import call_command
 from django.conf import settings
-from .models import CustomerChurn, ChurnRiskHistory
+from django.utils import timezone
+from django.db.models import Q, F
+from .models import CustomerChurn, ChurnRiskHistory, CustomerRiskState, AlertHistory, MonitoringRun
 from .views import get_model_components
-from .utils import send_discord_alert, send_monitoring_summary
-import numpy as np
-import pandas as pd
-import traceback
+from .scoring import score_feature_block
+from .data import iter_feature_blocks
+from .telemetry import StageTimer, SampledLogger, log_event, logger
+from .bulk_writes import BufferedWriter
+from . import retention
+from .partitions import is_partitioned
+from .trends import TrendAccumulator
+from .utils import AlertQueue, deliver_alert_batches, send_monitoring_summary
+import logging
+
+
+def upsert_risk_states(states):
+    """Insert or overwrite the latest-score rows for a chunk in one statement"""
+    if not states:
+        return
+    CustomerRiskState.objects.bulk_create(
+        states,
+        update_conflicts=True,
+        unique_fields=['customer'],
+        update_fields=['churn_probability', 'previous_probability', 'risk_change',
+                       'is_high_risk', 'model_version', 'scored_at']
+    )
 
 @shared_task
 def retrain_churn_model():
@@ -15,94 +35,133 @@ def retrain_churn_model():
     return "Model retrained!"
 
 @shared_task
-def monitor_customer_churn():
+def compact_risk_history(max_batches=None):
     """
-    Periodic task to monitor customer churn risk and send alerts via Discord
+    Fold raw risk history older than RISK_HISTORY['RAW_RETENTION_DAYS'] into
+    daily per-customer rollups, then expire rollups past their own retention.
     """
-    try:
-        print("Starting customer churn monitoring...")  # Debug log
+    stats = retention.compact_history(max_batches=max_batches)
+    expired = retention.expire_rollups()
+    result_msg = (
+        f"Risk history compaction {'complete' if stats['complete'] else 'partial'}. "
+        f"Rows compacted: {stats['rows_compacted']}, Rollups written: {stats['rollups_written']}, "
+        f"Rollups expired: {expired}"
+    )
+    logger.info(result_msg)
+    return result_msg
+
+@shared_task
+def maintain_risk_history_partitions():
+    """Create the coming months' history partitions and drop compacted old ones"""
+    if not is_partitioned():
+        return "Risk history is not partitioned"
+    call_command("create_risk_history_partitions")
+    call_command("drop_risk_history_partitions")
+    return "Risk history partitions maintained"
+
+def customers_to_rescore(model_version, full_sweep=False, scored_before=None):
+    """
+    Customers whose stored score is missing or out of date: never scored,
+    edited after their last score, or scored by a different model version.
+    A full sweep returns every customer. With scored_before, customers already
+    scored at or after that time (e.g. earlier in the same run) are skipped.
+    """
+    customers = CustomerChurn.objects.order_by('customer_id')
+    if not full_sweep:
+        customers = customers.filter(
+            Q(risk_state__isnull=True)
+            | Q(updated_at__gt=F('risk_state__scored_at'))
+            | ~Q(risk_state__model_version=model_version)
+        )
+    if scored_before is not None:
+        customers = customers.filter(
+            Q(risk_state__isnull=True) | Q(risk_state__scored_at__lt=scored_before)
+        )
+    return customers
+
+def shard_ranges(customers, shard_size):
+    """Split an ordered customer queryset into inclusive (first_id, last_id) ranges of shard_size customers"""
+    ranges = []
+    last_customer_id = None
+    while True:
+        shard_qs = customers if last_customer_id is None else customers.filter(customer_id__gt=last_customer_id)
+        ids = shard_qs.values_list('customer_id', flat=True)
+        first_id = ids.first()
+        if first_id is None:
+            break
+        boundary = list(ids[shard_size - 1:shard_size])
+        last_customer_id = boundary[0] if boundary else ids.last()
+        ranges.append((first_id, last_customer_id))
+    return ranges
+
+# Counters a monitoring run reports, summed over shards, and their MonitoringRun fields.
+# alerts_delivered and alerts_failed are added by deliver_alerts as messages go out.
+RUN_COUNTERS = {
+    'total_checked': 'customers_scored',
+    'high_risk_count': 'high_risk_count',
+    'significant_increases': 'significant_increases',
+    'error_count': 'error_count',
+    'fetch_seconds': 'fetch_seconds',
+    'preprocess_seconds': 'preprocess_seconds',
+    'inference_seconds': 'inference_seconds',
+    'write_seconds': 'write_seconds',
+    'alert_seconds': 'alert_seconds',
+}
+
+def monitor_customers(components, customers, run_id=None):
+    """
+    Score the given customers chunk by chunk, record history and state and
+    queue alerts for deliver_alerts. Returns the run counters and per-stage
+    seconds (see RUN_COUNTERS); errors outside a single customer propagate.
+    """
+    chunk_size = settings.MONITORING.get('CHUNK_SIZE', 1000)
+    write_batch_size = settings.MONITORING.get('WRITE_BATCH_SIZE', 1000)
+    use_copy = settings.MONITORING.get('USE_COPY', False)
+    
+    timer = StageTimer()
+    sampled_log = SampledLogger(rate=settings.MONITORING.get('LOG_SAMPLE_RATE', 0.01))
+    
+    total_checked = 0
+    high_risk_count = 0
+    significant_increases = 0
+    error_count = 0
+    
+    # History rows are buffered and written in bounded transactions
+    history_writer = BufferedWriter(ChurnRiskHistory, batch_size=write_batch_size, use_copy=use_copy, verbose=False)
+    # Full alert messages are sent by deliver_alerts, so the scan never waits on the rate limiter
+    alert_queue = AlertQueue(dispatch=lambda batches: deliver_alerts.delay(batches, run_id=run_id))
+    trend = TrendAccumulator()
+    
+    # Only the feature columns are streamed, one preallocated NumPy block at a time
+    for block in timer.timed_iter(iter_feature_blocks(customers, chunk_size), 'fetch'):
+        customer_ids = block.customer_ids.tolist()
+        scored_at = timezone.now()
+        scored_on = timezone.localdate(scored_at)
+        total_checked += len(customer_ids)
         
-        # Load model components
-        components = get_model_components()
-        if not components:
-            error_msg = "Model components not available. Please train the model first."
-            print(error_msg)  # Debug log
-            return error_msg
-            
-        model = components['model']
-        scaler = components['scaler']
-        le_geo = components['label_encoder_geo']
-        le_gender = components['label_encoder_gender']
+        # One vectorized preprocess + predict_proba call for the whole chunk
+        probabilities, errors = score_feature_block(
+            components, block.numeric, block.geography, block.gender, timer=timer
+        )
         
-        # Define feature order explicitly to match training
-        numerical_features = [
-            "credit_score", "age", "tenure", "balance", 
-            "num_of_products", "has_cr_card", "is_active_member", 
-            "estimated_salary"
-        ]
-        categorical_features = ["geography", "gender"]
-        feature_cols = numerical_features + categorical_features
+        # Previous scores for the whole chunk in one primary-key lookup
+        with timer.stage('fetch'):
+            previous_states = CustomerRiskState.objects.in_bulk(customer_ids)
+        new_states = []
+        pending_alerts = []
         
-        # Get all customers
-        customers = CustomerChurn.objects.all()
-        if not customers.exists():
-            return "No customers found in database"
+        for index, customer_id in enumerate(customer_ids):
+            if index in errors:
+                error_count += 1
+                sampled_log.log('customer_scoring_failed', level=logging.WARNING, run_id=run_id,
+                                customer_id=customer_id, error=errors[index])
+                continue
             
-        print(f"Found {customers.count()} customers to monitor")  # Debug log
-        
-        total_checked = 0
-        high_risk_count = 0
-        significant_increases = 0
-        
-        for customer in customers:
             try:
-                total_checked += 1
-                print(f"Processing customer {customer.customer_id}")  # Debug log
-                
-                # Create input data as numpy array first
-                input_data = np.array([[
-                    float(customer.credit_score or 0),
-                    float(customer.age or 0),
-                    float(customer.tenure or 0),
-                    float(customer.balance or 0),
-                    float(customer.num_of_products or 1),
-                    float(customer.has_cr_card or 0),
-                    float(customer.is_active_member or 0),
-                    float(customer.estimated_salary or 0),
-                    customer.geography or "Unknown",
-                    customer.gender or "Unknown"
-                ]])
-                
-                # Convert to DataFrame with explicit column names
-                input_df = pd.DataFrame(
-                    input_data, 
-                    columns=feature_cols
-                )
-                
-                try:
-                    # Encode categorical variables
-                    input_df["geography"] = le_geo.transform(input_df["geography"].values)
-                    input_df["gender"] = le_gender.transform(input_df["gender"].values)
-                except Exception as e:
-                    print(f"Error encoding categorical variables for customer {customer.customer_id}: {str(e)}")
-                    continue
-                
-                try:
-                    # Scale numerical features
-                    input_df[numerical_features] = scaler.transform(input_df[numerical_features])
-                except Exception as e:
-                    print(f"Error scaling features for customer {customer.customer_id}: {str(e)}")
-                    continue
-                
-                try:
-                    # Make prediction using ordered features
-                    probability = model.predict_proba(input_df[feature_cols])[0][1]
-                except Exception as e:
-                    print(f"Error making prediction for customer {customer.customer_id}: {str(e)}")
-                    continue
+                probability = float(probabilities[index])
                 
                 # Get previous probability
-                previous = ChurnRiskHistory.objects.filter(customer=customer).order_by('-timestamp').first()
+                previous = previous_states.get(customer_id)
                 previous_prob = previous.churn_probability if previous else None
                 
                 # Calculate risk change
@@ -123,44 +182,228 @@ def monitor_customer_churn():
                 if has_significant_increase:
                     significant_increases += 1
                 
-                # Create history record
-                ChurnRiskHistory.objects.create(
-                    customer=customer,
+                # Queue history record
+                history_writer.add(ChurnRiskHistory(
+                    customer_id=customer_id,
                     churn_probability=probability,
                     previous_probability=previous_prob,
                     risk_change=risk_change,
-                    is_high_risk=is_high_risk
-                )
+                    is_high_risk=is_high_risk,
+                    model_version=components['version']
+                ))
+                trend.add(scored_on, probability, is_high_risk)
+                new_states.append(CustomerRiskState(
+                    customer_id=customer_id,
+                    churn_probability=probability,
+                    previous_probability=previous_prob,
+                    risk_change=risk_change,
+                    is_high_risk=is_high_risk,
+                    model_version=components['version'],
+                    scored_at=scored_at
+                ))
                 
-                # Send alert if needed
                 if is_high_risk or has_significant_increase:
-                    alert_sent = send_discord_alert(
-                        customer=customer,
+                    pending_alerts.append((customer_id, probability, risk_change, previous_prob))
+                    sampled_log.log('customer_alert_queued', run_id=run_id, customer_id=customer_id,
+                                    probability=round(probability, 4), risk_change=risk_change)
+            
+            except Exception as customer_error:
+                error_count += 1
+                sampled_log.log('customer_processing_failed', level=logging.WARNING, run_id=run_id,
+                                customer_id=customer_id, error=str(customer_error))
+                continue
+        
+        with timer.stage('alert'):
+            # Queue alerts; only alerted customers are loaded as full model instances
+            alerted_customers = CustomerChurn.objects.in_bulk([alert[0] for alert in pending_alerts])
+            for customer_id, probability, risk_change, previous_prob in pending_alerts:
+                try:
+                    alert_queue.add(
+                        customer=alerted_customers[customer_id],
                         probability=probability,
                         risk_change=risk_change,
                         previous_probability=previous_prob
                     )
-                    if not alert_sent:
-                        print(f"Failed to send alert for customer {customer.customer_id}")
+                except Exception as customer_error:
+                    error_count += 1
+                    sampled_log.log('customer_alert_failed', level=logging.WARNING, run_id=run_id,
+                                    customer_id=customer_id, error=str(customer_error))
             
-            except Exception as customer_error:
-                print(f"Error processing customer {customer.customer_id}: {str(customer_error)}")
-                continue
+            # Enqueue full multi-embed messages; a partial one waits for the next chunk
+            alert_queue.flush(full_only=True)
         
-        # Send monitoring summary
+        with timer.stage('write'):
+            # Flush at chunk boundaries so history, alerts and state stay in step
+            history_writer.flush()
+            upsert_risk_states(new_states)
+            # The dashboard's daily trend follows the history rows just written
+            trend.apply()
+        
+        log_event('monitoring_chunk', run_id=run_id, first_customer_id=customer_ids[0],
+                  last_customer_id=customer_ids[-1], rows=len(customer_ids), errors=len(errors),
+                  **{key: round(value, 4) for key, value in timer.as_stats().items()})
+    
+    with timer.stage('alert'):
+        alert_queue.flush()
+    
+    stats = {
+        'total_checked': total_checked,
+        'high_risk_count': high_risk_count,
+        'significant_increases': significant_increases,
+        'error_count': error_count,
+        **timer.as_stats()
+    }
+    log_event('monitoring_customers_done', run_id=run_id, history_rows=history_writer.total_written,
+              history_flushes=history_writer.flush_count, alerts_queued=alert_queue.alerts_queued, **stats)
+    return stats
+
+@shared_task(ignore_result=True)
+def deliver_alerts(batches, run_id=None):
+    """
+    Send alert messages packed by a monitoring run's AlertQueue. Waiting on
+    the Discord rate limiter happens here, off the scan, and the run's
+    delivery counters grow as each batch is sent.
+    """
+    writer = BufferedWriter(AlertHistory, batch_size=settings.MONITORING.get('WRITE_BATCH_SIZE', 1000),
+                            use_copy=settings.MONITORING.get('USE_COPY', False), verbose=False)
+    delivered, failed = deliver_alert_batches(batches, writer=writer)
+    writer.flush()
+    record_run(run_id, alerts_delivered=F('alerts_delivered') + delivered, alerts_failed=F('alerts_failed') + failed)
+    log_event('monitoring_alerts_delivered', run_id=run_id, messages=len(batches), delivered=delivered, failed=failed)
+    return delivered
+
+def record_run(run_id, **fields):
+    """Update a MonitoringRun row, if the run is tracked"""
+    if run_id is not None:
+        MonitoringRun.objects.filter(pk=run_id).update(**fields)
+
+def complete_monitoring(stats, mode, run_id=None):
+    """Send the run summary, store the run's telemetry and build the task result message"""
+    timer = StageTimer()
+    with timer.stage('alert'):
         summary_sent = send_monitoring_summary(
-            total_checked=total_checked,
-            high_risk_count=high_risk_count,
-            significant_increases=significant_increases
+            total_checked=stats['total_checked'],
+            high_risk_count=stats['high_risk_count'],
+            significant_increases=stats['significant_increases']
         )
-        if not summary_sent:
-            print("Failed to send monitoring summary")
+    if not summary_sent:
+        logger.warning("Failed to send monitoring summary")
+    
+    record_run(
+        run_id,
+        status='SUCCESS',
+        finished_at=timezone.now(),
+        **{field: stats.get(key, 0) for key, field in RUN_COUNTERS.items() if key != 'alert_seconds'},
+        alert_seconds=stats.get('alert_seconds', 0) + timer.seconds['alert']
+    )
+        
+    result_msg = (
+        f"Monitoring completed successfully ({mode}). Checked: {stats['total_checked']}, "
+        f"High Risk: {stats['high_risk_count']}, Significant Increases: {stats['significant_increases']}"
+    )
+    logger.info(result_msg)
+    return result_msg
+
+@shared_task(
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    retry_kwargs={'max_retries': 3}
+)
+def monitor_customer_shard(first_id, last_id, full_sweep=False, started_at=None, run_id=None):
+    """
+    Monitor the customers with first_id <= customer_id <= last_id.
+    Failures are retried for this shard alone; customers the failed attempt
+    already scored during this run are not scored twice.
+    """
+    components = get_model_components()
+    if not components:
+        raise RuntimeError("Model components not available. Please train the model first.")
+    
+    scored_before = timezone.datetime.fromisoformat(started_at) if started_at else None
+    customers = customers_to_rescore(
+        components['version'], full_sweep=full_sweep, scored_before=scored_before
+    ).filter(customer_id__gte=first_id, customer_id__lte=last_id)
+    
+    logger.info("Monitoring shard %s-%s", first_id, last_id)
+    return monitor_customers(components, customers, run_id=run_id)
+
+@shared_task
+def finalize_monitoring(shard_stats, mode="incremental", run_id=None):
+    """Chord callback: add up the shard counters and send one summary"""
+    stats = {
+        key: sum(shard.get(key, 0) for shard in shard_stats)
+        for key in RUN_COUNTERS
+    }
+    logger.info("All %d monitoring shards finished", len(shard_stats))
+    return complete_monitoring(stats, mode, run_id=run_id)
+
+@shared_task
+def fail_monitoring_run(run_id, error_message):
+    """Chord error callback: a shard gave up after its retries"""
+    record_run(run_id, status='FAILED', finished_at=timezone.now(), error_message=error_message)
+
+@shared_task(bind=True)
+def monitor_customer_churn(self, full_sweep=False, inline=False):
+    """
+    Periodic task to monitor customer churn risk and send alerts via Discord.
+    Only customers that changed since their last score are rescored unless
+    full_sweep is set. Every run is recorded as a MonitoringRun.
+    
+    With MONITORING['SHARD_SIZE'] set, the customers are split into shards
+    that run in parallel on the Celery workers, and finalize_monitoring sends
+    the summary once all of them are done. inline=True always runs in-process.
+    """
+    mode = "full sweep" if full_sweep else "incremental"
+    run = None
+    try:
+        logger.info("Starting customer churn monitoring...")
+        run = MonitoringRun.objects.create(mode=mode, task_id=self.request.id)
+        
+        # Load model components
+        components = get_model_components()
+        if not components:
+            error_msg = "Model components not available. Please train the model first."
+            logger.error(error_msg)
+            record_run(run.pk, status='FAILED', finished_at=timezone.now(), error_message=error_msg)
+            return error_msg
+        record_run(run.pk, model_version=components['version'])
+        
+        # Get the customers that need a new score
+        if not CustomerChurn.objects.exists():
+            record_run(run.pk, status='SUCCESS', finished_at=timezone.now())
+            return "No customers found in database"
+        customers = customers_to_rescore(components['version'], full_sweep=full_sweep)
+        if not customers.exists():
+            record_run(run.pk, status='SUCCESS', finished_at=timezone.now())
+            result_msg = f"Monitoring completed successfully ({mode}). No customers changed since the last run"
+            logger.info(result_msg)
+            return result_msg
             
-        result_msg = f"Monitoring completed successfully. Checked: {total_checked}, High Risk: {high_risk_count}, Significant Increases: {significant_increases}"
-        print(result_msg)  # Debug log
-        return result_msg
+        logger.info("Found %d customers to monitor (%s)", customers.count(), mode)
+        
+        shard_size = settings.MONITORING.get('SHARD_SIZE')
+        if shard_size and not inline:
+            shards = shard_ranges(customers, shard_size)
+            if len(shards) > 1:
+                record_run(run.pk, shard_count=len(shards))
+                callback = finalize_monitoring.s(mode=mode, run_id=run.pk).on_error(
+                    fail_monitoring_run.si(run.pk, "A monitoring shard failed after its retries")
+                )
+                chord(group(
+                    monitor_customer_shard.s(first_id, last_id, full_sweep=full_sweep,
+                                             started_at=run.started_at.isoformat(), run_id=run.pk)
+                    for first_id, last_id in shards
+                ))(callback)
+                result_msg = f"Monitoring dispatched ({mode}) as {len(shards)} shards of up to {shard_size} customers"
+                logger.info(result_msg)
+                return result_msg
+        
+        stats = monitor_customers(components, customers, run_id=run.pk)
+        return complete_monitoring(stats, mode, run_id=run.pk)
         
     except Exception as e:
         error_msg = f"Error in monitoring: {str(e)}"
-        print(f"{error_msg}\nTraceback: {traceback.format_exc()}")  # Debug log
+        logger.exception(error_msg)
+        if run is not None:
+            record_run(run.pk, status='FAILED', finished_at=timezone.now(), error_message=error_msg)
         return error_msg
@@ -0,0 +1,72 @@
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager, nullcontext
+
+logger = logging.getLogger('churn_app.monitoring')
+
+# Stages a monitoring run is broken into, see MonitoringRun
+MONITORING_STAGES = ('fetch', 'preprocess', 'inference', 'write', 'alert')
+
+
+class StageTimer:
+    """Accumulates wall-clock seconds per monitoring stage"""
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(MONITORING_STAGES, 0.0)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+
+    def timed_iter(self, iterable, name='fetch'):
+        """Yield from iterable, charging the time spent producing each item to a stage"""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def as_stats(self):
+        """{'<stage>_seconds': seconds} for run stats and MonitoringRun fields"""
+        return {f"{name}_seconds": seconds for name, seconds in self.seconds.items()}
+
+
+def timer_stage(timer, name):
+    """timer.stage(name), or a no-op when no timer is given"""
+    return timer.stage(name) if timer is not None else nullcontext()
+
+
+def log_event(event, level=logging.INFO, **fields):
+    """One structured (JSON) log line"""
+    logger.log(level, json.dumps({'event': event, **fields}, default=str))
+
+
+class SampledLogger:
+    """
+    Logs per-customer events for a sample of customers instead of all of
+    them: the first `always_first` events of each kind, then each one with
+    probability `rate`. Every line carries the rate so counts can be scaled.
+    """
+
+    def __init__(self, rate=0.01, always_first=5, rng=random.random):
+        self.rate = rate
+        self.always_first = always_first
+        self.rng = rng
+        self.seen = {}
+
+    def log(self, event, level=logging.INFO, **fields):
+        count = self.seen.get(event, 0) + 1
+        self.seen[event] = count
+        if count <= self.always_first or self.rng() < self.rate:
+            log_event(event, level=level, sample_rate=self.rate, occurrence=count, **fields)
+            return True
+        return False
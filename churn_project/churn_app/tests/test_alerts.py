@@ -1,10 +1,14 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth.models import User
 from rest_framework.test import APIClient
 from rest_framework import status
 from ..models import AlertConfiguration, AlertHistory, CustomerChurn
+from ..rate_limit import LocalTokenBucket
+from ..utils import AlertQueue, deliver_alert_batches, embed_text_length, MAX_EMBED_TEXT_LENGTH, validate_webhook_url
+from unittest import mock
 from django.utils import timezone
+from django.core.cache import cache
 import json
 
 class AlertEndpointsTest(TestCase):
@@ -131,4 +135,154 @@ class AlertEndpointsTest(TestCase):
         self.assertIn('significant_increases', response.data)
         self.assertIn('risk_distribution', response.data)
         self.assertIn('risk_trend', response.data)
-        self.assertIn('thresholds', response.data) 
\ No newline at end of file
+        self.assertIn('thresholds', response.data) 
+
+
+@override_settings(DISCORD_WEBHOOK_URL='https://discord.com/api/webhooks/test')
+class AlertQueueTest(TestCase):
+    def setUp(self):
+        self.customers = [
+            CustomerChurn.objects.create(
+                customer_id=customer_id, surname=f'Customer {customer_id}', geography='France',
+                age=40, tenure=3, balance=1000, num_of_products=1
+            )
+            for customer_id in range(1, 26)
+        ]
+        patches = [
+            mock.patch('churn_app.utils.validate_webhook_url', return_value=(True, None)),
+            mock.patch('churn_app.utils.send_discord_message', return_value=(True, None)),
+        ]
+        self.validate, self.send = [patcher.start() for patcher in patches]
+        for patcher in patches:
+            self.addCleanup(patcher.stop)
+
+    def unlimited_queue(self):
+        return AlertQueue(rate_limiter=LocalTokenBucket(rate=1000, capacity=1000))
+
+    def test_alerts_are_packed_ten_embeds_per_message(self):
+        queue = self.unlimited_queue()
+        for customer in self.customers:
+            queue.add(customer, 0.9)
+
+        self.assertEqual(queue.flush(), 25)
+        self.assertEqual(sorted(len(call.args[1]['embeds']) for call in self.send.call_args_list), [5, 10, 10])
+        self.assertEqual(AlertHistory.objects.filter(was_sent=True).count(), 25)
+        record = AlertHistory.objects.get(customer=self.customers[0])
+        self.assertEqual(len(record.message['embeds']), 1)
+        self.assertEqual(record.alert_type, 'HIGH_RISK')
+
+    def test_partial_message_waits_for_more_alerts(self):
+        queue = self.unlimited_queue()
+        for customer in self.customers[:15]:
+            queue.add(customer, 0.9)
+
+        self.assertEqual(queue.flush(full_only=True), 10)
+        self.assertEqual(len(queue.pending), 5)
+        self.assertEqual(queue.flush(), 5)
+        self.assertEqual(queue.pending, [])
+
+    def test_failed_message_records_every_alert(self):
+        self.send.return_value = (False, "Discord API returned status code: 500")
+        queue = self.unlimited_queue()
+        for customer in self.customers[:3]:
+            queue.add(customer, 0.9)
+
+        self.assertEqual(queue.flush(), 0)
+        self.assertEqual(queue.alerts_failed, 3)
+        self.assertEqual(AlertHistory.objects.filter(was_sent=False, customer__isnull=False).count(), 3)
+
+    def test_messages_are_paced_per_minute(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        # Two messages per minute, both available at once
+        limiter = LocalTokenBucket(rate=2 / 60, capacity=2, sleep=sleep, clock=lambda: now[0])
+        queue = AlertQueue(rate_limiter=limiter)
+        for customer in self.customers:
+            queue.add(customer, 0.9)
+        queue.flush()
+
+        self.assertEqual(self.send.call_count, 3)
+        self.assertEqual(len(sleeps), 1)
+        self.assertAlmostEqual(sleeps[0], 30)
+
+    def test_dispatch_takes_over_delivery(self):
+        dispatched = []
+        queue = AlertQueue(dispatch=dispatched.append)
+        for customer in self.customers[:15]:
+            queue.add(customer, 0.9)
+
+        self.assertEqual(queue.flush(full_only=True), 0)
+        self.assertEqual([[len(batch) for batch in batches] for batches in dispatched], [[10]])
+        self.assertEqual(queue.alerts_queued, 10)
+        self.send.assert_not_called()
+        self.assertFalse(AlertHistory.objects.exists())
+
+        # The worker side sends and records what was handed over
+        self.assertEqual(deliver_alert_batches(dispatched[0], rate_limiter=LocalTokenBucket(rate=1000, capacity=1000)), (10, 0))
+        self.assertEqual(AlertHistory.objects.filter(was_sent=True).count(), 10)
+
+    def test_pack_respects_embed_text_limit(self):
+        big_embed = {'title': 'x' * 2500}
+        batches = AlertQueue.pack([(None, big_embed, 'HIGH_RISK')] * 5)
+
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        for batch in batches:
+            self.assertLessEqual(sum(embed_text_length(embed) for _, embed, _ in batch), MAX_EMBED_TEXT_LENGTH)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                       'LOCATION': 'webhook-validation-tests'}})
+class WebhookValidationCacheTest(TestCase):
+    url = 'https://discord.com/api/webhooks/test'
+
+    def setUp(self):
+        patcher = mock.patch('churn_app.utils.requests.get', return_value=mock.Mock(status_code=200))
+        self.get = patcher.start()
+        self.addCleanup(patcher.stop)
+        # Validation results must not leak between tests
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.admin_user = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='adminpass123'
+        )
+
+    def test_validation_result_is_reused(self):
+        self.assertEqual(validate_webhook_url(self.url), (True, None))
+        self.assertEqual(validate_webhook_url(self.url), (True, None))
+        self.assertEqual(self.get.call_count, 1)
+
+        # Network errors are not cached
+        self.get.side_effect = ConnectionError("down")
+        other_url = 'https://discord.com/api/webhooks/other'
+        self.assertFalse(validate_webhook_url(other_url)[0])
+        self.assertFalse(validate_webhook_url(other_url)[0])
+        self.assertEqual(self.get.call_count, 3)
+
+    def test_config_update_invalidates_cached_result(self):
+        self.get.return_value = mock.Mock(status_code=404)
+        self.assertEqual(validate_webhook_url(self.url), (False, "Webhook URL not found"))
+
+        client = APIClient()
+        client.force_authenticate(user=self.admin_user)
+        response = client.post(
+            reverse('manage_alert_config'),
+            data=json.dumps({
+                'webhook_url': self.url,
+                'is_enabled': True,
+                'high_risk_threshold': 0.7,
+                'risk_increase_threshold': 20.0
+            }),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.get.return_value = mock.Mock(status_code=200)
+        self.assertEqual(validate_webhook_url(self.url), (True, None))
+        self.assertEqual(self.get.call_count, 2)
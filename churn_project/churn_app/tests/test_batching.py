@@ -0,0 +1,77 @@
+from django.test import SimpleTestCase
+from ..batching import MicroBatcher
+import numpy as np
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class MicroBatcherTest(SimpleTestCase):
+    def setUp(self):
+        self.calls = []
+
+    def fake_score(self, rows):
+        self.calls.append(len(rows))
+        probabilities = np.array([row.get("age", 0) / 100 for row in rows], dtype=float)
+        errors = {i: "Unknown geography: 'Atlantis'" for i, row in enumerate(rows)
+                  if row.get("geography") == "Atlantis"}
+        return {'version': 'test'}, probabilities, errors
+
+    def test_concurrent_requests_share_one_call(self):
+        batcher = MicroBatcher(max_batch_size=10, max_wait_ms=50, score_fn=self.fake_score)
+
+        async def run():
+            return await asyncio.gather(*[batcher.submit({"age": age}) for age in range(5)])
+
+        results = asyncio.run(run())
+
+        self.assertEqual(self.calls, [5])
+        self.assertEqual([probability for probability, _ in results], [0.0, 0.01, 0.02, 0.03, 0.04])
+
+    def test_batches_are_bounded_by_size(self):
+        batcher = MicroBatcher(max_batch_size=2, max_wait_ms=50, score_fn=self.fake_score)
+
+        async def run():
+            return await asyncio.gather(*[batcher.submit({"age": age}) for age in range(5)])
+
+        asyncio.run(run())
+        self.assertEqual(self.calls, [2, 2, 1])
+
+    def test_row_errors_only_fail_their_caller(self):
+        batcher = MicroBatcher(max_batch_size=10, max_wait_ms=50, score_fn=self.fake_score)
+
+        async def run():
+            return await asyncio.gather(
+                batcher.submit({"age": 30}),
+                batcher.submit({"age": 30, "geography": "Atlantis"}),
+                return_exceptions=True
+            )
+
+        good, bad = asyncio.run(run())
+        self.assertEqual(good[0], 0.3)
+        self.assertIsInstance(bad, ValueError)
+
+    def test_requests_on_separate_loops_and_threads(self):
+        batcher = MicroBatcher(max_batch_size=10, max_wait_ms=5, score_fn=self.fake_score)
+
+        # What WSGI does: every request runs asyncio.run() on its own loop, in its own thread
+        def request(age):
+            return asyncio.run(batcher.submit({"age": age}))[0]
+
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            results = list(executor.map(request, range(20)))
+
+        self.assertEqual(results, [age / 100 for age in range(20)])
+        self.assertEqual(sum(self.calls), 20)
+
+        # Sequential loops in one thread
+        self.assertEqual(asyncio.run(batcher.submit({"age": 50}))[0], 0.5)
+        self.assertEqual(asyncio.run(batcher.submit({"age": 60}))[0], 0.6)
+
+    def test_finished_loops_do_not_keep_workers(self):
+        batcher = MicroBatcher(max_batch_size=10, max_wait_ms=1, score_fn=self.fake_score)
+
+        for age in range(50):
+            asyncio.run(batcher.submit({"age": age}))
+
+        self.assertEqual(len(batcher._workers), 0)
+        self.assertEqual(len(self.calls), 50)
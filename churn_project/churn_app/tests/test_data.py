@@ -0,0 +1,43 @@
+from django.test import TestCase
+from ..models import CustomerChurn
+from ..data import iter_feature_blocks, load_feature_arrays
+import numpy as np
+
+
+class FeatureStreamingTest(TestCase):
+    def setUp(self):
+        for customer_id in range(1, 8):
+            CustomerChurn.objects.create(
+                customer_id=customer_id,
+                surname=f'Customer {customer_id}',
+                credit_score=600 + customer_id,
+                age=30 + customer_id,
+                balance=customer_id * 1000.5,
+                num_of_products=1,
+                has_cr_card=bool(customer_id % 2),
+                geography='France',
+                gender='Male',
+                exited=customer_id == 7
+            )
+        CustomerChurn.objects.filter(customer_id=3).update(credit_score=None, geography=None)
+
+    def test_blocks_are_bounded_by_chunk_size(self):
+        sizes = []
+        ids = []
+        for block in iter_feature_blocks(CustomerChurn.objects.order_by('customer_id'), chunk_size=3):
+            sizes.append(len(block))
+            ids.extend(block.customer_ids.tolist())
+            self.assertEqual(block.numeric.shape, (len(block), 8))
+        self.assertEqual(sizes, [3, 3, 1])
+        self.assertEqual(ids, list(range(1, 8)))
+
+    def test_null_columns_become_nan_and_none(self):
+        arrays = load_feature_arrays(CustomerChurn.objects.order_by('customer_id'), chunk_size=2,
+                                     extra_columns=['exited'])
+        self.assertEqual(len(arrays), 7)
+        self.assertTrue(np.isnan(arrays.numeric[2, 0]))
+        self.assertIsNone(arrays.geography[2])
+        self.assertTrue(np.isnan(arrays.numeric[0, 2]))  # tenure was never set
+        self.assertEqual(arrays.numeric[0, 3], 1000.5)
+        self.assertEqual(arrays.numeric[0, 5], 1.0)
+        self.assertEqual(arrays.extra['exited'].tolist(), [False] * 6 + [True])
@@ -0,0 +1,354 @@
+from django.test import SimpleTestCase, TestCase
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework.test import APIClient
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from ..forest import FlatForest, build_inference_model
+from ..preprocessing import CompiledPreprocessor
+from ..scoring import numerical_features, categorical_features, score_batch, score_customers, score_feature_block
+from ..streaming import iter_scored_rows, score_frame
+from types import SimpleNamespace
+from unittest import mock
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import tempfile
+import io
+import csv
+import json
+
+
+def build_test_components(n_samples=500, n_estimators=10, seed=0):
+    """Train a small model the same way train_churn does, on synthetic data"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "credit_score": rng.integers(350, 850, n_samples),
+        "age": rng.integers(18, 90, n_samples),
+        "tenure": rng.integers(0, 10, n_samples),
+        "balance": rng.uniform(0, 250000, n_samples).round(2),
+        "num_of_products": rng.integers(1, 4, n_samples),
+        "has_cr_card": rng.integers(0, 2, n_samples),
+        "is_active_member": rng.integers(0, 2, n_samples),
+        "estimated_salary": rng.uniform(10000, 200000, n_samples).round(2),
+        "geography": rng.choice(["France", "Germany", "Spain"], n_samples),
+        "gender": rng.choice(["Female", "Male"], n_samples),
+    })
+    y = ((df["age"] > 50) ^ (rng.random(n_samples) < 0.2)).astype(int)
+
+    le_geo = LabelEncoder()
+    le_gender = LabelEncoder()
+    df["geography"] = le_geo.fit_transform(df["geography"])
+    df["gender"] = le_gender.fit_transform(df["gender"])
+
+    X = df[numerical_features + categorical_features].astype(float)
+    scaler = StandardScaler()
+    X[numerical_features] = scaler.fit_transform(X[numerical_features])
+
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=seed)
+    model.fit(X, y)
+
+    components = {
+        'model': model,
+        'scaler': scaler,
+        'label_encoder_geo': le_geo,
+        'label_encoder_gender': le_gender,
+        'feature_importance': {},
+        'version': 'test',
+    }
+    components['preprocessor'] = CompiledPreprocessor.from_components(components)
+    return components
+
+
+def legacy_features(components, data):
+    """The single-row pandas path /predict/ originally used"""
+    df = pd.DataFrame([{
+        "credit_score": float(data.get("credit_score", 0)),
+        "age": float(data.get("age", 0)),
+        "tenure": float(data.get("tenure", 0)),
+        "balance": float(data.get("balance", 0)),
+        "num_of_products": float(data.get("num_of_products", 1)),
+        "has_cr_card": float(data.get("has_cr_card", 0)),
+        "is_active_member": float(data.get("is_active_member", 0)),
+        "estimated_salary": float(data.get("estimated_salary", 0)),
+        "geography": data.get("geography", "France"),
+        "gender": data.get("gender", "Female")
+    }])
+    df["geography"] = components['label_encoder_geo'].transform(df["geography"])
+    df["gender"] = components['label_encoder_gender'].transform(df["gender"])
+    df[numerical_features] = components['scaler'].transform(df[numerical_features])
+    return df[numerical_features + categorical_features].values
+
+
+SAMPLE_CUSTOMERS = [
+    {"credit_score": 600, "geography": "France", "gender": "Female", "age": 40, "tenure": 3,
+     "balance": 60000, "num_of_products": 2, "has_cr_card": 1, "is_active_member": 1,
+     "estimated_salary": 100000},
+    {"credit_score": 720.0, "geography": "Germany", "gender": "Male", "age": 61, "tenure": 7,
+     "balance": 125000.55, "num_of_products": 1, "has_cr_card": 0, "is_active_member": 0,
+     "estimated_salary": 45000.1},
+    {"geography": "Spain", "age": "35"},
+]
+
+
+class BatchScoringTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.components = build_test_components()
+
+    def test_matches_single_row_predictions(self):
+        probabilities, errors = score_batch(self.components, SAMPLE_CUSTOMERS)
+
+        self.assertEqual(errors, {})
+        for data, probability in zip(SAMPLE_CUSTOMERS, probabilities):
+            expected = self.components['model'].predict_proba(
+                legacy_features(self.components, data)
+            )[0][1]
+            self.assertEqual(probability, expected)
+
+    def test_errors_are_reported_per_row(self):
+        rows = [
+            SAMPLE_CUSTOMERS[0],
+            {**SAMPLE_CUSTOMERS[0], "geography": "Atlantis"},
+            {**SAMPLE_CUSTOMERS[0], "age": "forty"},
+            "not a customer",
+            SAMPLE_CUSTOMERS[1],
+        ]
+        probabilities, errors = score_batch(self.components, rows)
+
+        self.assertEqual(sorted(errors), [1, 2, 3])
+        self.assertIn("geography", errors[1])
+        self.assertFalse(np.isnan(probabilities[0]))
+        self.assertFalse(np.isnan(probabilities[4]))
+        self.assertTrue(np.isnan(probabilities[1]))
+
+
+    def test_customer_chunk_matches_single_rows(self):
+        customers = [
+            SimpleNamespace(credit_score=600, age=40, tenure=3, balance=60000, num_of_products=2,
+                            has_cr_card=True, is_active_member=True, estimated_salary=100000,
+                            geography="France", gender="Female"),
+            SimpleNamespace(credit_score=None, age=None, tenure=None, balance=None, num_of_products=None,
+                            has_cr_card=False, is_active_member=False, estimated_salary=None,
+                            geography=None, gender="Male"),
+            SimpleNamespace(credit_score=720, age=61, tenure=7, balance=125000.55, num_of_products=1,
+                            has_cr_card=False, is_active_member=False, estimated_salary=45000.1,
+                            geography="Germany", gender="Male"),
+        ]
+        probabilities, errors = score_customers(self.components, customers)
+
+        # Missing geography falls back to "Unknown", which the encoder rejects
+        self.assertEqual(list(errors), [1])
+        self.assertTrue(np.isnan(probabilities[1]))
+        expected, _ = score_batch(self.components, [SAMPLE_CUSTOMERS[0], SAMPLE_CUSTOMERS[1]])
+        self.assertEqual(probabilities[0], expected[0])
+        self.assertEqual(probabilities[2], expected[1])
+
+    def test_feature_block_matches_customer_chunk(self):
+        customers = [
+            SimpleNamespace(credit_score=600, age=40, tenure=3, balance=60000, num_of_products=2,
+                            has_cr_card=True, is_active_member=True, estimated_salary=100000,
+                            geography="France", gender="Female"),
+            SimpleNamespace(credit_score=None, age=35, tenure=None, balance=None, num_of_products=0,
+                            has_cr_card=False, is_active_member=True, estimated_salary=None,
+                            geography="Spain", gender="Male"),
+            SimpleNamespace(credit_score=700, age=50, tenure=1, balance=0, num_of_products=1,
+                            has_cr_card=False, is_active_member=False, estimated_salary=5000,
+                            geography="Atlantis", gender=None),
+        ]
+        numeric = np.array([
+            [np.nan if getattr(c, name) is None else float(getattr(c, name)) for name in numerical_features]
+            for c in customers
+        ])
+        geography = np.array([c.geography for c in customers], dtype=object)
+        gender = np.array([c.gender for c in customers], dtype=object)
+
+        probabilities, errors = score_feature_block(self.components, numeric, geography, gender)
+        expected, expected_errors = score_customers(self.components, customers)
+
+        self.assertEqual(errors, expected_errors)
+        np.testing.assert_array_equal(probabilities, expected)
+
+class CompiledPreprocessorTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.components = build_test_components()
+        cls.preprocessor = cls.components['preprocessor']
+
+    def test_features_are_bit_identical_to_pandas_path(self):
+        for data in SAMPLE_CUSTOMERS:
+            expected = legacy_features(self.components, data)
+            actual = self.preprocessor.transform(data)
+            self.assertEqual(actual.shape, expected.shape)
+            self.assertTrue(np.array_equal(actual, expected))
+
+    def test_transform_values_matches_transform(self):
+        data = SAMPLE_CUSTOMERS[1]
+        numeric = [float(data[name]) for name in numerical_features]
+        actual = self.preprocessor.transform_values(numeric, data["geography"], data["gender"])
+        self.assertTrue(np.array_equal(actual, self.preprocessor.transform(data)))
+
+    def test_reuses_preallocated_buffer(self):
+        buffer = np.empty((1, self.preprocessor.n_features))
+        result = self.preprocessor.transform(SAMPLE_CUSTOMERS[0], out=buffer)
+        self.assertIs(result, buffer)
+
+    def test_unknown_category_raises(self):
+        with self.assertRaises(ValueError):
+            self.preprocessor.transform({**SAMPLE_CUSTOMERS[0], "gender": "Unknown"})
+
+
+class FlatForestTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.components = build_test_components(n_estimators=25)
+        cls.model = cls.components['model']
+        cls.flat = FlatForest.from_sklearn(cls.model)
+
+    def test_batch_matches_sklearn(self):
+        rng = np.random.default_rng(1)
+        X = rng.standard_normal((200, len(numerical_features) + len(categorical_features)))
+        np.testing.assert_allclose(
+            self.flat.predict_proba(X), self.model.predict_proba(X), rtol=0, atol=1e-12
+        )
+        np.testing.assert_array_equal(self.flat.predict(X), self.model.predict(X))
+
+    def test_single_row_matches_sklearn(self):
+        for data in SAMPLE_CUSTOMERS:
+            row = self.components['preprocessor'].transform(data)
+            np.testing.assert_allclose(
+                self.flat.predict_proba(row), self.model.predict_proba(row), rtol=0, atol=1e-12
+            )
+
+    def test_engine_selection(self):
+        self.assertIs(build_inference_model(self.model, 'sklearn'), self.model)
+        self.assertIsInstance(build_inference_model(self.model, 'flat'), FlatForest)
+        with self.assertRaises(ValueError):
+            build_inference_model(self.model, 'gpu')
+
+    def test_memory_mapped_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = self.flat.save(Path(tmp_dir) / 'forest-test')
+            loaded = FlatForest.load(path, mmap_mode='r')
+
+            self.assertIsInstance(loaded.threshold, np.memmap)
+            X = np.random.default_rng(2).standard_normal((50, 10))
+            np.testing.assert_array_equal(loaded.predict_proba(X), self.flat.predict_proba(X))
+
+
+class StreamingScoringTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.components = build_test_components()
+
+    def test_csv_chunks_match_batch_scoring(self):
+        csv_text = (
+            "RowNumber,CustomerId,Surname,CreditScore,Geography,Gender,Age,Tenure,Balance,"
+            "NumOfProducts,HasCrCard,IsActiveMember,EstimatedSalary,Exited\n"
+            "1,15634602,Hargrave,619,France,Female,42,2,0,1,1,1,101348.88,1\n"
+            "2,15647311,Hill,608,Spain,Female,41,1,83807.86,1,0,1,112542.58,0\n"
+            "3,15619304,Onio,502,Atlantis,Female,42,8,159660.8,3,1,0,113931.57,1\n"
+        )
+        results = list(iter_scored_rows(
+            self.components, io.StringIO(csv_text), fmt='csv', chunk_size=2
+        ))
+
+        self.assertEqual([r['row'] for r in results], [0, 1, 2])
+        self.assertEqual(results[0]['customer_id'], 15634602)
+        self.assertIn('Atlantis', results[2]['error'])
+
+        expected, _ = score_batch(self.components, [
+            {"credit_score": 619, "geography": "France", "gender": "Female", "age": 42, "tenure": 2,
+             "balance": 0, "num_of_products": 1, "has_cr_card": 1, "is_active_member": 1,
+             "estimated_salary": 101348.88},
+        ])
+        self.assertEqual(results[0]['churn_probability'], expected[0])
+
+    def test_missing_numeric_values_take_defaults(self):
+        df = pd.DataFrame({
+            "age": pd.array([40, None], dtype="Int64"),
+            "balance": pd.Series([1000.0, None], dtype="float64"),
+            "geography": ["France", "Spain"],
+        })
+        probabilities, errors = score_frame(self.components, df)
+
+        self.assertEqual(errors, {})
+        expected, _ = score_batch(self.components, [
+            {"age": 40, "balance": 1000.0, "geography": "France"},
+            {"geography": "Spain"},
+        ])
+        np.testing.assert_allclose(probabilities, expected)
+
+    def test_ndjson_reports_bad_lines(self):
+        ndjson = '{"age": 40, "geography": "Germany"}\nnot json\n{"age": 61}\n'
+        results = list(iter_scored_rows(self.components, io.StringIO(ndjson), fmt='ndjson'))
+
+        self.assertEqual(len(results), 3)
+        self.assertIn('churn_probability', results[0])
+        self.assertIn('Invalid JSON', results[1]['error'])
+        self.assertIn('churn_probability', results[2])
+
+
+class StreamingEndpointTest(TestCase):
+    csv_text = (
+        "CustomerId,CreditScore,Geography,Gender,Age,Tenure,Balance,NumOfProducts,HasCrCard,IsActiveMember,EstimatedSalary\n"
+        "15634602,619,France,Female,42,2,0,1,1,1,101348.88\n"
+        "15619304,502,Atlantis,Female,42,8,159660.8,3,1,0,113931.57\n"
+    )
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.components = build_test_components()
+
+    def setUp(self):
+        patcher = mock.patch('churn_app.views.get_model_components', return_value=self.components)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='adminpass123'
+        ))
+        self.url = reverse('predict_churn_stream')
+
+    def streamed(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['X-Model-Version'], self.components['version'])
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv_upload_streams_ndjson(self):
+        upload = SimpleUploadedFile('customers.csv', self.csv_text.encode('utf-8'), content_type='text/csv')
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self.streamed(response).splitlines()]
+        self.assertEqual([row['customer_id'] for row in rows], [15634602, 15619304])
+        expected, _ = score_batch(self.components, [
+            {"credit_score": 619, "geography": "France", "gender": "Female", "age": 42, "tenure": 2,
+             "balance": 0, "num_of_products": 1, "has_cr_card": 1, "is_active_member": 1,
+             "estimated_salary": 101348.88},
+        ])
+        self.assertEqual(rows[0]['churn_probability'], expected[0])
+        self.assertIn('Atlantis', rows[1]['error'])
+
+    def test_ndjson_body_streams_csv(self):
+        body = '{"customer_id": 7, "age": 40, "geography": "Germany"}\nnot json\n'
+        response = self.client.post(f"{self.url}?output=csv&chunk_size=1", data=body,
+                                    content_type='application/x-ndjson')
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(self.streamed(response))))
+        self.assertEqual([row['row'] for row in rows], ['0', '1'])
+        self.assertEqual(rows[0]['customer_id'], '7')
+        self.assertGreaterEqual(float(rows[0]['churn_probability']), 0.0)
+        self.assertIn('Invalid JSON', rows[1]['error'])
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.post(f"{self.url}?output=xml", data=self.csv_text, content_type='text/csv')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,118 @@
+from django.test import SimpleTestCase
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from ..model_registry import ModelRegistry
+from ..forest import FlatForest
+from ..warmup import warm_up_model, get_readiness
+from .test_inference import build_test_components
+from pathlib import Path
+import tempfile
+import numpy as np
+import joblib
+import os
+
+
+class ModelRegistryTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.models_dir = Path(self.tmp_dir.name)
+        self.registry = ModelRegistry(models_dir=self.models_dir, check_interval=0)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_artifact(self, model, version=None):
+        artifact = {
+            'model': model,
+            'scaler': StandardScaler().fit(np.arange(16, dtype=float).reshape(2, 8)),
+            'label_encoder_geo': LabelEncoder().fit(['France', 'Germany', 'Spain']),
+            'label_encoder_gender': LabelEncoder().fit(['Female', 'Male']),
+        }
+        if version:
+            artifact['version'] = version
+        path = self.models_dir / 'latest_model.joblib'
+        joblib.dump(artifact, path)
+        return path
+
+    def test_missing_artifact_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            self.registry.get()
+        self.assertFalse(self.registry.is_loaded)
+
+    def test_components_are_kept_in_memory(self):
+        self.write_artifact('model-a', version='v1')
+
+        first = self.registry.get()
+        second = self.registry.get()
+
+        self.assertIs(first, second)
+        self.assertEqual(first['version'], 'v1')
+        self.assertEqual(self.registry.version, 'v1')
+
+    def test_reloads_when_artifact_changes(self):
+        path = self.write_artifact('model-a', version='v1')
+        self.registry.get()
+
+        self.write_artifact('model-b', version='v2')
+        # Make sure the mtime moves even on coarse filesystem clocks
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        components = self.registry.get()
+        self.assertEqual(components['model'], 'model-b')
+        self.assertEqual(components['version'], 'v2')
+
+    def test_version_falls_back_to_content_hash(self):
+        self.write_artifact('model-a')
+        version = self.registry.get()['version']
+        self.assertEqual(len(version), 12)
+
+
+class WarmupTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(models_dir=Path(self.tmp_dir.name), check_interval=0)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_missing_model_is_not_ready(self):
+        self.assertFalse(warm_up_model(self.registry))
+
+        readiness = get_readiness(self.registry)
+        self.assertFalse(readiness['ready'])
+        self.assertIn('No trained model', readiness['error'])
+
+    def test_warm_up_loads_and_scores(self):
+        components = build_test_components()
+        joblib.dump({
+            'model': components['model'],
+            'scaler': components['scaler'],
+            'label_encoder_geo': components['label_encoder_geo'],
+            'label_encoder_gender': components['label_encoder_gender'],
+            'version': 'warm',
+        }, Path(self.tmp_dir.name) / 'latest_model.joblib')
+
+        self.assertTrue(warm_up_model(self.registry))
+
+        readiness = get_readiness(self.registry)
+        self.assertTrue(readiness['ready'])
+        self.assertTrue(readiness['warmed_up'])
+        self.assertEqual(readiness['model_version'], 'warm')
+
+    def test_readiness_reports_engine_of_loaded_model(self):
+        components = build_test_components()
+        models_dir = Path(self.tmp_dir.name)
+        FlatForest.from_sklearn(components['model']).save(models_dir / 'forest_warm')
+        joblib.dump({
+            'scaler': components['scaler'],
+            'label_encoder_geo': components['label_encoder_geo'],
+            'label_encoder_gender': components['label_encoder_gender'],
+            'version': 'warm',
+            'flat_forest_dir': 'forest_warm',
+        }, models_dir / 'latest_components.joblib')
+
+        # Memory-mapping forces the flat engine whatever INFERENCE_ENGINE says
+        registry = ModelRegistry(models_dir=models_dir, check_interval=0, engine='sklearn', mmap=True)
+        self.assertIsNone(get_readiness(registry)['inference_engine'])
+        self.assertTrue(warm_up_model(registry))
+        self.assertEqual(get_readiness(registry)['inference_engine'], 'flat')
@@ -0,0 +1,254 @@
+from unittest import mock
+from django.test import TestCase, override_settings
+from ..models import CustomerChurn, ChurnRiskHistory, CustomerRiskState, AlertHistory, MonitoringRun, DailyRiskTrend
+from ..bulk_writes import BufferedWriter
+from ..rate_limit import LocalTokenBucket
+from ..telemetry import SampledLogger, StageTimer
+from ..trends import rebuild_daily_trend, recent_trend, BUCKETS
+from ..risk_queries import latest_risk_summary
+from django.utils import timezone
+from ..tasks import (
+    monitor_customer_churn, monitor_customer_shard, finalize_monitoring, shard_ranges, customers_to_rescore, deliver_alerts,
+)
+from .test_inference import build_test_components, SAMPLE_CUSTOMERS
+
+
+@override_settings(MONITORING={'CHUNK_SIZE': 2})
+class MonitorCustomerChurnTest(TestCase):
+    def setUp(self):
+        self.components = build_test_components()
+        for customer_id in range(1, 6):
+            CustomerChurn.objects.create(customer_id=customer_id, surname=f'Customer {customer_id}',
+                                         **SAMPLE_CUSTOMERS[customer_id % 2])
+
+        patches = [
+            mock.patch('churn_app.tasks.get_model_components', return_value=self.components),
+            mock.patch('churn_app.utils.validate_webhook_url', return_value=(True, None)),
+            mock.patch('churn_app.utils.send_discord_message', return_value=(True, None)),
+            mock.patch('churn_app.utils.get_rate_limiter', return_value=LocalTokenBucket(rate=1000, capacity=1000)),
+            mock.patch('churn_app.tasks.send_monitoring_summary', return_value=True),
+            # Alert messages are delivered in-process instead of on a worker
+            mock.patch.object(deliver_alerts, 'delay', side_effect=deliver_alerts),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_monitor_keeps_one_state_row_per_customer(self):
+        monitor_customer_churn()
+        first_run = dict(CustomerRiskState.objects.values_list('customer_id', 'churn_probability'))
+        self.assertEqual(len(first_run), 5)
+        self.assertFalse(CustomerRiskState.objects.filter(previous_probability__isnull=False).exists())
+
+        monitor_customer_churn(full_sweep=True)
+        self.assertEqual(CustomerRiskState.objects.count(), 5)
+        self.assertEqual(ChurnRiskHistory.objects.count(), 10)
+
+        for state in CustomerRiskState.objects.all():
+            self.assertEqual(state.previous_probability, first_run[state.customer_id])
+            self.assertEqual(state.model_version, self.components['version'])
+            latest = ChurnRiskHistory.objects.filter(customer_id=state.customer_id).order_by('-timestamp', '-id').first()
+            self.assertEqual(latest.churn_probability, state.churn_probability)
+            self.assertEqual(latest.previous_probability, state.previous_probability)
+
+    def test_incremental_run_rescores_changed_customers_only(self):
+        monitor_customer_churn()
+        self.assertEqual(ChurnRiskHistory.objects.count(), 5)
+
+        # Nothing changed: nothing is rescored
+        monitor_customer_churn()
+        self.assertEqual(ChurnRiskHistory.objects.count(), 5)
+
+        customer = CustomerChurn.objects.get(customer_id=3)
+        customer.age = 70
+        customer.save()
+        CustomerChurn.objects.create(customer_id=6, surname='Customer 6', **SAMPLE_CUSTOMERS[0])
+
+        monitor_customer_churn()
+        self.assertEqual(ChurnRiskHistory.objects.count(), 7)
+        self.assertEqual(
+            sorted(ChurnRiskHistory.objects.filter(previous_probability__isnull=False).values_list('customer_id', flat=True)),
+            [3]
+        )
+
+        # A new model version invalidates every stored score
+        self.components['version'] = 'test-v2'
+        monitor_customer_churn()
+        self.assertEqual(ChurnRiskHistory.objects.count(), 13)
+        self.assertEqual(CustomerRiskState.objects.exclude(model_version='test-v2').count(), 0)
+
+    def test_run_is_recorded_with_stage_timings(self):
+        monitor_customer_churn()
+
+        run = MonitoringRun.objects.get()
+        self.assertEqual(run.status, 'SUCCESS')
+        self.assertEqual(run.mode, 'incremental')
+        self.assertEqual(run.model_version, self.components['version'])
+        self.assertEqual(run.customers_scored, 5)
+        self.assertEqual(run.error_count, 0)
+        self.assertEqual(run.high_risk_count, CustomerRiskState.objects.filter(is_high_risk=True).count())
+        self.assertIsNotNone(run.finished_at)
+        for stage in ('fetch', 'preprocess', 'inference', 'write', 'alert'):
+            self.assertGreaterEqual(getattr(run, f'{stage}_seconds'), 0)
+        self.assertGreater(run.fetch_seconds + run.inference_seconds + run.write_seconds, 0)
+
+        alerted = AlertHistory.objects.filter(customer__isnull=False)
+        self.assertEqual(run.alerts_delivered, alerted.filter(was_sent=True).count())
+        self.assertEqual(run.alerts_failed, 0)
+        self.assertEqual(alerted.count(), CustomerRiskState.objects.filter(is_high_risk=True).count())
+
+    def test_runs_maintain_daily_trend(self):
+        monitor_customer_churn()
+        monitor_customer_churn(full_sweep=True)
+
+        trend = DailyRiskTrend.objects.get(date=timezone.localdate())
+        self.assertEqual(trend.sample_count, 10)
+        self.assertEqual(trend.high_risk_count, ChurnRiskHistory.objects.filter(is_high_risk=True).count())
+        self.assertEqual(sum(getattr(trend, f'{bucket}_count') for bucket in BUCKETS), 10)
+        probabilities = list(ChurnRiskHistory.objects.values_list('churn_probability', flat=True))
+        self.assertAlmostEqual(trend.avg_risk, sum(probabilities) / len(probabilities))
+
+        # Recomputing from history gives the same row
+        counts = {field: getattr(trend, field) for field in ('sample_count', 'high_risk_count', 'very_high_count', 'very_low_count')}
+        rebuild_daily_trend(days=1)
+        trend.refresh_from_db()
+        self.assertEqual(counts, {field: getattr(trend, field) for field in counts})
+
+        day = recent_trend(days=30)[-1]
+        self.assertEqual(day['date'], timezone.localdate())
+        self.assertEqual(sum(day['distribution'].values()), 10)
+
+    def test_latest_risk_summary_uses_latest_score_per_customer(self):
+        monitor_customer_churn()
+        customer = CustomerChurn.objects.get(customer_id=2)
+        customer.age = 80
+        customer.save()
+        monitor_customer_churn()
+
+        since = timezone.now() - timezone.timedelta(days=7)
+        summary = latest_risk_summary(since, risk_increase_threshold=-1000.0, limit=10)
+        states = CustomerRiskState.objects.all()
+
+        self.assertEqual(sum(summary['risk_distribution'].values()), 5)
+        self.assertEqual(
+            [record['customer_id'] for record in summary['high_risk_customers']],
+            list(states.filter(is_high_risk=True).order_by('-churn_probability').values_list('customer_id', flat=True))
+        )
+        # Only customer 2 has a previous score to change from
+        self.assertEqual([record['customer_id'] for record in summary['significant_increases']], [2])
+        self.assertEqual(summary['significant_increases'][0]['surname'], 'Customer 2')
+        self.assertIsNotNone(summary['significant_increases'][0]['scored_at'].tzinfo)
+
+        # The portable path returns the same summary
+        with mock.patch('churn_app.risk_queries.connection', mock.Mock(vendor='sqlite')):
+            self.assertEqual(latest_risk_summary(since, risk_increase_threshold=-1000.0, limit=10), summary)
+
+    def test_run_without_model_is_recorded_as_failed(self):
+        with mock.patch('churn_app.tasks.get_model_components', return_value=None):
+            monitor_customer_churn()
+
+        run = MonitoringRun.objects.get()
+        self.assertEqual(run.status, 'FAILED')
+        self.assertIn("Model components not available", run.error_message)
+
+    def test_shard_ranges_cover_every_customer_once(self):
+        customers = customers_to_rescore('test', full_sweep=True)
+        self.assertEqual(shard_ranges(customers, 2), [(1, 2), (3, 4), (5, 5)])
+        self.assertEqual(shard_ranges(customers, 10), [(1, 5)])
+
+    @override_settings(MONITORING={'CHUNK_SIZE': 2, 'SHARD_SIZE': 2})
+    def test_sharded_run_dispatches_chord(self):
+        with mock.patch('churn_app.tasks.chord') as chord:
+            result = monitor_customer_churn()
+
+        self.assertIn("3 shards", result)
+        header = list(chord.call_args[0][0].tasks)
+        self.assertEqual([task.args for task in header], [(1, 2), (3, 4), (5, 5)])
+        self.assertFalse(ChurnRiskHistory.objects.exists())
+
+        # Run the shards and the callback the way the chord would
+        callback = chord.return_value.call_args[0][0]
+        run = MonitoringRun.objects.get()
+        self.assertEqual(callback.kwargs, {'mode': 'incremental', 'run_id': run.pk})
+        shard_stats = [monitor_customer_shard(*task.args, **task.kwargs) for task in header]
+        result = finalize_monitoring(shard_stats, **callback.kwargs)
+        self.assertIn("Checked: 5", result)
+        self.assertEqual(CustomerRiskState.objects.count(), 5)
+
+        run.refresh_from_db()
+        self.assertEqual(run.status, 'SUCCESS')
+        self.assertEqual(run.shard_count, 3)
+        self.assertEqual(run.customers_scored, 5)
+
+    def test_retried_shard_skips_customers_scored_in_this_run(self):
+        started_at = timezone.now().isoformat()
+        monitor_customer_shard(1, 3, full_sweep=True, started_at=started_at)
+        stats = monitor_customer_shard(1, 5, full_sweep=True, started_at=started_at)
+
+        self.assertEqual(stats['total_checked'], 2)
+        self.assertEqual(ChurnRiskHistory.objects.count(), 5)
+
+
+class TelemetryTest(TestCase):
+    def test_stage_timer_charges_iteration_to_stage(self):
+        ticks = iter(range(100))
+        with mock.patch('churn_app.telemetry.time.perf_counter', side_effect=lambda: next(ticks)):
+            timer = StageTimer()
+            items = list(timer.timed_iter([1, 2, 3], 'fetch'))
+            with timer.stage('write'):
+                pass
+
+        self.assertEqual(items, [1, 2, 3])
+        stats = timer.as_stats()
+        self.assertEqual(stats['fetch_seconds'], 4)  # three items plus the exhausted call
+        self.assertEqual(stats['write_seconds'], 1)
+        self.assertEqual(stats['inference_seconds'], 0)
+
+    def test_sampled_logger_logs_first_events_then_a_sample(self):
+        draws = iter([0.5, 0.001, 0.9])
+        sampled = SampledLogger(rate=0.01, always_first=2, rng=lambda: next(draws))
+        with self.assertLogs('churn_app.monitoring', level='INFO') as logs:
+            logged = [sampled.log('customer_alert_queued', customer_id=i) for i in range(5)]
+
+        self.assertEqual(logged, [True, True, False, True, False])
+        self.assertEqual(len(logs.records), 3)
+        self.assertIn('"occurrence": 4', logs.records[-1].getMessage())
+        self.assertIn('"sample_rate": 0.01', logs.records[-1].getMessage())
+
+
+class BufferedWriterTest(TestCase):
+    def setUp(self):
+        self.customer = CustomerChurn.objects.create(customer_id=1, surname='Test Customer')
+
+    def write_history(self, use_copy):
+        writer = BufferedWriter(ChurnRiskHistory, batch_size=2, use_copy=use_copy, verbose=False)
+        for i in range(5):
+            writer.add(ChurnRiskHistory(customer=self.customer, churn_probability=i / 10, model_version='test'))
+
+        # Two full batches are flushed as soon as they fill up
+        self.assertEqual(writer.total_written, 4)
+        self.assertEqual(writer.count_pending(), 1)
+        self.assertEqual(writer.flush(), 1)
+        self.assertEqual(writer.flush(), 0)
+        self.assertEqual(writer.flush_count, 3)
+
+        rows = ChurnRiskHistory.objects.filter(customer=self.customer)
+        self.assertEqual(sorted(rows.values_list('churn_probability', flat=True)), [0.0, 0.1, 0.2, 0.3, 0.4])
+        self.assertFalse(rows.filter(timestamp__isnull=True).exists())
+
+    def test_bulk_create_path(self):
+        self.write_history(use_copy=False)
+
+    def test_copy_path(self):
+        self.write_history(use_copy=True)
+
+    def test_copy_json_and_null_columns(self):
+        writer = BufferedWriter(AlertHistory, batch_size=10, use_copy=True, verbose=False)
+        writer.add(AlertHistory(customer=None, alert_type='SUMMARY', message={'text': 'a,"quoted" \\N'}, was_sent=True))
+        writer.flush()
+
+        record = AlertHistory.objects.get()
+        self.assertIsNone(record.customer)
+        self.assertIsNone(record.error_message)
+        self.assertEqual(record.message, {'text': 'a,"quoted" \\N'})
+        self.assertTrue(record.was_sent)
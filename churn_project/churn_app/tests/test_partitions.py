@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, SimpleTestCase
+from django.utils import timezone
+from ..models import CustomerChurn, ChurnRiskHistory
+from ..partitions import (
+    add_months, month_bounds, partition_name, is_partitioned, list_partitions, create_partition, month_start,
+)
+from ..retention import compact_history
+
+
+class MonthHelpersTest(SimpleTestCase):
+    def test_add_months_wraps_years(self):
+        self.assertEqual(add_months(date(2024, 11, 1), 3), date(2025, 2, 1))
+        self.assertEqual(add_months(date(2024, 1, 1), -1), date(2023, 12, 1))
+
+    def test_bounds_and_names(self):
+        start, end = month_bounds(date(2024, 12, 1))
+        self.assertEqual((start.year, start.month, end.year, end.month), (2024, 12, 2025, 1))
+        self.assertEqual(partition_name(date(2024, 2, 1)), 'churn_app_churnriskhistory_p2024_02')
+
+
+class PartitionedHistoryTest(TestCase):
+    def setUp(self):
+        if not is_partitioned(connection):
+            self.skipTest("Risk history is only partitioned on PostgreSQL")
+        self.customer = CustomerChurn.objects.create(customer_id=1, surname='Test Customer')
+
+    def test_rows_are_routed_and_old_months_created_from_default(self):
+        far_past = add_months(month_start(timezone.now()), -60)
+        record = ChurnRiskHistory.objects.create(customer=self.customer, churn_probability=0.5)
+        ChurnRiskHistory.objects.filter(pk=record.pk).update(timestamp=month_bounds(far_past)[0] + timedelta(days=3))
+
+        # The row sits in the DEFAULT partition until its month is created
+        self.assertNotIn(far_past, list_partitions())
+        self.assertTrue(create_partition(far_past))
+        self.assertFalse(create_partition(far_past))
+        self.assertIn(far_past, list_partitions())
+        self.assertEqual(ChurnRiskHistory.objects.get(pk=record.pk).churn_probability, 0.5)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {partition_name(far_past)}")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_create_command_covers_months_ahead(self):
+        call_command('create_risk_history_partitions', months_ahead=2, stdout=StringIO())
+        current = month_start(timezone.now())
+        for offset in range(3):
+            self.assertIn(add_months(current, offset), list_partitions())
+
+    def drop_partitions(self):
+        # Fire the deferred foreign key checks of this test's inserts first:
+        # PostgreSQL refuses to drop a table with pending trigger events
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        call_command('drop_risk_history_partitions', stdout=StringIO())
+
+    def test_drop_command_keeps_uncompacted_months(self):
+        old_month = add_months(month_start(timezone.now()), -24)
+        create_partition(old_month)
+        record = ChurnRiskHistory.objects.create(customer=self.customer, churn_probability=0.5)
+        ChurnRiskHistory.objects.filter(pk=record.pk).update(timestamp=month_bounds(old_month)[0] + timedelta(days=1))
+
+        self.drop_partitions()
+        self.assertIn(old_month, list_partitions())
+
+        compact_history(now=timezone.now())
+        self.drop_partitions()
+        self.assertNotIn(old_month, list_partitions())
+        self.assertFalse(ChurnRiskHistory.objects.exists())
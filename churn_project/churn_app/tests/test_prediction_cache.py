@@ -0,0 +1,46 @@
+from django.test import SimpleTestCase
+from ..prediction_cache import generate_cache_key, LocalLRUCache
+
+
+class PredictionCacheKeyTest(SimpleTestCase):
+    payload = {
+        "credit_score": 600,
+        "geography": "France",
+        "gender": "Female",
+        "age": 40,
+        "tenure": 3,
+        "balance": 60000,
+        "num_of_products": 2,
+        "has_cr_card": 1,
+        "is_active_member": 1,
+        "estimated_salary": 100000
+    }
+
+    def test_equivalent_payloads_share_a_key(self):
+        key = generate_cache_key(self.payload, 'v1')
+        self.assertEqual(key, generate_cache_key({**self.payload, "age": 40.0}, 'v1'))
+        self.assertEqual(key, generate_cache_key({**self.payload, "note": "ignored"}, 'v1'))
+
+    def test_omitted_defaults_share_a_key(self):
+        explicit = {"geography": "France", "gender": "Female", "num_of_products": 1}
+        self.assertEqual(generate_cache_key(explicit, 'v1'), generate_cache_key({}, 'v1'))
+
+    def test_model_version_changes_the_key(self):
+        self.assertNotEqual(
+            generate_cache_key(self.payload, 'v1'),
+            generate_cache_key(self.payload, 'v2')
+        )
+
+
+class LocalLRUCacheTest(SimpleTestCase):
+    def test_evicts_least_recently_used(self):
+        lru = LocalLRUCache(maxsize=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('c'), 3)
+        self.assertEqual(len(lru), 2)
@@ -0,0 +1,77 @@
+from django.test import SimpleTestCase
+from ..rate_limit import LocalTokenBucket, RedisTokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class LocalTokenBucketTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        # 30 per minute with a burst of 5
+        self.bucket = LocalTokenBucket(rate=0.5, capacity=5, sleep=self.clock.sleep, clock=self.clock)
+
+    def test_burst_then_refill(self):
+        self.assertTrue(all(self.bucket.acquire() for _ in range(5)))
+        self.assertFalse(self.bucket.acquire())
+
+        self.clock.now += 2
+        self.assertTrue(self.bucket.acquire())
+        self.assertFalse(self.bucket.acquire())
+
+        # Never refills beyond capacity
+        self.clock.now += 3600
+        self.assertTrue(all(self.bucket.acquire() for _ in range(5)))
+        self.assertFalse(self.bucket.acquire())
+
+    def test_blocking_acquire_waits_for_a_token(self):
+        for _ in range(5):
+            self.bucket.acquire()
+
+        self.assertTrue(self.bucket.acquire(blocking=True))
+        self.assertEqual(self.clock.sleeps, [2.0])
+
+    def test_blocking_acquire_gives_up_after_timeout(self):
+        for _ in range(5):
+            self.bucket.acquire()
+
+        self.assertFalse(self.bucket.acquire(blocking=True, timeout=1))
+        self.assertEqual(self.clock.sleeps, [])
+
+
+class RedisTokenBucketTest(SimpleTestCase):
+    def test_script_result_is_parsed(self):
+        calls = []
+
+        class Connection:
+            def register_script(self, script):
+                def run(keys, args):
+                    calls.append((keys, args))
+                    return [0, b'1.5']
+                return run
+
+        bucket = RedisTokenBucket('rate_limit:test', rate=0.5, capacity=5, connection=Connection())
+        self.assertEqual(bucket.try_acquire(), (False, 1.5))
+        self.assertEqual(calls, [(['rate_limit:test'], [0.5, 5.0, 1])])
+
+    def test_falls_back_to_local_bucket_when_redis_fails(self):
+        class BrokenConnection:
+            def register_script(self, script):
+                raise ConnectionError("redis is down")
+
+        clock = FakeClock()
+        bucket = RedisTokenBucket('rate_limit:test', rate=0.5, capacity=2, connection=BrokenConnection(),
+                                  sleep=clock.sleep, clock=clock)
+        self.assertTrue(bucket.acquire())
+        self.assertTrue(bucket.acquire())
+        self.assertFalse(bucket.acquire())
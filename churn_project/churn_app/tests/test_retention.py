@@ -0,0 +1,119 @@
+from datetime import datetime, time, timedelta
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from ..models import CustomerChurn, ChurnRiskHistory, ChurnRiskDailyRollup
+from ..retention import compact_history, compaction_cutoff, expire_rollups, has_uncompacted_rows
+from ..trends import daily_risk_trend
+
+
+@override_settings(RISK_HISTORY={'RAW_RETENTION_DAYS': 7, 'ROLLUP_RETENTION_DAYS': 365, 'COMPACTION_BATCH_SIZE': 2})
+class RiskHistoryCompactionTest(TestCase):
+    def setUp(self):
+        # Plain-table mode: compacted raw rows are deleted
+        patcher = mock.patch('churn_app.retention.is_partitioned', return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.now = timezone.now()
+        self.old_day = timezone.localdate(self.now) - timedelta(days=10)
+        for customer_id in range(1, 4):
+            CustomerChurn.objects.create(customer_id=customer_id, surname=f'Customer {customer_id}')
+
+    def add_history(self, customer_id, timestamp, probability, is_high_risk=False):
+        record = ChurnRiskHistory.objects.create(customer_id=customer_id, churn_probability=probability,
+                                                 is_high_risk=is_high_risk, model_version='test')
+        # timestamp is auto_now_add, so backdate it afterwards
+        ChurnRiskHistory.objects.filter(pk=record.pk).update(timestamp=timestamp)
+
+    def old_time(self, hour):
+        return timezone.make_aware(datetime.combine(self.old_day, time.min)) + timedelta(hours=hour)
+
+    def test_old_rows_become_daily_rollups(self):
+        for customer_id in range(1, 4):
+            self.add_history(customer_id, self.old_time(1), 0.2)
+            self.add_history(customer_id, self.old_time(5), 0.8, is_high_risk=True)
+            self.add_history(customer_id, self.old_time(3), 0.5)
+        self.add_history(1, self.now - timedelta(days=1), 0.4)
+
+        stats = compact_history(now=self.now)
+
+        self.assertTrue(stats['complete'])
+        self.assertEqual(stats['batches'], 2)  # three customers, two per batch
+        self.assertEqual(stats['rows_compacted'], 9)
+        self.assertEqual(ChurnRiskHistory.objects.count(), 1)  # recent row kept raw
+        self.assertFalse(ChurnRiskHistory.objects.filter(timestamp__lt=compaction_cutoff(self.now)).exists())
+
+        rollup = ChurnRiskDailyRollup.objects.get(customer_id=2)
+        self.assertEqual(rollup.date, self.old_day)
+        self.assertEqual(rollup.sample_count, 3)
+        self.assertAlmostEqual(rollup.min_probability, 0.2)
+        self.assertAlmostEqual(rollup.max_probability, 0.8)
+        self.assertAlmostEqual(rollup.avg_probability, 0.5)
+        self.assertAlmostEqual(rollup.last_probability, 0.8)  # latest by timestamp, not insertion order
+        self.assertTrue(rollup.last_is_high_risk)
+        self.assertEqual(rollup.high_risk_count, 1)
+
+    def test_batches_are_bounded_and_merge_into_existing_rollups(self):
+        for customer_id in range(1, 4):
+            self.add_history(customer_id, self.old_time(1), 0.2)
+
+        stats = compact_history(max_batches=1, now=self.now)
+        self.assertFalse(stats['complete'])
+        self.assertEqual(ChurnRiskHistory.objects.count(), 1)
+
+        # A late row for an already compacted customer-day is merged
+        self.add_history(1, self.old_time(2), 0.6)
+        compact_history(now=self.now)
+
+        rollup = ChurnRiskDailyRollup.objects.get(customer_id=1)
+        self.assertEqual(rollup.sample_count, 2)
+        self.assertAlmostEqual(rollup.avg_probability, 0.4)
+        self.assertAlmostEqual(rollup.last_probability, 0.6)
+        self.assertEqual(ChurnRiskDailyRollup.objects.count(), 3)
+        self.assertFalse(ChurnRiskHistory.objects.exists())
+
+    def test_trend_reads_both_tiers(self):
+        self.add_history(1, self.old_time(1), 0.2)
+        self.add_history(2, self.old_time(2), 0.6, is_high_risk=True)
+        self.add_history(1, self.now - timedelta(hours=1), 0.4)
+        before = daily_risk_trend(days=30, now=self.now)
+
+        compact_history(now=self.now)
+        after = daily_risk_trend(days=30, now=self.now)
+
+        self.assertEqual(len(after), 2)
+        self.assertEqual(after[0]['date'], self.old_day)
+        self.assertAlmostEqual(after[0]['avg_risk'], 0.4)
+        self.assertEqual(after[0]['high_risk_count'], 1)
+        self.assertEqual([day['date'] for day in before], [day['date'] for day in after])
+        for raw, compacted in zip(before, after):
+            self.assertAlmostEqual(raw['avg_risk'], compacted['avg_risk'])
+
+    def test_expired_rollups_are_deleted(self):
+        self.add_history(1, self.old_time(1), 0.2)
+        compact_history(now=self.now)
+        self.assertEqual(expire_rollups(now=self.now), 0)
+        self.assertEqual(expire_rollups(now=self.now + timedelta(days=400)), 1)
+        self.assertFalse(ChurnRiskDailyRollup.objects.exists())
+
+    def test_partitioned_table_keeps_compacted_rows(self):
+        for customer_id in range(1, 4):
+            self.add_history(customer_id, self.old_time(1), 0.2)
+            self.add_history(customer_id, self.old_time(2), 0.4)
+        start, end = self.old_time(0), self.old_time(24)
+
+        with mock.patch('churn_app.retention.is_partitioned', return_value=True):
+            self.assertTrue(has_uncompacted_rows(start, end))
+            stats = compact_history(max_batches=1, now=self.now)
+            self.assertFalse(stats['complete'])
+            stats = compact_history(now=self.now)
+            self.assertTrue(stats['complete'])
+            self.assertEqual(stats['rows_compacted'], 2)  # only the customer left over from the first run
+
+            # Nothing is compacted twice
+            self.assertEqual(compact_history(now=self.now)['rows_compacted'], 0)
+
+        self.assertEqual(ChurnRiskHistory.objects.count(), 6)
+        self.assertFalse(has_uncompacted_rows(start, end))
+        self.assertEqual(ChurnRiskDailyRollup.objects.get(customer_id=3).sample_count, 2)
@@ -0,0 +1,154 @@
+from django.test import SimpleTestCase
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ..rate_limit import LocalTokenBucket
+from ..webhooks import WebhookSender, retry_after_seconds
+from unittest import mock
+import json
+import threading
+import time
+
+
+class FakeWebhookServer:
+    """
+    Local stand-in for a Discord webhook. Responds with the queued
+    (status, headers) pairs, then 204, and records every request together
+    with the client port so connection reuse can be checked.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.responses = []
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                with server.lock:
+                    server.requests.append({'port': self.client_address[1], 'body': json.loads(body)})
+                    status, headers = server.responses.pop(0) if server.responses else (204, {})
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                time.sleep(server.delay)
+                with server.lock:
+                    server.in_flight -= 1
+
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/api/webhooks/test"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class WebhookSenderTest(SimpleTestCase):
+    def setUp(self):
+        self.sleeps = []
+        self.sender = WebhookSender(sleep=self.sleeps.append, jitter=lambda: 1.0, timeout=5)
+        self.addCleanup(self.sender.close)
+
+    def test_connection_is_kept_alive_across_messages(self):
+        with FakeWebhookServer() as server:
+            for i in range(5):
+                self.assertEqual(self.sender.send(server.url, {'content': str(i)}), (True, None))
+
+        self.assertEqual([request['body']['content'] for request in server.requests], ['0', '1', '2', '3', '4'])
+        self.assertEqual(len({request['port'] for request in server.requests}), 1)
+
+    def test_server_errors_back_off_exponentially(self):
+        with FakeWebhookServer() as server:
+            server.responses = [(500, {}), (502, {})]
+            self.assertEqual(self.sender.send(server.url, {'content': 'x'}), (True, None))
+
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(self.sleeps, [0.5, 1.0])
+
+    def test_jitter_scales_the_delay(self):
+        sender = WebhookSender(jitter=lambda: 0.25, backoff_base=1.0, backoff_max=4.0)
+        self.assertEqual([sender.backoff(attempt) for attempt in range(5)], [0.25, 0.5, 1.0, 1.0, 1.0])
+
+    def test_rate_limited_message_honours_retry_after(self):
+        with FakeWebhookServer() as server:
+            server.responses = [(429, {'Retry-After': '1.5'})]
+            self.assertEqual(self.sender.send(server.url, {'content': 'x'}), (True, None))
+
+        self.assertEqual(self.sleeps, [1.5])
+
+    def test_rate_limit_on_last_attempt_does_not_wait(self):
+        with FakeWebhookServer() as server:
+            server.responses = [(429, {'Retry-After': '1.5'})] * 2
+            success, error = self.sender.send(server.url, {'content': 'x'}, max_retries=2)
+
+        self.assertFalse(success)
+        self.assertIn('429', error)
+        self.assertEqual(self.sleeps, [1.5])
+
+    def test_unusable_retry_after_falls_back_to_backoff(self):
+        for body in ({'retry_after': None}, {'retry_after': 'soon'}, ['not', 'a', 'dict']):
+            response = mock.Mock(headers={})
+            response.json.return_value = body
+            self.assertEqual(retry_after_seconds(response, 0.5), 0.5)
+
+        response = mock.Mock(headers={})
+        response.json.return_value = {'retry_after': 2.25}
+        self.assertEqual(retry_after_seconds(response, 0.5), 2.25)
+
+    def test_missing_webhook_is_not_retried(self):
+        gone = []
+        with FakeWebhookServer() as server:
+            server.responses = [(404, {})]
+            success, error = self.sender.send(server.url, {'content': 'x'}, on_gone=gone.append)
+
+        self.assertFalse(success)
+        self.assertIn('404', error)
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(gone, [server.url])
+
+    def test_gives_up_after_max_retries(self):
+        with FakeWebhookServer() as server:
+            server.responses = [(500, {})] * 3
+            success, error = self.sender.send(server.url, {'content': 'x'}, max_retries=3)
+
+        self.assertFalse(success)
+        self.assertIn('500', error)
+        self.assertEqual(len(self.sleeps), 2)
+
+    def test_send_many_delivers_concurrently_within_rate_limit(self):
+        limiter = LocalTokenBucket(rate=1000, capacity=1000)
+        messages = [{'content': str(i)} for i in range(8)]
+        with FakeWebhookServer(delay=0.2) as server:
+            results = self.sender.send_many(server.url, messages, rate_limiter=limiter, max_workers=4)
+
+        self.assertEqual(results, [(True, None)] * 8)
+        self.assertEqual(sorted(request['body']['content'] for request in server.requests),
+                         [str(i) for i in range(8)])
+        self.assertGreater(server.max_in_flight, 1)
+
+    def test_send_many_reports_rate_limited_messages(self):
+        limiter = LocalTokenBucket(rate=0.001, capacity=1)
+        with FakeWebhookServer() as server:
+            results = self.sender.send_many(server.url, [{'content': 'a'}, {'content': 'b'}],
+                                            rate_limiter=limiter, wait_timeout=0, max_workers=1)
+
+        self.assertEqual(sorted(success for success, _ in results), [False, True])
+        self.assertEqual(len(server.requests), 1)
@@ -0,0 +1,153 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum, F, Exists, OuterRef
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ChurnRiskHistory, ChurnRiskDailyRollup, DailyRiskTrend
+from .retention import day_bounds
+
+# Distribution buckets: name -> [lower, upper) bounds of the churn probability
+BUCKETS = {
+    'very_high': (0.8, None),
+    'high': (0.6, 0.8),
+    'medium': (0.4, 0.6),
+    'low': (0.2, 0.4),
+    'very_low': (None, 0.2),
+}
+
+TREND_FIELDS = ['sample_count', 'probability_sum', 'high_risk_count'] + [f'{bucket}_count' for bucket in BUCKETS]
+
+
+def bucket_of(probability):
+    for bucket, (lower, upper) in BUCKETS.items():
+        if (lower is None or probability >= lower) and (upper is None or probability < upper):
+            return bucket
+
+
+def bucket_filters(field):
+    """{bucket: Q} on a probability column, for Count(..., filter=...)"""
+    filters = {}
+    for bucket, (lower, upper) in BUCKETS.items():
+        condition = Q()
+        if lower is not None:
+            condition &= Q(**{f'{field}__gte': lower})
+        if upper is not None:
+            condition &= Q(**{f'{field}__lt': upper})
+        filters[bucket] = condition
+    return filters
+
+
+class TrendAccumulator:
+    """
+    Collects the scores a monitoring chunk writes, per day, and adds them to
+    DailyRiskTrend with one atomic increment per day. Shards running in
+    parallel can apply at the same time without losing counts.
+    """
+
+    def __init__(self):
+        self.days = {}
+
+    def add(self, day, probability, is_high_risk):
+        counts = self.days.setdefault(day, dict.fromkeys(TREND_FIELDS, 0))
+        counts['sample_count'] += 1
+        counts['probability_sum'] += probability
+        counts[f'{bucket_of(probability)}_count'] += 1
+        if is_high_risk:
+            counts['high_risk_count'] += 1
+
+    def apply(self):
+        """Add the collected counts to the trend table and start over"""
+        for day, counts in self.days.items():
+            with transaction.atomic():
+                trend, _ = DailyRiskTrend.objects.get_or_create(date=day)
+                DailyRiskTrend.objects.filter(pk=trend.pk).update(
+                    updated_at=timezone.now(),
+                    **{field: F(field) + value for field, value in counts.items() if value}
+                )
+        self.days = {}
+
+
+def daily_risk_trend(days=30, now=None):
+    """
+    Score count, probability sum, high-risk count and distribution buckets
+    per day, for the last `days` whole days and today, computed from history.
+    A customer-day is read from its rollup once it has one and from raw
+    history otherwise, so rows kept in a partitioned table after compaction
+    are not counted twice. Rollups do not keep buckets: compacted
+    customer-days add to the totals only.
+    """
+    first_day = timezone.localdate(now) - timedelta(days=days)
+    since = day_bounds(first_day)[0]
+    trend = {}
+
+    rolled_up = ChurnRiskDailyRollup.objects.filter(customer_id=OuterRef('customer_id'), date=OuterRef('day'))
+    raw_days = ChurnRiskHistory.objects.filter(timestamp__gte=since).annotate(
+        day=TruncDate('timestamp')
+    ).exclude(Exists(rolled_up)).values('day').annotate(
+        total=Sum('churn_probability'),
+        samples=Count('id'),
+        high=Count('id', filter=Q(is_high_risk=True)),
+        **{f'bucket_{bucket}': Count('id', filter=condition) for bucket, condition in bucket_filters('churn_probability').items()}
+    )
+    for item in raw_days:
+        trend[item['day']] = dict(item, buckets={bucket: item[f'bucket_{bucket}'] for bucket in BUCKETS})
+
+    rollup_days = ChurnRiskDailyRollup.objects.filter(date__gte=first_day).values('date').annotate(
+        total=Sum(F('avg_probability') * F('sample_count')),
+        samples=Sum('sample_count'),
+        high=Sum('high_risk_count')
+    )
+    for item in rollup_days:
+        day = trend.setdefault(item['date'], {'total': 0.0, 'samples': 0, 'high': 0, 'buckets': dict.fromkeys(BUCKETS, 0)})
+        day['total'] += item['total']
+        day['samples'] += item['samples']
+        day['high'] += item['high']
+
+    return [{
+        'date': day,
+        'sample_count': totals['samples'],
+        'probability_sum': totals['total'],
+        'avg_risk': totals['total'] / totals['samples'] if totals['samples'] else None,
+        'high_risk_count': totals['high'],
+        'distribution': totals['buckets']
+    } for day, totals in sorted(trend.items())]
+
+
+def rebuild_daily_trend(days=30, now=None):
+    """
+    Recompute the trend rows of the last `days` days from history (see
+    daily_risk_trend). Used to backfill the table and to repair it.
+    Returns the number of days written.
+    """
+    trend = daily_risk_trend(days=days, now=now)
+    rows = [
+        DailyRiskTrend(
+            date=day['date'],
+            sample_count=day['sample_count'],
+            probability_sum=day['probability_sum'],
+            high_risk_count=day['high_risk_count'],
+            updated_at=timezone.now(),
+            **{f'{bucket}_count': count for bucket, count in day['distribution'].items()}
+        )
+        for day in trend
+    ]
+    DailyRiskTrend.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['date'],
+        update_fields=TREND_FIELDS + ['updated_at']
+    )
+    return len(rows)
+
+
+def recent_trend(days=30, now=None):
+    """The dashboard's daily trend: one precomputed row per day"""
+    since = timezone.localdate(now) - timedelta(days=days)
+    return [{
+        'date': trend.date,
+        'avg_risk': trend.avg_risk,
+        'high_risk_count': trend.high_risk_count,
+        'distribution': {bucket: getattr(trend, f'{bucket}_count') for bucket in BUCKETS}
+    } for trend in DailyRiskTrend.objects.filter(date__gte=since).order_by('date')]
@@ -12,11 +12,18 @@ urlpatterns = [
     # Custom endpoints
     path('customers/import-csv/', views.import_csv, name='import_csv'),
     path('predict/', views.predict_churn, name='predict_churn'),
+    path('predict/batch/', views.predict_churn_batch, name='predict_churn_batch'),
+    path('predict/async/', views.predict_churn_async, name='predict_churn_async'),
+    path('predict/stream/', views.predict_churn_stream, name='predict_churn_stream'),
+    path('predict/cache/stats/', views.get_prediction_cache_stats, name='prediction_cache_stats'),
     path('train/', views.trigger_training, name='train_model'),
     path('model-metrics/', views.get_model_metrics, name='model_metrics'),
+    path('health/ready/', views.model_readiness, name='model_readiness'),
     path('dashboard/stats/', views.get_dashboard_stats, name='dashboard-stats'),
     path('risk/monitoring/', views.get_risk_monitoring, name='risk-monitoring'),
     path('risk/monitor/trigger/', views.trigger_monitoring, name='trigger-monitoring'),
+    path('risk/monitor/runs/', views.get_monitoring_runs, name='monitoring-runs'),
+    path('risk/monitor/runs/<int:run_id>/', views.get_monitoring_run, name='monitoring-run'),
     path('risk/dashboard/', views.get_risk_dashboard, name='risk-dashboard'),
     
     # Bulk operations
@@ -1,140 +1,150 @@
 import requests
+import hashlib
 from django.conf import settings
-import json
-from datetime import datetime, timedelta
-import time
+from django.core.cache import cache
+from datetime import datetime
 from churn_app.models import AlertHistory
+from churn_app.rate_limit import get_rate_limiter
+from churn_app.webhooks import webhook_sender
 
-def validate_webhook_url(url):
+def webhook_validation_cache_key(url):
+    return f"discord_webhook_valid:{hashlib.sha1(url.encode('utf-8')).hexdigest()}"
+
+def invalidate_webhook_validation(url):
+    """Forget the cached validation result for a webhook URL"""
+    if not url or not isinstance(url, str):
+        return
+    try:
+        cache.delete(webhook_validation_cache_key(url))
+    except Exception as e:
+        print(f"Warning: webhook validation cache delete failed: {str(e)}")
+
+def validate_webhook_url(url, use_cache=True):
     """
     Validate Discord webhook URL format and accessibility.
+    The result of the GET to Discord is cached per URL for
+    DISCORD_ALERTS['VALIDATION_CACHE_TTL'] seconds; network errors are not cached.
     """
     if not url or not isinstance(url, str):
         return False, "Invalid webhook URL"
         
     if not url.startswith('https://discord.com/api/webhooks/'):
         return False, "Invalid webhook URL format"
+    
+    cache_key = webhook_validation_cache_key(url)
+    if use_cache:
+        try:
+            cached = cache.get(cache_key)
+        except Exception as e:
+            print(f"Warning: webhook validation cache lookup failed: {str(e)}")
+            cached = None
+        if cached is not None:
+            return tuple(cached)
         
     try:
         response = requests.get(url, timeout=5)
         if response.status_code == 404:
-            return False, "Webhook URL not found"
-        return True, None
+            result = (False, "Webhook URL not found")
+        else:
+            result = (True, None)
     except Exception as e:
         return False, f"Error validating webhook: {str(e)}"
+    
+    try:
+        cache.set(cache_key, list(result), settings.DISCORD_ALERTS.get('VALIDATION_CACHE_TTL', 600))
+    except Exception as e:
+        print(f"Warning: webhook validation cache write failed: {str(e)}")
+    return result
 
-def check_rate_limit():
+def check_rate_limit(timeout=0):
     """
     Check if we've exceeded Discord's rate limit (30 messages per minute).
+    Takes a slot from the limiter shared by all workers (see rate_limit.py),
+    waiting up to timeout seconds for one. Returns True when rate limited.
     """
-    one_minute_ago = datetime.now() - timedelta(minutes=1)
-    recent_messages = AlertHistory.objects.filter(
-        sent_at__gte=one_minute_ago,
-        was_sent=True
-    ).count()
-    return recent_messages >= 30
+    return not get_rate_limiter().acquire(blocking=timeout > 0, timeout=timeout)
+
+# Discord webhook limits
+MAX_CONTENT_LENGTH = 2000
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_TEXT_LENGTH = 6000  # Across all embeds of one message
 
-def send_discord_message(url, message, max_retries=3, retry_delay=1):
+def embed_text_length(embed):
+    """Characters Discord counts towards the embed limit"""
+    length = len(embed.get('title') or '') + len(embed.get('description') or '')
+    length += len((embed.get('footer') or {}).get('text') or '')
+    length += len((embed.get('author') or {}).get('name') or '')
+    for field in embed.get('fields', []):
+        length += len(str(field.get('name') or '')) + len(str(field.get('value') or ''))
+    return length
+
+def message_size_error(message):
+    """Return why a webhook message exceeds Discord's limits, or None"""
+    if len(message.get('content') or '') > MAX_CONTENT_LENGTH:
+        return "Message exceeds Discord size limit"
+    embeds = message.get('embeds', [])
+    if len(embeds) > MAX_EMBEDS_PER_MESSAGE:
+        return f"Message has more than {MAX_EMBEDS_PER_MESSAGE} embeds"
+    if sum(embed_text_length(embed) for embed in embeds) > MAX_EMBED_TEXT_LENGTH:
+        return "Message exceeds Discord size limit"
+    return None
+
+def send_discord_message(url, message, max_retries=3):
     """
-    Send message to Discord with retry logic.
+    Send message to Discord with retry logic, over the pooled keep-alive
+    session of webhooks.webhook_sender (exponential backoff with jitter).
     """
-    # Check message size (Discord limit is 2000 characters)
-    message_json = json.dumps(message)
-    if len(message_json) > 2000:
-        return False, "Message exceeds Discord size limit"
+    # Check message size against Discord's limits
+    size_error = message_size_error(message)
+    if size_error:
+        return False, size_error
     
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(
-                url,
-                json=message,
-                headers={'Content-Type': 'application/json'},
-                timeout=10
-            )
-            
-            if response.status_code == 204:
-                return True, None
-            elif response.status_code == 429:  # Rate limit hit
-                retry_after = int(response.headers.get('Retry-After', retry_delay))
-                time.sleep(retry_after)
-                continue
-            else:
-                error_msg = f"Discord API returned status code: {response.status_code}"
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
-                    continue
-                return False, error_msg
-                
-        except Exception as e:
-            error_msg = f"Error sending Discord message: {str(e)}"
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay)
-                continue
-            return False, error_msg
-    
-    return False, "Max retries exceeded"
+    return webhook_sender.send(url, message, max_retries=max_retries, on_gone=invalidate_webhook_validation)
 
-def send_discord_alert(customer, probability, risk_change=None, previous_probability=None):
+def record_alert(writer=None, **fields):
+    """Create an AlertHistory row now, or queue it on a BufferedWriter"""
+    if writer is None:
+        return AlertHistory.objects.create(**fields)
+    record = AlertHistory(**fields)
+    writer.add(record)
+    return record
+
+def build_alert_embed(customer, probability, risk_change=None, previous_probability=None):
     """
-    Send an alert to Discord about a high-risk customer.
+    Build the Discord embed for one customer alert.
+    Returns (embed, alert_type).
     """
-    # Check if alerts are enabled
-    if not settings.DISCORD_ALERTS['ENABLED']:
-        return False
-
-    # Validate webhook URL
-    is_valid, error_msg = validate_webhook_url(settings.DISCORD_WEBHOOK_URL)
-    if not is_valid:
-        print(f"Webhook validation failed: {error_msg}")
-        return False
-
-    # Check rate limit
-    if check_rate_limit():
-        error_msg = "Rate limit exceeded (30 messages/minute)"
-        print(error_msg)
-        AlertHistory.objects.create(
-            customer=customer,
-            alert_type='HIGH_RISK',
-            message={"error": error_msg},
-            was_sent=False,
-            error_message=error_msg
-        )
-        return False
-
-    # Format the message
-    message = {
-        "embeds": [{
-            "title": "🚨 High Risk Customer Alert",
-            "color": 15158332,  # Red color
-            "fields": [
-                {
-                    "name": "Customer ID",
-                    "value": str(customer.customer_id),
-                    "inline": True
-                },
-                {
-                    "name": "Customer Name",
-                    "value": customer.surname,
-                    "inline": True
-                },
-                {
-                    "name": "Churn Probability",
-                    "value": f"{probability:.2%}",
-                    "inline": True
-                },
-                {
-                    "name": "Geography",
-                    "value": customer.geography,
-                    "inline": True
-                }
-            ],
-            "timestamp": datetime.utcnow().isoformat()
-        }]
+    embed = {
+        "title": "🚨 High Risk Customer Alert",
+        "color": 15158332,  # Red color
+        "fields": [
+            {
+                "name": "Customer ID",
+                "value": str(customer.customer_id),
+                "inline": True
+            },
+            {
+                "name": "Customer Name",
+                "value": customer.surname,
+                "inline": True
+            },
+            {
+                "name": "Churn Probability",
+                "value": f"{probability:.2%}",
+                "inline": True
+            },
+            {
+                "name": "Geography",
+                "value": customer.geography,
+                "inline": True
+            }
+        ],
+        "timestamp": datetime.utcnow().isoformat()
     }
 
     # Add risk change information if available
     if risk_change is not None and previous_probability is not None:
-        message["embeds"][0]["fields"].extend([
+        embed["fields"].extend([
             {
                 "name": "Previous Probability",
                 "value": f"{previous_probability:.2%}",
@@ -149,9 +159,9 @@ def send_discord_alert(customer, probability, risk_change=None, previous_probabi
         
         # Add description based on risk type
         if probability > settings.DISCORD_ALERTS['HIGH_RISK_THRESHOLD']:
-            message["embeds"][0]["description"] = "⚠️ Customer has exceeded the high-risk threshold!"
+            embed["description"] = "⚠️ Customer has exceeded the high-risk threshold!"
         if risk_change > settings.DISCORD_ALERTS['RISK_INCREASE_THRESHOLD']:
-            message["embeds"][0]["description"] = "📈 Significant increase in churn risk!"
+            embed["description"] = "📈 Significant increase in churn risk!"
 
     # Add customer details
     details = [
@@ -161,7 +171,7 @@ def send_discord_alert(customer, probability, risk_change=None, previous_probabi
         f"Products: {customer.num_of_products}",
         f"Active Member: {'Yes' if customer.is_active_member else 'No'}"
     ]
-    message["embeds"][0]["fields"].append({
+    embed["fields"].append({
         "name": "Customer Details",
         "value": "\n".join(details),
         "inline": False
@@ -170,11 +180,46 @@ def send_discord_alert(customer, probability, risk_change=None, previous_probabi
     # Determine alert type based on conditions
     alert_type = 'HIGH_RISK' if probability > settings.DISCORD_ALERTS['HIGH_RISK_THRESHOLD'] else 'RISK_INCREASE'
 
+    return embed, alert_type
+
+def send_discord_alert(customer, probability, risk_change=None, previous_probability=None, writer=None):
+    """
+    Send an alert to Discord about a high-risk customer.
+    With a writer (see bulk_writes.BufferedWriter) the AlertHistory record is buffered.
+    """
+    # Check if alerts are enabled
+    if not settings.DISCORD_ALERTS['ENABLED']:
+        return False
+
+    # Validate webhook URL
+    is_valid, error_msg = validate_webhook_url(settings.DISCORD_WEBHOOK_URL)
+    if not is_valid:
+        print(f"Webhook validation failed: {error_msg}")
+        return False
+
+    # Check rate limit
+    if check_rate_limit():
+        error_msg = "Rate limit exceeded (30 messages/minute)"
+        print(error_msg)
+        record_alert(
+            writer,
+            customer=customer,
+            alert_type='HIGH_RISK',
+            message={"error": error_msg},
+            was_sent=False,
+            error_message=error_msg
+        )
+        return False
+
+    embed, alert_type = build_alert_embed(customer, probability, risk_change, previous_probability)
+    message = {"embeds": [embed]}
+
     # Send message with retry logic
     success, error_msg = send_discord_message(settings.DISCORD_WEBHOOK_URL, message)
     
     # Create alert history record
-    AlertHistory.objects.create(
+    record_alert(
+        writer,
         customer=customer,
         alert_type=alert_type,
         message=message,
@@ -184,6 +229,124 @@ def send_discord_alert(customer, probability, risk_change=None, previous_probabi
     
     return success
 
+def deliver_alert_batches(batches, writer=None, rate_limiter=None, wait_timeout=300):
+    """
+    Send packed alert batches (lists of (customer_id, embed, alert_type),
+    see AlertQueue.pack) as one webhook message each, paced by the shared
+    Discord rate limiter, and record one AlertHistory per customer.
+    Returns (delivered, failed) alert counts.
+    """
+    if not batches:
+        return 0, 0
+
+    is_valid, validation_error = validate_webhook_url(settings.DISCORD_WEBHOOK_URL)
+    if not is_valid:
+        print(f"Webhook validation failed: {validation_error}")
+
+    if is_valid:
+        # Messages go out concurrently, each one taking a rate limiter token first
+        results = webhook_sender.send_many(
+            settings.DISCORD_WEBHOOK_URL,
+            [{"embeds": [embed for _, embed, _ in batch]} for batch in batches],
+            rate_limiter=rate_limiter or get_rate_limiter(),
+            wait_timeout=wait_timeout,
+            max_workers=settings.DISCORD_ALERTS.get('MAX_CONCURRENT_DELIVERIES', 4),
+            send=send_discord_message
+        )
+    else:
+        results = [(False, validation_error)] * len(batches)
+
+    delivered = 0
+    for batch, (success, error_msg) in zip(batches, results):
+        for customer_id, embed, alert_type in batch:
+            record_alert(
+                writer,
+                customer_id=customer_id,
+                alert_type=alert_type,
+                message={"embeds": [embed]},
+                was_sent=success,
+                error_message=error_msg
+            )
+        if success:
+            delivered += len(batch)
+        else:
+            print(f"Failed to send {len(batch)} alerts: {error_msg}")
+
+    return delivered, sum(len(batch) for batch in batches) - delivered
+
+class AlertQueue:
+    """
+    Collects customer alerts during a monitoring run and delivers them packed
+    into messages of up to 10 embeds within Discord's embed size limit,
+    paced by the shared Discord rate limiter. Every alert still gets its
+    own AlertHistory record, holding the embed for that customer.
+
+    With dispatch, flushed batches are handed to it (e.g. a Celery task's
+    delay) instead of being sent in-process, so the caller never waits on
+    the rate limiter.
+    """
+
+    def __init__(self, writer=None, rate_limiter=None, wait_timeout=300, dispatch=None):
+        self.writer = writer
+        self.rate_limiter = rate_limiter
+        self.wait_timeout = wait_timeout
+        self.dispatch = dispatch
+        self.pending = []  # (customer_id, embed, alert_type)
+        self.messages_sent = 0
+        self.alerts_queued = 0  # Handed to dispatch
+        self.alerts_delivered = 0
+        self.alerts_failed = 0
+
+    def add(self, customer, probability, risk_change=None, previous_probability=None):
+        """Queue an alert; returns False when alerts are disabled"""
+        if not settings.DISCORD_ALERTS['ENABLED']:
+            return False
+        embed, alert_type = build_alert_embed(customer, probability, risk_change, previous_probability)
+        self.pending.append((customer.customer_id, embed, alert_type))
+        return True
+
+    @staticmethod
+    def pack(alerts):
+        """Group alerts into batches that each fit in one webhook message"""
+        batches = []
+        current = []
+        current_length = 0
+        for alert in alerts:
+            length = embed_text_length(alert[1])
+            if current and (len(current) >= MAX_EMBEDS_PER_MESSAGE or current_length + length > MAX_EMBED_TEXT_LENGTH):
+                batches.append(current)
+                current = []
+                current_length = 0
+            current.append(alert)
+            current_length += length
+        if current:
+            batches.append(current)
+        return batches
+
+    def flush(self, full_only=False):
+        """
+        Deliver the queued alerts, or hand them to dispatch. With full_only
+        the last, possibly partial message stays queued so later alerts can
+        fill it. Returns the number of alerts delivered in-process.
+        """
+        batches = self.pack(self.pending)
+        self.pending = batches.pop() if full_only and batches else []
+        if not batches:
+            return 0
+
+        if self.dispatch is not None:
+            self.dispatch(batches)
+            self.alerts_queued += sum(len(batch) for batch in batches)
+            return 0
+
+        delivered, failed = deliver_alert_batches(
+            batches, writer=self.writer, rate_limiter=self.rate_limiter, wait_timeout=self.wait_timeout
+        )
+        self.messages_sent += len(batches)
+        self.alerts_delivered += delivered
+        self.alerts_failed += failed
+        return delivered
+
 def send_monitoring_summary(total_checked, high_risk_count, significant_increases):
     """
     Send a summary of the monitoring run to Discord.
@@ -198,8 +361,8 @@ def send_monitoring_summary(total_checked, high_risk_count, significant_increase
         print(f"Webhook validation failed: {error_msg}")
         return False
 
-    # Check rate limit
-    if check_rate_limit():
+    # Check rate limit, waiting for a slot: the summary should not be dropped after a burst of alerts
+    if check_rate_limit(timeout=60):
         error_msg = "Rate limit exceeded (30 messages/minute)"
         print(error_msg)
         AlertHistory.objects.create(
@@ -1,14 +1,13 @@
 import pickle
 import numpy as np
 import pandas as pd
-from django.http import JsonResponse
-from rest_framework.decorators import api_view, authentication_classes, permission_classes, parser_classes
+from django.http import JsonResponse, StreamingHttpResponse, Http404
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, parser_classes, action
 from rest_framework.permissions import IsAdminUser
 from rest_framework.authentication import BasicAuthentication
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 import json
-from django.core.cache import cache
 from django.views.decorators.csrf import csrf_exempt
 import os
 from django.conf import settings
@@ -16,77 +15,60 @@ from django.core.management import call_command
 from rest_framework import viewsets, permissions, status, filters
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet, NumberFilter
 from django.contrib.auth.models import User
-from .models import CustomerChurn, ChurnRiskHistory, AlertConfiguration, AlertHistory
-from .serializers import UserSerializer, CustomerChurnSerializer, CSVImportSerializer, AlertConfigurationSerializer, AlertHistorySerializer
+from .models import CustomerChurn, ChurnRiskHistory, ChurnRiskDailyRollup, CustomerRiskState, AlertConfiguration, AlertHistory, MonitoringRun
+from .serializers import UserSerializer, CustomerChurnSerializer, CSVImportSerializer, AlertConfigurationSerializer, AlertHistorySerializer, MonitoringRunSerializer
 from django.shortcuts import get_object_or_404
-import joblib
 import traceback
-from django.db.models import Count, Avg, Q, F, Max
+from django.db.models import Count, Avg, Q, F
 from pathlib import Path
 from django.utils import timezone
 from django.db import transaction
 from rest_framework.parsers import MultiPartParser
+from .model_registry import registry as model_registry
+from .scoring import score_batch, customer_feature_values
+from .prediction_cache import prediction_cache, generate_cache_key
+from .batching import batcher
+from .warmup import get_readiness
+from .streaming import guess_format, iter_scored_rows, iter_encoded_results, STREAM_FORMATS
+from .utils import invalidate_webhook_validation
+from .trends import recent_trend
+from .risk_queries import latest_risk_summary
+from asgiref.sync import sync_to_async
 
-# Define features directly
-numerical_features = [
-    "credit_score", "age", "tenure", "balance", 
-    "num_of_products", "has_cr_card", "is_active_member", 
-    "estimated_salary"
-]
-categorical_features = ["geography", "gender"]
-
-def load_latest_model():
-    """Load the latest trained model and its components"""
-    models_dir = Path(settings.BASE_DIR) / "models"
-    latest_model_path = models_dir / "latest_model.joblib"
-    
-    if not latest_model_path.exists():
-        raise FileNotFoundError("No trained model found. Please train a model first.")
-    
-    model_data = joblib.load(latest_model_path)
-    return model_data
 
 # Load model components for prediction
 def get_model_components():
+    """
+    Return the in-memory model components, or None if no model is available.
+    The registry only reloads the artifact when train_churn writes a new one.
+    """
     try:
-        model_data = load_latest_model()
-        
-        # Initialize components dictionary with model data
-        components = {
-            'model': model_data['model'],
-            'scaler': model_data['scaler'],
-            'label_encoder_geo': model_data['label_encoder_geo'],
-            'label_encoder_gender': model_data['label_encoder_gender'],
-            'feature_importance': {}  # Default empty dict for feature importance
-        }
-        
-        # Try to load metrics if available
-        try:
-            models_dir = Path(settings.BASE_DIR) / "models"
-            latest_metrics_path = models_dir / "latest_metrics.json"
-            
-            if latest_metrics_path.exists():
-                with open(latest_metrics_path, 'r') as f:
-                    metrics_data = json.load(f)
-                components['feature_importance'] = metrics_data.get('feature_importance', {})
-        except Exception as metrics_error:
-            print(f"Warning: Could not load metrics file: {str(metrics_error)}")
-            # Continue without metrics
-        
-        return components
-        
+        return model_registry.get()
     except Exception as e:
         print(f"Error loading model components: {str(e)}")
         print(f"Traceback: {traceback.format_exc()}")
         return None
 
-# Add cache TTL constant (1 hour)
-CACHE_TTL = 60 * 60
+# Maximum number of rows accepted by /predict/batch/
+BATCH_PREDICTION_MAX_ROWS = 10000
+
+# Rows read and scored at a time by /predict/stream/
+STREAM_CHUNK_SIZE = 10000
 
-def generate_cache_key(features):
-    """Generate a consistent cache key from input features"""
-    feature_str = json.dumps(features, sort_keys=True)
-    return f"churn_pred_{feature_str}"
+@api_view(["GET"])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def model_readiness(request):
+    """
+    Readiness probe for the load balancer: 200 once this worker has the model
+    loaded in memory, 503 otherwise. With CHURN_MODEL['PRELOAD'] on that
+    happens at startup, together with a synthetic warm-up prediction.
+    """
+    readiness = get_readiness()
+    return Response(
+        readiness,
+        status=status.HTTP_200_OK if readiness['ready'] else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
 
 @api_view(["POST"])
 @csrf_exempt
@@ -197,65 +179,37 @@ def predict_churn(request):
     try:
         data = request.data
         
-        # Generate cache key from input data
-        cache_key = generate_cache_key(data)
-        
-        # Check cache first
-        cached_result = cache.get(cache_key)
-        if cached_result is not None:
-            return JsonResponse(cached_result)
-
         # Get model components
         components = get_model_components()
         if not components:
             return JsonResponse({"error": "Model not loaded. Please train the model first."}, status=400)
 
+        # Key on the normalized features and the model that scored them
+        cache_key = generate_cache_key(data, components['version'])
+        
+        # Check cache first
+        cached_result = prediction_cache.get(cache_key)
+        if cached_result is not None:
+            return JsonResponse(cached_result)
+
         model = components['model']
-        scaler = components['scaler']
-        le_geo = components['label_encoder_geo']
-        le_gender = components['label_encoder_gender']
         feature_importance = components['feature_importance']
 
-        # Create a DataFrame with the input data
-        input_data = {
-            "credit_score": float(data.get("credit_score", 0)),
-            "age": float(data.get("age", 0)),
-            "tenure": float(data.get("tenure", 0)),
-            "balance": float(data.get("balance", 0)),
-            "num_of_products": float(data.get("num_of_products", 1)),
-            "has_cr_card": float(data.get("has_cr_card", 0)),
-            "is_active_member": float(data.get("is_active_member", 0)),
-            "estimated_salary": float(data.get("estimated_salary", 0)),
-            "geography": data.get("geography", "France"),
-            "gender": data.get("gender", "Female")
-        }
-        
-        # Create DataFrame with proper column order
-        df = pd.DataFrame([input_data])
-        
-        # Encode categorical variables
-        df["geography"] = le_geo.transform(df["geography"])
-        df["gender"] = le_gender.transform(df["gender"])
-        
-        # Scale numerical features only
-        df[numerical_features] = scaler.transform(df[numerical_features])
-        
-        # Ensure proper feature order for prediction
-        feature_cols = numerical_features + categorical_features
-        feature_array = df[feature_cols].values
+        # Encode and scale without going through pandas
+        feature_array = components['preprocessor'].transform(data)
 
         # Predict
-        prediction = model.predict(feature_array)[0]
         probability = model.predict_proba(feature_array)[0][1]
 
         # Prepare result with feature importance
         result = {
             "churn_probability": float(probability),
-            "feature_importance": feature_importance
+            "feature_importance": feature_importance,
+            "model_version": components['version']
         }
 
         # Cache the result
-        cache.set(cache_key, result, CACHE_TTL)
+        prediction_cache.set(cache_key, result)
 
         return JsonResponse(result)
         
@@ -264,6 +218,165 @@ def predict_churn(request):
         print(f"Traceback: {traceback.format_exc()}")
         return JsonResponse({"error": str(e)}, status=400)
 
+@csrf_exempt
+async def predict_churn_async(request):
+    """
+    Async variant of /predict/ for the ASGI deployment. Same payload and
+    response, but concurrent requests are coalesced by the micro-batcher into
+    a single vectorized predict_proba call. Under WSGI (runserver) each
+    request runs on its own event loop and is scored on its own.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": f"Method \"{request.method}\" not allowed."}, status=405)
+
+    try:
+        data = json.loads(request.body or b"{}")
+
+        components = await sync_to_async(get_model_components, thread_sensitive=False)()
+        if not components:
+            return JsonResponse({"error": "Model not loaded. Please train the model first."}, status=400)
+
+        cache_version = components['version']
+        cache_key = generate_cache_key(data, cache_version)
+        cached_result = await sync_to_async(prediction_cache.get, thread_sensitive=False)(cache_key)
+        if cached_result is not None:
+            return JsonResponse(cached_result)
+
+        probability, components = await batcher.submit(data)
+
+        result = {
+            "churn_probability": probability,
+            "feature_importance": components['feature_importance'],
+            "model_version": components['version']
+        }
+
+        # Only cache under the key of the model that actually scored the row
+        if components['version'] == cache_version:
+            await sync_to_async(prediction_cache.set, thread_sensitive=False)(cache_key, result)
+
+        return JsonResponse(result)
+
+    except Exception as e:
+        print(f"Prediction error: {str(e)}")
+        print(f"Traceback: {traceback.format_exc()}")
+        return JsonResponse({"error": str(e)}, status=400)
+
+@api_view(["POST"])
+@csrf_exempt
+@authentication_classes([BasicAuthentication])
+@permission_classes([IsAdminUser])
+def predict_churn_stream(request):
+    """
+    Score a CSV or NDJSON file of any size and stream the results back.
+
+    Send either a multipart upload in the "file" field, or the raw file as the
+    request body with a text/csv or application/x-ndjson content type.
+    Columns may use the Churn_Modelling.csv headers (CreditScore, Geography...)
+    or the API feature names. Query parameters:
+    - format: csv | ndjson (input, guessed from the file name/content type)
+    - output: ndjson (default) | csv
+    - chunk_size: rows scored per vectorized call
+    """
+    try:
+        upload = request.FILES.get('file') if request.content_type.startswith('multipart/') else None
+        if upload is not None:
+            stream = upload
+            input_format = request.query_params.get('format') or guess_format(upload.name, upload.content_type)
+        else:
+            # Read the body as it arrives instead of buffering it
+            stream = request._request
+            input_format = request.query_params.get('format') or guess_format(None, request.content_type)
+
+        output_format = request.query_params.get('output', 'ndjson')
+        chunk_size = int(request.query_params.get('chunk_size', STREAM_CHUNK_SIZE))
+
+        if input_format not in STREAM_FORMATS or output_format not in STREAM_FORMATS:
+            return JsonResponse({"error": f"Supported formats are: {', '.join(STREAM_FORMATS)}"}, status=400)
+        if chunk_size <= 0:
+            return JsonResponse({"error": "chunk_size must be positive"}, status=400)
+
+        components = get_model_components()
+        if not components:
+            return JsonResponse({"error": "Model not loaded. Please train the model first."}, status=400)
+
+        results = iter_scored_rows(components, stream, fmt=input_format, chunk_size=chunk_size)
+        response = StreamingHttpResponse(
+            iter_encoded_results(results, output_format),
+            content_type='text/csv' if output_format == 'csv' else 'application/x-ndjson'
+        )
+        response['X-Model-Version'] = components['version']
+        return response
+
+    except Exception as e:
+        print(f"Streaming prediction error: {str(e)}")
+        print(f"Traceback: {traceback.format_exc()}")
+        return JsonResponse({"error": str(e)}, status=400)
+
+@api_view(["GET", "DELETE"])
+@authentication_classes([BasicAuthentication])
+@permission_classes([IsAdminUser])
+def get_prediction_cache_stats(request):
+    """
+    GET: Hit/miss counters of this worker's prediction cache, for sizing the local LRU
+    DELETE: Reset the counters
+    """
+    if request.method == 'DELETE':
+        prediction_cache.reset_stats()
+
+    return Response({
+        'model_version': model_registry.version,
+        **prediction_cache.stats()
+    })
+
+@api_view(["POST"])
+@csrf_exempt
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def predict_churn_batch(request):
+    """
+    Score many customers in one request. Expects a JSON list of feature
+    objects (same keys and defaults as /predict/), or {"customers": [...]}.
+
+    Results are returned in input order. A row that cannot be scored (e.g. an
+    unknown geography) gets an "error" entry instead of failing the batch.
+    """
+    try:
+        data = request.data
+        rows = data.get('customers') if isinstance(data, dict) else data
+
+        if not isinstance(rows, list):
+            return JsonResponse({"error": "Expected a list of customers"}, status=400)
+
+        if len(rows) > BATCH_PREDICTION_MAX_ROWS:
+            return JsonResponse({
+                "error": f"Cannot score more than {BATCH_PREDICTION_MAX_ROWS} customers at once"
+            }, status=400)
+
+        components = get_model_components()
+        if not components:
+            return JsonResponse({"error": "Model not loaded. Please train the model first."}, status=400)
+
+        probabilities, errors = score_batch(components, rows)
+
+        results = []
+        for index, probability in enumerate(probabilities):
+            if index in errors:
+                results.append({"index": index, "error": errors[index]})
+            else:
+                results.append({"index": index, "churn_probability": float(probability)})
+
+        return JsonResponse({
+            "model_version": components['version'],
+            "count": len(results),
+            "error_count": len(errors),
+            "results": results
+        }, status=200 if not errors else 207)
+
+    except Exception as e:
+        print(f"Batch prediction error: {str(e)}")
+        print(f"Traceback: {traceback.format_exc()}")
+        return JsonResponse({"error": str(e)}, status=400)
+
 # User ViewSet
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
@@ -362,6 +475,68 @@ class CustomerChurnViewSet(viewsets.ModelViewSet):
         instance.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=True, methods=['get'])
+    def score(self, request, pk=None):
+        """
+        Current churn probability for a stored customer.
+
+        Served from the latest score written by monitor_customer_churn. The
+        customer is only rescored on demand when there is no stored score, or
+        when it is stale: the customer row changed after it was scored, or it
+        was produced by a different model than the one loaded now.
+        """
+        try:
+            latest = CustomerRiskState.objects.select_related('customer').filter(customer_id=pk).first()
+            customer = latest.customer if latest else get_object_or_404(CustomerChurn, customer_id=pk)
+
+            components = get_model_components()
+            current_version = components['version'] if components else None
+
+            is_stale = (
+                latest is None
+                or (current_version is not None and latest.model_version != current_version)
+                or (customer.updated_at is not None and customer.updated_at > latest.scored_at)
+            )
+
+            if latest is not None and (not is_stale or components is None):
+                return Response({
+                    'customer_id': customer.customer_id,
+                    'churn_probability': latest.churn_probability,
+                    'is_high_risk': latest.is_high_risk,
+                    'model_version': latest.model_version,
+                    'scored_at': latest.scored_at,
+                    'source': 'stored',
+                    'is_stale': is_stale
+                })
+
+            if components is None:
+                return Response(
+                    {'error': 'Model not loaded. Please train the model first.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            numeric, geography, gender = customer_feature_values(customer)
+            feature_array = components['preprocessor'].transform_values(numeric, geography, gender)
+            probability = float(components['model'].predict_proba(feature_array)[0][1])
+
+            return Response({
+                'customer_id': customer.customer_id,
+                'churn_probability': probability,
+                'is_high_risk': probability > settings.DISCORD_ALERTS.get('HIGH_RISK_THRESHOLD', 0.7),
+                'model_version': current_version,
+                'scored_at': timezone.now(),
+                'source': 'on_demand',
+                'is_stale': False
+            })
+
+        except Http404:
+            raise
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
 # Bulk Operations for CustomerChurn
 @api_view(['POST'])
 @permission_classes([permissions.IsAdminUser])
@@ -638,34 +813,46 @@ def get_risk_monitoring(request):
         if customer_id:
             # Get risk history for specific customer
             customer = get_object_or_404(CustomerChurn, customer_id=customer_id)
+            state = CustomerRiskState.objects.filter(customer=customer).first()
             history = ChurnRiskHistory.objects.filter(customer=customer).order_by('-timestamp')[:10]
+            # Scores older than the raw retention window only exist as daily rollups
+            daily_history = ChurnRiskDailyRollup.objects.filter(customer=customer).order_by('-date')[:30]
             
             return Response({
                 'customer_id': customer_id,
-                'current_probability': history[0].churn_probability if history else None,
-                'is_high_risk': history[0].is_high_risk if history else False,
+                'current_probability': state.churn_probability if state else None,
+                'is_high_risk': state.is_high_risk if state else False,
                 'history': [{
                     'timestamp': h.timestamp,
                     'probability': h.churn_probability,
                     'risk_change': h.risk_change,
                     'is_high_risk': h.is_high_risk
-                } for h in history]
+                } for h in history],
+                'daily_history': [{
+                    'date': d.date,
+                    'min_probability': d.min_probability,
+                    'max_probability': d.max_probability,
+                    'avg_probability': d.avg_probability,
+                    'last_probability': d.last_probability,
+                    'samples': d.sample_count,
+                    'high_risk_count': d.high_risk_count
+                } for d in daily_history]
             })
         
-        # Get all high risk customers
-        high_risk_records = ChurnRiskHistory.objects.filter(
+        # Get all customers currently at high risk (one row per customer)
+        high_risk_states = CustomerRiskState.objects.filter(
             is_high_risk=True,
-            timestamp__gte=timezone.now() - timezone.timedelta(days=7)
-        ).select_related('customer').order_by('-timestamp')
+            scored_at__gte=timezone.now() - timezone.timedelta(days=7)
+        ).select_related('customer').order_by('-scored_at')
         
         return Response({
             'high_risk_customers': [{
-                'customer_id': record.customer.customer_id,
-                'surname': record.customer.surname,
-                'probability': record.churn_probability,
-                'risk_change': record.risk_change,
-                'timestamp': record.timestamp
-            } for record in high_risk_records]
+                'customer_id': state.customer.customer_id,
+                'surname': state.customer.surname,
+                'probability': state.churn_probability,
+                'risk_change': state.risk_change,
+                'timestamp': state.scored_at
+            } for state in high_risk_states]
         })
         
     except Exception as e:
@@ -796,7 +983,13 @@ def manage_alert_config(request):
                     serializer = AlertConfigurationSerializer(data=data)
                 
                 if serializer.is_valid():
+                    previous_url = config.webhook_url if config else None
                     config = serializer.save()
+                    
+                    # Revalidate both webhooks on their next use
+                    invalidate_webhook_validation(previous_url)
+                    invalidate_webhook_validation(config.webhook_url)
+                    
                     # Update settings
                     if not hasattr(settings, 'DISCORD_ALERTS'):
                         settings.DISCORD_ALERTS = {}
@@ -941,6 +1134,43 @@ def get_alert_stats(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def get_monitoring_runs(request):
+    """
+    Recent monitoring runs, newest first, with their counters and per-stage
+    timings (fetch, preprocess, inference, write, alert).
+    Query params: limit (default 20), status
+    """
+    try:
+        limit = min(int(request.query_params.get('limit', 20)), 200)
+        queryset = MonitoringRun.objects.all()
+        
+        run_status = request.query_params.get('status')
+        if run_status:
+            queryset = queryset.filter(status=run_status.upper())
+        
+        serializer = MonitoringRunSerializer(queryset[:limit], many=True)
+        return Response(serializer.data)
+        
+    except ValueError:
+        return Response(
+            {'error': 'limit must be an integer'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def get_monitoring_run(request, run_id):
+    """Get a single monitoring run"""
+    run = get_object_or_404(MonitoringRun, pk=run_id)
+    return Response(MonitoringRunSerializer(run).data)
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAdminUser])
 def get_risk_dashboard(request):
@@ -957,73 +1187,37 @@ def get_risk_dashboard(request):
         high_risk_threshold = config.high_risk_threshold if config else 0.7
         risk_increase_threshold = config.risk_increase_threshold if config else 20.0
 
-        # Get latest timestamp for each customer
-        latest_records = ChurnRiskHistory.objects.filter(
-            timestamp__gte=timezone.now() - timezone.timedelta(days=7)
-        ).values('customer').annotate(
-            latest_timestamp=Max('timestamp')
+        # Latest score per customer over the last 7 days: distribution, top high risk, recent increases
+        latest = latest_risk_summary(
+            since=timezone.now() - timezone.timedelta(days=7),
+            risk_increase_threshold=risk_increase_threshold,
+            limit=10
         )
 
-        # Get current high risk customers (only latest record per customer)
-        high_risk_customers = ChurnRiskHistory.objects.filter(
-            is_high_risk=True,
-            timestamp__gte=timezone.now() - timezone.timedelta(days=7)
-        ).select_related('customer').filter(
-            timestamp__in=[record['latest_timestamp'] for record in latest_records]
-        ).order_by('-churn_probability')[:10]
-
-        # Get significant risk increases (only latest record per customer)
-        significant_increases = ChurnRiskHistory.objects.filter(
-            risk_change__gte=risk_increase_threshold,
-            timestamp__gte=timezone.now() - timezone.timedelta(days=7)
-        ).select_related('customer').filter(
-            timestamp__in=[record['latest_timestamp'] for record in latest_records]
-        ).order_by('-timestamp')[:10]
-
-        # Get risk distribution (using latest records only)
-        risk_distribution = ChurnRiskHistory.objects.filter(
-            timestamp__in=[record['latest_timestamp'] for record in latest_records]
-        ).aggregate(
-            very_high=Count('id', filter=Q(churn_probability__gte=0.8)),
-            high=Count('id', filter=Q(churn_probability__range=(0.6, 0.8))),
-            medium=Count('id', filter=Q(churn_probability__range=(0.4, 0.6))),
-            low=Count('id', filter=Q(churn_probability__range=(0.2, 0.4))),
-            very_low=Count('id', filter=Q(churn_probability__lt=0.2))
-        )
-
-        # Get daily average risk trend
-        daily_risk_trend = ChurnRiskHistory.objects.filter(
-            timestamp__gte=timezone.now() - timezone.timedelta(days=30)
-        ).values('timestamp__date').annotate(
-            avg_risk=Avg('churn_probability'),
-            high_risk_count=Count('id', filter=Q(is_high_risk=True))
-        ).order_by('timestamp__date')
+        # Get daily average risk trend, precomputed by the monitoring runs
+        risk_trend = recent_trend(days=30)
 
         return Response({
             'high_risk_customers': [{
-                'customer_id': h.customer.customer_id,
-                'customer_name': h.customer.surname,
-                'probability': h.churn_probability,
-                'risk_change': h.risk_change,
-                'last_updated': h.timestamp
-            } for h in high_risk_customers],
+                'customer_id': h['customer_id'],
+                'customer_name': h['surname'],
+                'probability': h['churn_probability'],
+                'risk_change': h['risk_change'],
+                'last_updated': h['scored_at']
+            } for h in latest['high_risk_customers']],
             
             'significant_increases': [{
-                'customer_id': h.customer.customer_id,
-                'customer_name': h.customer.surname,
-                'probability': h.churn_probability,
-                'risk_change': h.risk_change,
-                'previous_probability': h.previous_probability,
-                'changed_at': h.timestamp
-            } for h in significant_increases],
+                'customer_id': h['customer_id'],
+                'customer_name': h['surname'],
+                'probability': h['churn_probability'],
+                'risk_change': h['risk_change'],
+                'previous_probability': h['previous_probability'],
+                'changed_at': h['scored_at']
+            } for h in latest['significant_increases']],
             
-            'risk_distribution': risk_distribution,
+            'risk_distribution': latest['risk_distribution'],
             
-            'risk_trend': [{
-                'date': item['timestamp__date'],
-                'avg_risk': item['avg_risk'],
-                'high_risk_count': item['high_risk_count']
-            } for item in daily_risk_trend],
+            'risk_trend': risk_trend,
             
             'thresholds': {
                 'high_risk': high_risk_threshold,
@@ -1043,7 +1237,7 @@ def trigger_monitoring(request):
     """
     Manually trigger the customer churn monitoring task.
     This will:
-    1. Calculate churn probabilities for all customers
+    1. Calculate churn probabilities for changed customers (all with full_sweep=true)
     2. Track risk changes
     3. Send alerts if configured
     """
@@ -1064,8 +1258,10 @@ def trigger_monitoring(request):
             
             print("Starting manual monitoring task...")  # Debug log
             
+            full_sweep = str(request.data.get('full_sweep', False)).lower() == 'true'
+            
             # Run the monitoring task synchronously for immediate feedback
-            result = monitor_customer_churn()
+            result = monitor_customer_churn(full_sweep=full_sweep, inline=True)
             print(f"Monitoring task result: {result}")  # Debug log
             
             # Parse the result message
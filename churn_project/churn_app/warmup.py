@@ -0,0 +1,88 @@
+import threading
+import time
+
+import numpy as np
+from django.utils import timezone
+
+from .model_registry import registry as model_registry
+from .scoring import score_batch
+
+# Synthetic customer used to exercise the prediction code paths
+WARMUP_CUSTOMER = {
+    "credit_score": 600,
+    "geography": "France",
+    "gender": "Female",
+    "age": 40,
+    "tenure": 3,
+    "balance": 60000,
+    "num_of_products": 2,
+    "has_cr_card": 1,
+    "is_active_member": 1,
+    "estimated_salary": 100000
+}
+
+_state_lock = threading.Lock()
+_state = {
+    'warmed': False,
+    'warmed_at': None,
+    'duration_ms': None,
+    'error': None,
+}
+
+
+def warm_up_model(registry=None):
+    """
+    Load and validate the model components and run synthetic predictions
+    through the single-row and batch paths. Returns True when the worker is
+    ready to serve; failures are recorded for the readiness endpoint instead
+    of raised, so a missing model never prevents the process from starting.
+    """
+    registry = registry or model_registry
+    start = time.perf_counter()
+    try:
+        components = registry.get()
+
+        for key in ('model', 'preprocessor', 'version'):
+            if components.get(key) is None:
+                raise ValueError(f"Model artifact is missing '{key}'")
+
+        single = components['model'].predict_proba(
+            components['preprocessor'].transform(WARMUP_CUSTOMER)
+        )[0][1]
+        batch, errors = score_batch(components, [WARMUP_CUSTOMER, WARMUP_CUSTOMER])
+
+        if errors:
+            raise ValueError(f"Synthetic batch prediction failed: {errors}")
+        if not 0.0 <= single <= 1.0 or not np.allclose(batch, single):
+            raise ValueError(f"Synthetic prediction returned an invalid probability: {single}")
+
+        duration_ms = (time.perf_counter() - start) * 1000
+        with _state_lock:
+            _state.update(warmed=True, warmed_at=timezone.now(), duration_ms=duration_ms, error=None)
+        print(f"Churn model {components['version']} warmed up in {duration_ms:.0f} ms")
+        return True
+
+    except Exception as e:
+        with _state_lock:
+            _state.update(warmed=False, error=str(e))
+        print(f"Model warm-up failed: {str(e)}")
+        return False
+
+
+def get_readiness(registry=None):
+    """Snapshot of this worker's model state for the readiness endpoint"""
+    registry = registry or model_registry
+    with _state_lock:
+        state = dict(_state)
+
+    # A model loaded lazily by a request (e.g. after a failed warm-up) also counts as ready
+    return {
+        'ready': registry.is_loaded,
+        'model_loaded': registry.is_loaded,
+        'model_version': registry.version,
+        'inference_engine': registry.loaded_engine,
+        'warmed_up': state['warmed'],
+        'warmed_at': state['warmed_at'],
+        'warmup_ms': state['duration_ms'],
+        'error': state['error'],
+    }
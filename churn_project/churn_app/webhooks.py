@@ -0,0 +1,121 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class WebhookSender:
+    """
+    Delivers webhook messages over a pooled, keep-alive requests.Session.
+
+    Connections are reused across messages instead of paying TCP+TLS setup
+    for every alert. Failed attempts are retried with exponential backoff
+    and full jitter; a 429 waits exactly as long as Retry-After says.
+    send_many() delivers several messages concurrently, taking a token from
+    a rate limiter before each one.
+    """
+
+    def __init__(self, pool_size=10, timeout=10, backoff_base=0.5, backoff_max=30.0,
+                 sleep=time.sleep, jitter=random.random):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sleep = sleep
+        self.jitter = jitter
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        # Created lazily so forked Celery workers never share sockets with the parent
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers['Content-Type'] = 'application/json'
+                self._session = session
+            return self._session
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff for the given (0-based) attempt"""
+        return self.jitter() * min(self.backoff_max, self.backoff_base * (2 ** attempt))
+
+    def send(self, url, message, max_retries=3, on_gone=None):
+        """
+        POST one JSON message. Returns (success, error_message).
+        on_gone(url) is called when the webhook answers 401/404, which is not retried.
+        """
+        error_msg = "Max retries exceeded"
+        for attempt in range(max_retries):
+            try:
+                response = self.session.post(url, json=message, timeout=self.timeout)
+            except requests.RequestException as e:
+                error_msg = f"Error sending Discord message: {str(e)}"
+                if attempt < max_retries - 1:
+                    self.sleep(self.backoff(attempt))
+                continue
+
+            if response.status_code in (200, 204):
+                return True, None
+            if response.status_code == 429:  # Rate limit hit
+                error_msg = "Discord API returned status code: 429"
+                if attempt < max_retries - 1:
+                    self.sleep(retry_after_seconds(response, self.backoff(attempt)))
+                continue
+            if response.status_code in (401, 404):
+                # Webhook deleted or token revoked
+                if on_gone:
+                    on_gone(url)
+                return False, f"Discord API returned status code: {response.status_code}"
+
+            error_msg = f"Discord API returned status code: {response.status_code}"
+            if attempt < max_retries - 1:
+                self.sleep(self.backoff(attempt))
+
+        return False, error_msg
+
+    def send_many(self, url, messages, rate_limiter=None, wait_timeout=None, max_workers=4, send=None):
+        """
+        Deliver messages concurrently on up to max_workers threads, each one
+        waiting for a rate limiter token first. send(url, message) defaults
+        to self.send. Returns a (success, error_message) per message, in order.
+        """
+        send = send or self.send
+
+        def deliver(message):
+            if rate_limiter is not None and not rate_limiter.acquire(blocking=True, timeout=wait_timeout):
+                return False, "Rate limit exceeded (30 messages/minute)"
+            return send(url, message)
+
+        if len(messages) <= 1 or max_workers <= 1:
+            return [deliver(message) for message in messages]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(messages), self.pool_size)) as executor:
+            return list(executor.map(deliver, messages))
+
+
+def retry_after_seconds(response, default):
+    """Seconds to wait after a 429, from the Retry-After header or Discord's JSON body"""
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return float(response.json().get('retry_after', default))
+    except (TypeError, ValueError, AttributeError):
+        return default
+
+
+# One pooled sender per process
+webhook_sender = WebhookSender()
@@ -1,6 +1,7 @@
 # churn_project/celery.py
 import os
 from celery import Celery
+from celery.schedules import crontab
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "churn_project.settings")
 app = Celery("churn_project")
@@ -10,6 +11,19 @@ app.autodiscover_tasks()
 app.conf.beat_schedule = {
     'monitor-customer-churn': {
         'task': 'churn_app.tasks.monitor_customer_churn',
-        'schedule': 3600.0,  # Run every hour
+        'schedule': 3600.0,  # Run every hour, rescoring changed customers only
+    },
+    'monitor-customer-churn-full-sweep': {
+        'task': 'churn_app.tasks.monitor_customer_churn',
+        'schedule': crontab(hour=2, minute=30),  # Rescore everyone once a day
+        'kwargs': {'full_sweep': True},
+    },
+    'compact-risk-history': {
+        'task': 'churn_app.tasks.compact_risk_history',
+        'schedule': crontab(minute=45),  # Hourly, in bounded batches, until the backlog is compacted
+    },
+    'maintain-risk-history-partitions': {
+        'task': 'churn_app.tasks.maintain_risk_history_partitions',
+        'schedule': crontab(hour=1, minute=15),  # PostgreSQL only: create upcoming months, drop compacted ones
     },
 }
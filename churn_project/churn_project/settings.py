@@ -99,6 +99,61 @@ CACHES = {
         }
     }
 }
+# In-process model registry
+CHURN_MODEL = {
+    'RELOAD_CHECK_INTERVAL': 5,  # Seconds between checks for a newly trained artifact
+    'INFERENCE_ENGINE': os.environ.get('CHURN_INFERENCE_ENGINE', 'sklearn'),  # 'sklearn' or 'flat'
+    'MMAP': os.environ.get('CHURN_MODEL_MMAP', 'false').lower() == 'true',  # Share flat forest pages across workers
+    'PRELOAD': os.environ.get('CHURN_MODEL_PRELOAD', 'false').lower() == 'true',  # Load and warm up the model at startup
+}
+
+# Two-tier prediction cache (in-process LRU in front of Redis)
+PREDICTION_CACHE = {
+    'TTL': 60 * 60,  # Seconds predictions stay in Redis
+    'LOCAL_MAXSIZE': 10000,  # Entries kept in each worker's LRU
+}
+
+# Micro-batching for /predict/async/ under ASGI
+PREDICTION_BATCHING = {
+    'MAX_BATCH_SIZE': 64,  # Rows scored per predict_proba call
+    'MAX_WAIT_MS': 5,  # How long the first request in a batch waits for company
+}
+
+# Hourly churn monitoring (churn_app.tasks.monitor_customer_churn)
+MONITORING = {
+    'CHUNK_SIZE': 1000,  # Customers fetched and scored per vectorized call
+    'WRITE_BATCH_SIZE': 1000,  # History/alert rows per bulk insert transaction
+    'USE_COPY': os.environ.get('CHURN_MONITORING_USE_COPY', 'true').lower() == 'true',  # COPY on PostgreSQL
+    'SHARD_SIZE': 50000,  # Customers per parallel Celery shard; None runs the whole monitor in one task
+    'LOG_SAMPLE_RATE': 0.01,  # Share of per-customer events logged after the first few of each kind
+}
+
+# ChurnRiskHistory retention (churn_app.tasks.compact_risk_history)
+RISK_HISTORY = {
+    'RAW_RETENTION_DAYS': int(os.environ.get('CHURN_RAW_RETENTION_DAYS', 30)),  # Raw rows kept; older ones become daily rollups (min 7)
+    'ROLLUP_RETENTION_DAYS': 730,  # Daily rollups kept; None keeps them forever
+    'COMPACTION_BATCH_SIZE': 1000,  # Customers compacted per transaction
+    'MAX_BATCHES_PER_RUN': 500,  # Bounds one compaction run; the next run picks up the rest
+    'PARTITION_MONTHS_AHEAD': 3,  # Monthly partitions created ahead of time (PostgreSQL)
+}
+
+# Structured (JSON line) monitoring logs go to the console for the log shipper
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'churn_app': {
+            'handlers': ['console'],
+            'level': os.environ.get('CHURN_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
 CELERY_BROKER_URL = 'redis://redis:6379/0'
 CELERY_RESULT_BACKEND = 'redis://redis:6379/0'
 from celery.schedules import crontab
@@ -210,4 +265,11 @@ DISCORD_ALERTS = {
     'HIGH_RISK_THRESHOLD': 0.7,  # Probability threshold for high risk
     'RISK_INCREASE_THRESHOLD': 20.0,  # Percentage increase threshold
     'ENABLED': True,  # Enable/disable alerts
+    'VALIDATION_CACHE_TTL': 600,  # Seconds a webhook validation result is reused
+    'RATE_LIMIT': {
+        'BACKEND': os.environ.get('DISCORD_RATE_LIMIT_BACKEND', 'redis'),  # 'redis' (shared) or 'local'
+        'MESSAGES_PER_MINUTE': 30,  # Token refill rate
+        'BURST': 5,  # Bucket capacity
+    },
+    'MAX_CONCURRENT_DELIVERIES': 4,  # Webhook messages in flight at once
 }